@@ -1,34 +1,61 @@
 class NationsRankings {
     constructor() {
-        this.nations = [];
+        // Leaderboards come pre-ranked and pre-merged from the scraper
+        this.boardUrl = 'leaderboards/merged';
+        this.boards = new Map();
         this.init();
     }
 
-    async init() {
-        await this.loadData();
+    init() {
         this.setupEventListeners();
         this.showRichest();
     }
 
-    async loadData() {
+    // Render the first page as soon as it arrives, then the rest of the board
+    async loadBoard(board, containerId, getDisplayData) {
+        if (this.boards.has(board)) {
+            this.renderRankings(containerId, this.boards.get(board), getDisplayData);
+            return;
+        }
+
         try {
-            const response = await fetch('nations_comprehensive.json');
-            if (!response.ok) {
-                throw new Error(`HTTP error ${response.status}`);
+            const firstPage = await this.fetchJson(`${this.boardUrl}/${board}/page-1.json`);
+            let entries = firstPage ? firstPage.entries : [];
+            if (firstPage) {
+                this.renderRankings(containerId, entries, getDisplayData);
+                const rest = [];
+                for (let page = 2; page <= firstPage.pages; page++) {
+                    rest.push(this.fetchJson(`${this.boardUrl}/${board}/page-${page}.json`));
+                }
+                for (const page of await Promise.all(rest)) {
+                    entries = entries.concat(page ? page.entries : []);
+                }
+            } else {
+                // Written without page shards
+                const whole = await this.fetchJson(`${this.boardUrl}/${board}.json`);
+                entries = whole ? whole.entries : [];
             }
-            const data = await response.json();
-            
-            // Apply nation merges
-            this.nations = this.mergeNations(data);
 
-            console.log(`Loaded ${this.nations.length} nations`);
-            console.log('First nation:', this.nations[0]);
+            console.log(`Loaded ${entries.length} nations for ${board}`);
+            this.boards.set(board, entries);
+            this.renderRankings(containerId, entries, getDisplayData);
         } catch (error) {
-            console.error('Error loading nation data:', error);
-            this.nations = [];
+            console.error(`Error loading ${board} leaderboard:`, error);
+            this.renderRankings(containerId, [], getDisplayData);
         }
     }
 
+    async fetchJson(url) {
+        const response = await fetch(url);
+        if (response.status === 404) {
+            return null;
+        }
+        if (!response.ok) {
+            throw new Error(`HTTP error ${response.status}`);
+        }
+        return response.json();
+    }
+
     setupEventListeners() {
         const tabButtons = document.querySelectorAll('.tab-button');
         tabButtons.forEach(button => {
@@ -62,16 +89,12 @@ class NationsRankings {
         }
     }
     
-    // Updated to use unique_players for population
+    // Ranked by unique_players
     showPopulous() {
-        const sorted = [...this.nations]
-            .filter(nation => nation.unique_players > 0)
-            .sort((a, b) => b.unique_players - a.unique_players);
-
-        this.renderRankings('populous-list', sorted, (nation) => ({
+        this.loadBoard('populous', 'populous-list', (nation) => ({
             primary: nation.unique_players.toLocaleString(),
             stats: [
-                { label: `${nation.territories.length} cities` },
+                { label: `${nation.territory_count} cities` },
                 { label: `${nation.total_chunks.toLocaleString()} chunks` },
                 { label: this.formatCurrency(nation.total_balance) }
             ]
@@ -79,14 +102,10 @@ class NationsRankings {
     }
 
     showRichest() {
-        const sorted = [...this.nations]
-            .filter(nation => nation.total_balance > 0)
-            .sort((a, b) => b.total_balance - a.total_balance);
-
-        this.renderRankings('richest-list', sorted, (nation) => ({
+        this.loadBoard('richest', 'richest-list', (nation) => ({
             primary: this.formatCurrency(nation.total_balance),
             stats: [
-                { label: `${nation.territories.length} cities` },
+                { label: `${nation.territory_count} cities` },
                 { label: `${nation.total_chunks.toLocaleString()} chunks` },
                 { label: `${nation.unique_players} players` }
             ]
@@ -94,91 +113,24 @@ class NationsRankings {
     }
 
     showLargest() {
-        const sorted = [...this.nations]
-            .filter(nation => nation.total_chunks > 0)
-            .sort((a, b) => b.total_chunks - a.total_chunks);
-
-        this.renderRankings('largest-list', sorted, (nation) => ({
+        this.loadBoard('largest', 'largest-list', (nation) => ({
             primary: `${nation.total_chunks.toLocaleString()}`,
             stats: [
-                { label: `${nation.territories.length} cities` },
+                { label: `${nation.territory_count} cities` },
                 { label: this.formatCurrency(nation.total_balance) },
                 { label: `${nation.unique_players} players` }
             ]
         }));
     }
 
-    // New method to merge nations based on the provided groups
-    mergeNations(data) {
-        const mergeGroups = {
-            "Imperial Crownlands of Osentar": [
-                "MayraSovereignty", "Vinovia", "Lenoria", "Osentar",
-                "osentar_newteritory", "Kutaiyara", "Orion", "Nova_Stellare",
-            ],
-            "Eternal Empire of Bardonia": [
-                "Bardonia", "Seneca-Diarchy", "Varaxis-Imperium", "Regnum_Aquilarum"
-            ]
-        };
-
-        const mergedNations = new Map();
-        const nationsToMerge = new Set(Object.values(mergeGroups).flat());
-
-        for (const nation of data) {
-            let isMerged = false;
-            for (const [groupName, members] of Object.entries(mergeGroups)) {
-                if (members.includes(nation.name)) {
-                    if (!mergedNations.has(groupName)) {
-                        mergedNations.set(groupName, {
-                            name: groupName,
-                            level: 'Empire', // Set a default level for the merged group
-                            territories: new Set(),
-                            total_chunks: 0,
-                            total_balance: 0,
-                            unique_players: new Set(),
-                        });
-                    }
-                    
-                    const mergedGroup = mergedNations.get(groupName);
-                    mergedGroup.total_chunks += nation.total_chunks;
-                    mergedGroup.total_balance += nation.total_balance;
-                    nation.territories.forEach(t => mergedGroup.territories.add(t));
-                    nation.all_players.forEach(p => mergedGroup.unique_players.add(p));
-
-                    isMerged = true;
-                    break;
-                }
-            }
-            if (!isMerged && !nationsToMerge.has(nation.name)) {
-                mergedNations.set(nation.name, {
-                    ...nation,
-                    territories: new Set(nation.territories),
-                    unique_players: new Set(nation.all_players),
-                });
-            }
-        }
-
-        // Convert sets back to arrays and format data
-        const finalNations = [];
-        for (const nation of mergedNations.values()) {
-            finalNations.push({
-                ...nation,
-                territories: Array.from(nation.territories),
-                unique_players: nation.unique_players.size,
-                all_players: Array.from(nation.unique_players)
-            });
-        }
-        
-        return finalNations;
-    }
-
     renderRankings(containerId, nations, getDisplayData) {
         const container = document.getElementById(containerId);
 
         container.innerHTML = `
             <table class="rankings">
-                ${nations.map((nation, index) => {
+                ${nations.map((nation) => {
                     const displayData = getDisplayData(nation);
-                    const rank = index + 1;
+                    const rank = nation.rank;
 
                     return `
                         <tr class="nation-card">
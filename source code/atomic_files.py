@@ -0,0 +1,37 @@
+import filecmp
+import os
+from contextlib import contextmanager
+from typing import IO, Iterator, Union
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = 'w', **kwargs) -> Iterator[IO]:
+    """
+    Open a temporary file next to path for writing and move it over path
+    once the block finishes, so readers (the site, a lookup holding the
+    old coordinates.bin mapped) only ever see a complete old or new file.
+    If the new bytes equal the existing file it is left untouched, mtime
+    included. Nothing is replaced if the block raises.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+        if os.path.exists(path) and filecmp.cmp(tmp_path, path, shallow=False):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_atomic(path: str, data: Union[str, bytes]):
+    """Write a whole str or bytes through atomic_open"""
+    if isinstance(data, bytes):
+        with atomic_open(path, 'wb') as f:
+            f.write(data)
+    else:
+        with atomic_open(path, 'w', encoding='utf-8') as f:
+            f.write(data)
@@ -0,0 +1,728 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from borders import border_graph
+from coordinate_store import CoordinateStore
+from detail_parser import check_detail_parity, parse_detail
+from geometry import np, territory_geometry
+from history import HistoryStore
+from main import StoneworksDataScraper
+from marker_stream import iter_file_chunks, iter_marker_set, load_marker_set
+from player_index import PlayerIndex, write_player_index
+from player_registry import PlayerList, PlayerRegistry, PlayerUnion
+from spatial_index import SpatialIndex, point_in_ring
+from synthetic_markers import iter_synthetic_markers, write_synthetic_payload
+from territory_record import json_default
+from tests.helpers import (output_digest, reference_nation_fields, sample_coordinate_store, serve_standin_wiki,
+                           standin_nation_page)
+from wiki_extractor import extract_nation_fields
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINES_FILE = os.path.join(HERE, 'benchmark_baselines.json')
+
+# Stage timings shorter than this in the baseline are too noisy to flag
+MIN_COMPARED_SECONDS = 0.05
+
+
+def sample_markers(count: int, seed: int = 0) -> List[Dict]:
+    """Generate synthetic Lands markers as a list"""
+    return [marker for _, marker in iter_synthetic_markers(count, seed)]
+
+
+def load_markers(path: str) -> List[Dict]:
+    """Load the Lands markers from a saved markers.json"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return list(data.get("me.angeschossen.lands", {}).get("markers", {}).values())
+
+
+def bench_parse(markers: List[Dict], repeat: int):
+    """Compare fast-path and BeautifulSoup detail parsing throughput"""
+    details = [m.get('detail', '') for m in markers]
+
+    mismatches = sum(1 for d in details if not check_detail_parity(d))
+    print(f"{len(details)} markers, {mismatches} parity mismatches")
+
+    for label, use_soup in (('fast path', False), ('beautifulsoup', True)):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for detail in details:
+                parse_detail(detail, use_soup=use_soup)
+            best = min(best, time.perf_counter() - start)
+        print(f"  {label:<14} {len(details) / best:>12,.0f} markers/sec  ({best * 1000:.1f} ms)")
+
+
+def bench_ingest(path: str):
+    """Compare peak memory and time of whole-payload and streaming ingestion"""
+    print(f"{path}: {os.path.getsize(path) / 1e6:.1f} MB")
+
+    def whole():
+        for _ in load_marker_set(path).items():
+            pass
+
+    def streamed():
+        for _ in iter_marker_set(iter_file_chunks(path)):
+            pass
+
+    for label, ingest in (('whole payload', whole), ('streaming', streamed)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        ingest()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {label:<14} peak {peak / 1e6:>8.1f} MB  ({elapsed * 1000:.0f} ms)")
+
+
+def run_scrape_quietly(scraper: StoneworksDataScraper) -> float:
+    """Run the markers stage without its log output and return the elapsed seconds"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.scrape_bluemap_markers()
+    return time.perf_counter() - start
+
+
+def bench_territory_memory(path: str):
+    """Compare memory kept by dict, slotted and lean territory records, and territories_data.json sizes"""
+    sizes = {}
+    for label, lean, as_dicts in (('dicts', False, True), ('slotted records', False, False),
+                                  ('lean records', True, False)):
+        gc.collect()
+        tracemalloc.start()
+        scraper = StoneworksDataScraper(markers_file=path, state_file=None, lean=lean)
+        run_scrape_quietly(scraper)
+        if as_dicts:
+            # The dict-per-territory model records replaced
+            scraper.territories_data = [territory.to_dict() for territory in scraper.territories_data]
+        gc.collect()
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        territories = scraper.territories_data
+        print(f"  {label:<16} {len(territories)} territories  retained {current / 1e6:>7.1f} MB")
+        if not as_dicts:
+            for compact in (False, True):
+                text = json.dumps(territories, ensure_ascii=False, default=json_default,
+                                  **({'separators': (',', ':')} if compact else {'indent': 2}))
+                sizes[f"{'lean' if lean else 'full'}, {'compact' if compact else 'indent=2'}"] = len(text.encode('utf-8'))
+        del scraper, territories
+    for label, size in sizes.items():
+        print(f"  territories_data.json {label:<16} {size / 1e6:>7.1f} MB")
+
+
+def bench_workers(path: str, worker_counts: List[int], batch_size: int):
+    """Time marker parsing and aggregation across worker counts"""
+    baseline = None
+    for workers in worker_counts:
+        scraper = StoneworksDataScraper(markers_file=path, workers=workers, parse_batch_size=batch_size)
+        elapsed = run_scrape_quietly(scraper)
+        digest = output_digest(scraper)
+        if baseline is None:
+            baseline = (elapsed, digest)
+        identical = 'identical' if digest == baseline[1] else 'DIFFERENT'
+        print(f"  {workers:>2} workers  {elapsed * 1000:>8.0f} ms  "
+              f"x{baseline[0] / elapsed:.2f}  output {identical}")
+
+
+def bench_wiki(pages: int, latency: float, concurrency_levels: List[int], rate: float):
+    """Crawl a local stand-in wiki at several concurrency levels"""
+    server, base_url = serve_standin_wiki(pages, latency)
+    try:
+        baseline = None
+        for concurrency in concurrency_levels:
+            scraper = StoneworksDataScraper(wiki_concurrency=concurrency, wiki_rate=rate)
+            scraper.wiki_base_url = base_url
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                scraper.scrape_wiki_nations()
+            elapsed = time.perf_counter() - start
+            records = json.dumps(scraper.nations_data, sort_keys=True, default=sorted)
+            if baseline is None:
+                baseline = (elapsed, records)
+            identical = 'identical' if records == baseline[1] else 'DIFFERENT'
+            print(f"  concurrency {concurrency:>2}  {len(scraper.nations_data)} pages  "
+                  f"{elapsed:>6.2f} s  x{baseline[0] / elapsed:.2f}  records {identical}")
+    finally:
+        server.shutdown()
+
+
+def bench_wiki_extract(pages: int, repeat: int):
+    """Compare the single-pass extractor with the eight extract_* functions per page"""
+    # Pad stand-in articles with navigation and prose so they weigh like real wiki pages
+    filler = ''.join(
+        f"<div><p>Paragraph {i} about trade routes near {i * 7}, {i * -3}.</p>"
+        f"<ul><li><a href='/wiki/Page_{i}'>Page {i}</a></li></ul></div>"
+        for i in range(150)
+    )
+    soups = [
+        BeautifulSoup(standin_nation_page(i).replace('</body>', filler + '</body>'), 'html.parser')
+        for i in range(pages)
+    ]
+
+    def comparable(fields: Dict) -> Dict:
+        return {**fields, 'cities': sorted(fields['cities'])}
+
+    mismatches = sum(
+        1 for soup in soups
+        if comparable(extract_nation_fields(soup)) != comparable(reference_nation_fields(soup))
+    )
+    print(f"{pages} pages, {mismatches} field mismatches")
+
+    for label, extract in (('single pass', extract_nation_fields),
+                           ('extract_*', reference_nation_fields)):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for soup in soups:
+                extract(soup)
+            best = min(best, time.perf_counter() - start)
+        print(f"  {label:<12} {best / pages * 1000:>8.2f} ms/page")
+
+
+def bench_geometry(territories: int, repeat: int):
+    """Time the batched territory geometry with numpy and in pure Python"""
+    store = sample_coordinate_store(territories)
+    print(f"{territories} territories, {store.segment_count} shapes, {len(store):,} vertices")
+
+    backends = [('pure Python', False)]
+    if np is not None:
+        backends.insert(0, ('numpy', True))
+    results = []
+    for label, use_numpy in backends:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            geometry = territory_geometry(store, use_numpy)
+            best = min(best, time.perf_counter() - start)
+        results.append(geometry)
+        print(f"  {label:<12} {best * 1000:>8.1f} ms")
+    if len(results) > 1:
+        print(f"  results {'identical' if results[0] == results[1] else 'DIFFERENT'}")
+
+
+def bench_spatial(territories: int, queries: int, seed: int = 0):
+    """Time spatial index build and point lookups against a scan of every shape"""
+    store = sample_coordinate_store(territories, seed)
+    rng = random.Random(seed)
+    points = [(rng.randrange(-21000, 21000), rng.randrange(-21000, 21000)) for _ in range(queries)]
+    print(f"{store.segment_count} shapes, {len(store):,} vertices, {queries} queries")
+
+    start = time.perf_counter()
+    index = SpatialIndex(store)
+    elapsed = time.perf_counter() - start
+    print(f"  build        {elapsed * 1000:>8.0f} ms  ({len(index.cells):,} cells of {index.cell_size} blocks)")
+
+    start = time.perf_counter()
+    indexed = [index.query(x, z) for x, z in points]
+    elapsed = time.perf_counter() - start
+    print(f"  indexed      {queries / elapsed:>12,.0f} lookups/sec")
+
+    def scan(x: float, z: float) -> List[int]:
+        return [
+            segment for segment in range(store.segment_count)
+            if point_in_ring(store.x[store.offsets[segment]:store.offsets[segment + 1]],
+                             store.z[store.offsets[segment]:store.offsets[segment + 1]], x + 0.5, z + 0.5)
+        ]
+
+    sample = points[:max(1, queries // 100)]
+    start = time.perf_counter()
+    scanned = [scan(x, z) for x, z in sample]
+    elapsed = time.perf_counter() - start
+    print(f"  full scan    {len(sample) / elapsed:>12,.0f} lookups/sec")
+    identical = 'identical' if scanned == indexed[:len(sample)] else 'DIFFERENT'
+    print(f"  {sum(1 for hits in indexed if hits)} points claimed, scan results {identical}")
+
+
+def tiled_coordinate_store(territories: int, seed: int = 0) -> CoordinateStore:
+    """
+    Fill a coordinate store with rows of touching rectangular lands, so
+    most of them share borders: some plots are left unclaimed, some lands
+    get a second shape reaching into the next row (contested chunks), and
+    runs of neighbouring lands form nations.
+    """
+    rng = random.Random(seed)
+    store = CoordinateStore()
+    row_width = int((territories * 100) ** 0.5)
+    x, z, height = 0, 0, rng.randint(3, 16)
+    nation = None
+    for i in range(territories):
+        width = rng.randint(3, 16)
+        if x + width > row_width:
+            x, z, height = 0, z + height, rng.randint(3, 16)
+        if rng.random() < 0.3:
+            nation = f"Nation_{i}" if rng.random() < 0.8 else None
+        if rng.random() >= 0.05:
+            store.add_shape(f"Land_{i}", nation, [{'x': cx * 16, 'z': cz * 16} for cx, cz in (
+                (x, z), (x + width, z), (x + width, z + height), (x, z + height))])
+            if rng.random() < 0.05:
+                store.add_shape(f"Land_{i}", nation, [{'x': cx * 16, 'z': cz * 16} for cx, cz in (
+                    (x + 1, z + height - 1), (x + 3, z + height - 1), (x + 3, z + height + 2), (x + 1, z + height + 2))])
+        x += width
+    return store
+
+
+def bench_borders(territories: int, band_sizes: List[int], seed: int = 0):
+    """Time chunk rasterization and the border graph, and the memory each band height peaks at"""
+    store = tiled_coordinate_store(territories, seed)
+    print(f"{territories} territories, {store.segment_count} shapes")
+    graphs = []
+    for band_rows in band_sizes:
+        start = time.perf_counter()
+        graph = border_graph(store, band_rows)
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        tracemalloc.start()
+        border_graph(store, band_rows)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        graphs.append(graph)
+        print(f"  {band_rows:>6} rows/band {elapsed:>7.2f} s  peak {peak / 1e6:>7.1f} MB  "
+              f"({graph['chunks'] / elapsed:,.0f} chunks/s)")
+    graph = graphs[0]
+    enclaves = sum(1 for node in graph['territories'] if node['enclave_of'])
+    print(f"  {graph['chunks']:,} chunks, {graph['contested_chunks']:,} contested, "
+          f"{len(graph['territory_edges']):,} territory and {len(graph['nation_edges']):,} nation edges, "
+          f"{enclaves} enclaves")
+    print(f"  results {'identical' if all(other == graph for other in graphs) else 'DIFFERENT'} across band heights")
+
+
+def bench_history(snapshots: int, nations: int, territories: int, seed: int = 0):
+    """Time snapshot ingestion and history queries as the database grows"""
+    rng = random.Random(seed)
+    territory_rows = [
+        {'name': f"Land_{i}", 'nation_name': f"Nation_{i % nations}",
+         'balance': rng.uniform(0, 5e6), 'chunks': rng.randint(1, 900), 'player_count': rng.randint(1, 30)}
+        for i in range(territories)
+    ]
+
+    def nation_rows() -> List[Dict]:
+        totals: Dict[str, Dict] = {}
+        for territory in territory_rows:
+            nation = totals.setdefault(territory['nation_name'], {
+                'name': territory['nation_name'], 'territories': [],
+                'total_balance': 0.0, 'total_chunks': 0, 'unique_players': 0,
+            })
+            nation['territories'].append(territory['name'])
+            nation['total_balance'] += territory['balance']
+            nation['total_chunks'] += territory['chunks']
+            nation['unique_players'] += territory['player_count']
+        return list(totals.values())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        with HistoryStore(path) as history:
+            print(f"{snapshots} snapshots of {nations} nations and {territories} territories")
+            report_every = max(1, snapshots // 5)
+            window = []
+            for index in range(snapshots):
+                for territory in territory_rows:
+                    territory['balance'] *= rng.uniform(0.95, 1.06)
+                    territory['chunks'] = max(1, territory['chunks'] + rng.randint(-3, 4))
+                rows = nation_rows()
+                taken_at = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(1.6e9 + index * 3600))
+                start = time.perf_counter()
+                history.record_snapshot(rows, territory_rows, taken_at=taken_at)
+                window.append(time.perf_counter() - start)
+                if (index + 1) % report_every == 0:
+                    print(f"  after {index + 1:>6} snapshots  ingest {sum(window) / len(window) * 1000:>6.1f} ms/snapshot")
+                    window = []
+
+            middle = time.strftime('%Y-%m-%d', time.gmtime(1.6e9 + snapshots // 2 * 3600))
+            queries = [
+                ('rank over time', lambda: history.rank_history('Nation_7')),
+                ('territory rank over time', lambda: history.rank_history('Land_7', entity='territory')),
+                ('top 10 on a date', lambda: history.top('balance', middle)),
+                ('top movers', lambda: history.top_movers(1, None, 'chunks')),
+            ]
+            for label, query in queries:
+                best = float('inf')
+                for _ in range(5):
+                    start = time.perf_counter()
+                    query()
+                    best = min(best, time.perf_counter() - start)
+                print(f"  {label:<26} {best * 1000:>8.2f} ms")
+        print(f"  database {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+def bench_players(territories: int, nations: int, players: int, seed: int = 0):
+    """Compare string dict unions with registry id arrays for territory, nation and server player sets"""
+    rng = random.Random(seed)
+    markers = [
+        (f"Land_{rng.randrange(territories)}", f"Nation_{rng.randrange(nations)}",
+         [rng.randrange(players) for _ in range(rng.randint(1, 30))])
+        for _ in range(territories * 6 // 5)
+    ]
+    print(f"{len(markers)} markers, {sum(len(m[2]) for m in markers):,} memberships, "
+          f"{nations} nations, {players} players")
+
+    def parsed():
+        # Every player parsed from a detail is a fresh string, as in a real run
+        return [(land, nation, [''.join(['Player', str(i)]) for i in ids]) for land, nation, ids in markers]
+
+    def with_dicts(batches):
+        lands: Dict[str, List[str]] = {}
+        nation_sets: Dict[str, Dict[str, None]] = {}
+        for land, nation, names in batches:
+            lands[land] = list(dict.fromkeys(lands[land] + names)) if land in lands else names
+            nation_sets.setdefault(nation, {}).update(dict.fromkeys(names))
+        server = set()
+        for names in lands.values():
+            server.update(names)
+        return lands, {nation: list(names) for nation, names in nation_sets.items()}, len(server)
+
+    def with_registry(batches):
+        registry = PlayerRegistry()
+        lands: Dict[str, PlayerList] = {}
+        land_unions: Dict[str, PlayerUnion] = {}
+        nation_unions: Dict[str, PlayerUnion] = {}
+        for land, nation, names in batches:
+            ids = registry.id_array(names)
+            if land not in lands:
+                lands[land] = PlayerList(registry, ids)
+            else:
+                if land not in land_unions:
+                    land_unions[land] = PlayerUnion(registry, lands[land].ids)
+                land_unions[land].add(ids)
+            if nation not in nation_unions:
+                nation_unions[nation] = PlayerUnion(registry)
+            nation_unions[nation].add(ids)
+        for land, union in land_unions.items():
+            lands[land] = union.to_list()
+        # Every name went through the registry, so it holds exactly the distinct players
+        return lands, {nation: union.to_list() for nation, union in nation_unions.items()}, len(registry)
+
+    results = []
+    for label, run in (('string dicts', with_dicts), ('registry', with_registry)):
+        # Best of a few runs on freshly parsed names, parsing left out of the time
+        times = []
+        for _ in range(5):
+            batches = parsed()
+            start = time.perf_counter()
+            run(batches)
+            times.append(time.perf_counter() - start)
+        # Timed without tracemalloc, which slows allocation-heavy code unevenly.
+        # Parsing is traced too: the string dicts keep every parsed name alive
+        tracemalloc.start()
+        batches = parsed()
+        result = run(batches)
+        del batches
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        results.append(result)
+        print(f"  {label:<13} {min(times) * 1000:>7.1f} ms  retained {current / 1e6:>6.1f} MB")
+    same = results[0] == results[1]
+    print(f"  unique players {results[1][2]}, results {'identical' if same else 'DIFFERENT'}")
+
+
+def bench_player_index(path: str, queries: int, seed: int = 0):
+    """Time building, opening and querying player_index.bin against scanning the saved JSON"""
+    scraper = StoneworksDataScraper(markers_file=path, state_file=None, lean=True)
+    run_scrape_quietly(scraper)
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = os.path.join(tmp, 'player_index.bin')
+        nations_path = os.path.join(tmp, 'nations_comprehensive.json')
+        territories_path = os.path.join(tmp, 'territories_data.json')
+        start = time.perf_counter()
+        players = write_player_index(index_path, scraper.territories_data, scraper.nations_data)
+        build = time.perf_counter() - start
+        for data_path, data in ((nations_path, scraper.nations_data), (territories_path, scraper.territories_data)):
+            with open(data_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False, default=json_default)
+        print(f"{players} players, {len(scraper.territories_data)} territories, {len(scraper.nations_data)} nations, "
+              f"index {os.path.getsize(index_path) / 1e6:.1f} MB built in {build * 1000:.0f} ms")
+
+        open_times = []
+        for _ in range(5):
+            start = time.perf_counter()
+            index = PlayerIndex(index_path)
+            open_times.append(time.perf_counter() - start)
+        print(f"  open index           {min(open_times) * 1000:>8.2f} ms")
+
+        rng = random.Random(seed)
+        names = [index.name(rng.randrange(len(index))) for _ in range(queries)]
+        start = time.perf_counter()
+        for name in names:
+            index.lookup(name)
+        elapsed = time.perf_counter() - start
+        print(f"  lookup               {elapsed / queries * 1e6:>8.1f} us/player")
+        prefixes = [name[:3] for name in names]
+        start = time.perf_counter()
+        for prefix in prefixes:
+            index.search(prefix, 10)
+        elapsed = time.perf_counter() - start
+        print(f"  prefix search (10)   {elapsed / queries * 1e6:>8.1f} us/query")
+
+        # What answering one question took before: load both files, scan every list
+        start = time.perf_counter()
+        with open(nations_path, encoding='utf-8') as f:
+            nations = json.load(f)
+        with open(territories_path, encoding='utf-8') as f:
+            territories = json.load(f)
+        name = names[0]
+        [territory['name'] for territory in territories if name in territory['players']]
+        [nation['name'] for nation in nations if name in nation['all_players']]
+        print(f"  load JSON and scan   {(time.perf_counter() - start) * 1000:>8.1f} ms for one player")
+
+
+def suite_key(count: int, workers: int, stream: bool) -> str:
+    """Baseline key of one suite configuration"""
+    return f"{count}" + (f"/workers={workers}" if workers != 1 else '') + ('/stream' if stream else '')
+
+
+def run_suite_scale(payload: str, repeat: int, workers: int, stream: bool) -> Dict:
+    """Scrape a payload in a fresh process per run and return the fastest run's report"""
+    best = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as run_dir:
+            command = [sys.executable, os.path.join(HERE, 'main.py'), '--markers-file', payload,
+                       '--state-file', '', '--metrics-file', '', '--workers', str(workers)]
+            if stream:
+                command.append('--stream')
+            # A fresh process per run so peak RSS belongs to this run alone
+            subprocess.run(command, cwd=run_dir, check=True, stdout=subprocess.DEVNULL)
+            with open(os.path.join(run_dir, 'run_report.json'), encoding='utf-8') as f:
+                report = json.load(f)
+        if best is None or report['duration_seconds'] < best['duration_seconds']:
+            best = report
+    return {
+        'markers': best['markers'],
+        'duration_seconds': best['duration_seconds'],
+        'markers_per_second': best['markers_per_second'],
+        'peak_memory_bytes': best['peak_memory_bytes'],
+        'stages': {stage: seconds for stage, seconds in best['stages'].items() if stage != 'other'},
+    }
+
+
+def compare_to_baseline(result: Dict, baseline: Optional[Dict], tolerance: float,
+                        memory_tolerance: float) -> List[str]:
+    """Print a result next to its baseline and return the regressions"""
+    # (label, current, baseline, format, which way is worse: 'lower', 'slower' or 'larger')
+    rows = [('markers/s', result['markers_per_second'], baseline and baseline['markers_per_second'], ',.0f', 'lower'),
+            ('total s', result['duration_seconds'], baseline and baseline['duration_seconds'], '.3f', 'slower')]
+    rows += [(f"{stage} s", seconds, baseline and baseline['stages'].get(stage), '.3f', 'slower')
+             for stage, seconds in result['stages'].items()]
+    if result['peak_memory_bytes'] is not None:
+        rows.append(('peak RSS MB', result['peak_memory_bytes'] / 1e6,
+                     baseline and baseline['peak_memory_bytes'] and baseline['peak_memory_bytes'] / 1e6, ',.1f', 'larger'))
+
+    regressions = []
+    for label, current, previous, fmt, worse in rows:
+        per_marker = f"{current / result['markers'] * 1e6:>8.1f} us/marker" if worse == 'slower' else ''
+        if not previous:
+            print(f"  {label:<12} {current:>12{fmt}} {'-':>12} {'':>8}  {per_marker}")
+            continue
+        change = current / previous - 1
+        if worse == 'lower':
+            regressed = change < -tolerance
+        elif worse == 'slower':
+            regressed = change > tolerance and previous >= MIN_COMPARED_SECONDS
+        else:
+            regressed = change > memory_tolerance
+        flag = '  REGRESSION' if regressed else ''
+        print(f"  {label:<12} {current:>12{fmt}} {previous:>12{fmt}} {change:>+8.1%}  {per_marker}{flag}")
+        if regressed:
+            regressions.append(f"{label} {change:+.1%}")
+    return regressions
+
+
+def bench_suite(counts: List[int], seed: int, repeat: int, workers: int, stream: bool, baselines_path: str,
+                update: bool, tolerance: float, memory_tolerance: float, keep_dir: Optional[str]) -> int:
+    """Scrape synthetic payloads at several scales offline and compare against committed baselines"""
+    baselines: Dict = {}
+    if os.path.exists(baselines_path):
+        with open(baselines_path, encoding='utf-8') as f:
+            baselines = json.load(f)
+    if baselines.get('seed', seed) != seed:
+        print(f"note: baselines were recorded with seed {baselines['seed']}, comparing seed {seed}")
+
+    results: Dict[str, Dict] = {}
+    regressions: Dict[str, List[str]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        payload_dir = keep_dir or tmp
+        os.makedirs(payload_dir, exist_ok=True)
+        for count in counts:
+            payload = os.path.join(payload_dir, f"markers_{count}_seed{seed}.json")
+            if not os.path.exists(payload):
+                write_synthetic_payload(payload, count, seed)
+            key = suite_key(count, workers, stream)
+            result = run_suite_scale(payload, repeat, workers, stream)
+            results[key] = result
+            print(f"{key} markers ({os.path.getsize(payload) / 1e6:.1f} MB payload), best of {repeat}:")
+            print(f"  {'':<12} {'current':>12} {'baseline':>12} {'change':>8}")
+            found = compare_to_baseline(result, baselines.get('scales', {}).get(key), tolerance, memory_tolerance)
+            if found:
+                regressions[key] = found
+
+    if update:
+        baselines.setdefault('scales', {}).update(results)
+        baselines.update({
+            'seed': seed,
+            'recorded': time.strftime('%Y-%m-%d'),
+            'environment': {'python': platform.python_version(), 'machine': platform.machine(),
+                            'system': platform.system(), 'cpus': os.cpu_count(), 'numpy': np is not None},
+        })
+        baselines['scales'] = dict(sorted(baselines['scales'].items(), key=lambda item: int(item[0].split('/')[0])))
+        with open(baselines_path, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2)
+            f.write('\n')
+        print(f"Updated {baselines_path}")
+        return 0
+
+    for key, found in regressions.items():
+        print(f"REGRESSION at {key}: {', '.join(found)}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scraper micro-benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    parse_cmd = sub.add_parser('parse', help="marker detail parsing throughput")
+    parse_cmd.add_argument('--markers', help="markers.json to benchmark against (default: generated)")
+    parse_cmd.add_argument('--count', type=int, default=2000, help="generated marker count")
+    parse_cmd.add_argument('--repeat', type=int, default=3)
+
+    ingest_cmd = sub.add_parser('ingest', help="markers.json ingestion peak memory")
+    ingest_cmd.add_argument('--markers', help="markers.json to ingest (default: generated)")
+    ingest_cmd.add_argument('--count', type=int, default=20000, help="generated marker count")
+
+    memory_cmd = sub.add_parser('memory', help="retained memory and JSON size of territory records")
+    memory_cmd.add_argument('--markers', help="markers.json to scrape (default: generated)")
+    memory_cmd.add_argument('--count', type=int, default=20000, help="generated marker count")
+
+    workers_cmd = sub.add_parser('workers', help="parallel parsing scaling")
+    workers_cmd.add_argument('--markers', help="markers.json to parse (default: generated)")
+    workers_cmd.add_argument('--count', type=int, default=20000, help="generated marker count")
+    workers_cmd.add_argument('--workers', default='1,2,4', help="comma-separated worker counts")
+    workers_cmd.add_argument('--batch-size', type=int, default=256)
+
+    wiki_cmd = sub.add_parser('wiki', help="wiki crawl against a local stand-in server")
+    wiki_cmd.add_argument('--pages', type=int, default=200)
+    wiki_cmd.add_argument('--latency', type=float, default=0.05, help="seconds per stand-in response")
+    wiki_cmd.add_argument('--concurrency', default='1,4,16', help="comma-separated concurrency levels")
+    wiki_cmd.add_argument('--rate', type=float, default=1000.0, help="requests/sec token bucket rate")
+
+    extract_cmd = sub.add_parser('wiki-extract', help="wiki page field extraction per-page timing")
+    extract_cmd.add_argument('--pages', type=int, default=50)
+    extract_cmd.add_argument('--repeat', type=int, default=3)
+
+    geometry_cmd = sub.add_parser('geometry', help="batched territory area/perimeter/centroid timing")
+    geometry_cmd.add_argument('--territories', type=int, default=30000,
+                              help="generated territory count (default is about 10x the live map)")
+    geometry_cmd.add_argument('--repeat', type=int, default=3)
+
+    spatial_cmd = sub.add_parser('spatial', help="spatial index build and lookup throughput")
+    spatial_cmd.add_argument('--territories', type=int, default=3000)
+    spatial_cmd.add_argument('--queries', type=int, default=100000)
+
+    borders_cmd = sub.add_parser('borders', help="chunk rasterization and border graph timing and memory")
+    borders_cmd.add_argument('--territories', type=int, default=10000,
+                             help="generated territory count (default is about 4x the live map)")
+    borders_cmd.add_argument('--bands', default='16,64,256,100000',
+                             help="comma-separated chunk rows per band (a huge value rasterizes in one go)")
+
+    history_cmd = sub.add_parser('history', help="history database ingest and query timing")
+    history_cmd.add_argument('--snapshots', type=int, default=2000)
+    history_cmd.add_argument('--nations', type=int, default=200)
+    history_cmd.add_argument('--territories', type=int, default=2500)
+
+    players_cmd = sub.add_parser('players', help="player set unions with string dicts and registry id arrays")
+    players_cmd.add_argument('--territories', type=int, default=2500)
+    players_cmd.add_argument('--nations', type=int, default=430)
+    players_cmd.add_argument('--players', type=int, default=16000)
+
+    index_cmd = sub.add_parser('player-index', help="player reverse index open, lookup and prefix search timing")
+    index_cmd.add_argument('--markers', help="markers.json to scrape (default: generated)")
+    index_cmd.add_argument('--count', type=int, default=20000, help="generated marker count")
+    index_cmd.add_argument('--queries', type=int, default=10000)
+
+    suite_cmd = sub.add_parser('suite', help="full offline scrapes of synthetic payloads, compared to baselines")
+    suite_cmd.add_argument('--scales', default='1000,10000,100000',
+                           help="comma-separated marker counts (up to 1000000)")
+    suite_cmd.add_argument('--seed', type=int, default=0)
+    suite_cmd.add_argument('--repeat', type=int, default=3, help="runs per scale, the fastest is kept")
+    suite_cmd.add_argument('--workers', type=int, default=1)
+    suite_cmd.add_argument('--stream', action='store_true')
+    suite_cmd.add_argument('--baselines', default=BASELINES_FILE)
+    suite_cmd.add_argument('--update-baselines', action='store_true',
+                           help="record this run as the new baselines instead of comparing")
+    suite_cmd.add_argument('--tolerance', type=float, default=0.25,
+                           help="allowed slowdown of throughput and stage timings (0.25 = 25%%)")
+    suite_cmd.add_argument('--memory-tolerance', type=float, default=0.15, help="allowed peak RSS growth")
+    suite_cmd.add_argument('--keep-payloads', metavar='DIR',
+                           help="keep generated payloads here and reuse them on later runs")
+
+    args = parser.parse_args()
+
+    if args.command == 'parse':
+        markers = load_markers(args.markers) if args.markers else sample_markers(args.count)
+        bench_parse(markers, args.repeat)
+    elif args.command == 'ingest':
+        if args.markers:
+            bench_ingest(args.markers)
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'markers.json')
+                write_synthetic_payload(path, args.count)
+                bench_ingest(path)
+    elif args.command == 'memory':
+        if args.markers:
+            bench_territory_memory(args.markers)
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'markers.json')
+                write_synthetic_payload(path, args.count)
+                bench_territory_memory(path)
+    elif args.command == 'workers':
+        worker_counts = [int(n) for n in args.workers.split(',')]
+        if args.markers:
+            bench_workers(args.markers, worker_counts, args.batch_size)
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'markers.json')
+                write_synthetic_payload(path, args.count)
+                bench_workers(path, worker_counts, args.batch_size)
+    elif args.command == 'wiki-extract':
+        bench_wiki_extract(args.pages, args.repeat)
+    elif args.command == 'wiki':
+        bench_wiki(args.pages, args.latency, [int(n) for n in args.concurrency.split(',')], args.rate)
+    elif args.command == 'geometry':
+        bench_geometry(args.territories, args.repeat)
+    elif args.command == 'spatial':
+        bench_spatial(args.territories, args.queries)
+    elif args.command == 'borders':
+        bench_borders(args.territories, [int(n) for n in args.bands.split(',')])
+    elif args.command == 'history':
+        bench_history(args.snapshots, args.nations, args.territories)
+    elif args.command == 'players':
+        bench_players(args.territories, args.nations, args.players)
+    elif args.command == 'player-index':
+        if args.markers:
+            bench_player_index(args.markers, args.queries)
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'markers.json')
+                write_synthetic_payload(path, args.count)
+                bench_player_index(path, args.queries)
+    elif args.command == 'suite':
+        sys.exit(bench_suite([int(n) for n in args.scales.split(',')], args.seed, args.repeat, args.workers,
+                             args.stream, args.baselines, args.update_baselines, args.tolerance,
+                             args.memory_tolerance, args.keep_payloads))
+
+
+if __name__ == "__main__":
+    main()
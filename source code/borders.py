@@ -0,0 +1,307 @@
+import csv
+import math
+from itertools import combinations, repeat
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from atomic_files import atomic_open
+
+CHUNK_SIZE = 16
+
+# Chunk (cx, cz) is keyed row * ROW_STRIDE + cx + COLUMN_BIAS, so a run of
+# chunks in a row is a range of keys and neighbours are a fixed offset away
+ROW_STRIDE = 1 << 32
+COLUMN_BIAS = 1 << 31
+
+# Chunk rows rasterized at a time; the owner map only ever holds this many
+# rows (plus one above and below for neighbour lookups)
+BAND_ROWS = 64
+
+
+def chunk_row(z: float) -> int:
+    """First chunk row whose centre line lies at or below block z"""
+    return math.ceil((z - CHUNK_SIZE / 2) / CHUNK_SIZE)
+
+
+def polygon_runs(xs, zs, first_row: int, last_row: int) -> Iterator[Tuple[int, int, int]]:
+    """
+    Yield (row, first chunk, end chunk) runs of the chunks whose centres
+    lie inside a polygon (even-odd rule, like the lookup's point test),
+    for chunk rows first_row..last_row only.
+    """
+    # chunk_row inlined: this runs for every edge and row of every shape
+    ceil, half = math.ceil, CHUNK_SIZE / 2
+    crossings: Dict[int, List[float]] = {}
+    x0, z0 = xs[-1], zs[-1]
+    for x1, z1 in zip(xs, zs):
+        if z0 != z1:
+            low_x, low_z, high_z = (x0, z0, z1) if z0 < z1 else (x1, z1, z0)
+            slope = (x1 - x0) / (z1 - z0)
+            # Rows whose centre line crosses this edge, low_z <= z < high_z
+            for row in range(max(first_row, ceil((low_z - half) / CHUNK_SIZE)),
+                             min(last_row + 1, ceil((high_z - half) / CHUNK_SIZE))):
+                crossings.setdefault(row, []).append(low_x + (row * CHUNK_SIZE + half - low_z) * slope)
+        x0, z0 = x1, z1
+
+    for row, row_crossings in crossings.items():
+        row_crossings.sort()
+        for left, right in zip(row_crossings[::2], row_crossings[1::2]):
+            start, end = ceil((left - half) / CHUNK_SIZE), ceil((right - half) / CHUNK_SIZE)
+            if start < end:
+                yield row, start, end
+
+
+def add_border(edges: Dict[Tuple[int, int], List[int]], territory: int, neighbour: int, shared: int):
+    """Add chunk edges shared by two territories to their pair's total"""
+    pair = (territory, neighbour) if territory < neighbour else (neighbour, territory)
+    edges.setdefault(pair, [0, 0])[0] += shared
+
+
+def border_graph(store, band_rows: int = BAND_ROWS) -> Dict:
+    """
+    Rasterize every shape of a CoordinateStore into the chunk grid and
+    measure who borders whom. A chunk belongs to the first territory in
+    payload order whose shape covers it; a chunk covered by several
+    territories is contested. Returns territory and nation edges with
+    their shared border length in blocks and contested chunks, each
+    territory's claimed chunks and unclaimed border, and the enclaves.
+    """
+    territory_ids: Dict[str, int] = {}
+    territory_nations: List[Optional[str]] = []
+    nation_order: Dict[str, int] = {}
+    segment_rows = []
+    for index in range(store.segment_count):
+        label = store.labels[index]
+        if label not in territory_ids:
+            territory_ids[label] = len(territory_ids)
+            nation = store.nations[index]
+            territory_nations.append(nation)
+            if nation is not None:
+                nation_order.setdefault(nation, len(nation_order))
+        start, end = store.segment(index)
+        if end - start < 3:
+            continue
+        zs = store.z[start:end]
+        first_row, last_row = chunk_row(min(zs)), chunk_row(max(zs)) - 1
+        if first_row <= last_row:
+            segment_rows.append((first_row, last_row, index, territory_ids[label]))
+    segment_rows.sort()
+
+    territories = len(territory_ids)
+    chunks = [0] * territories
+    contested_chunks = [0] * territories
+    unclaimed = [0] * territories
+    edges: Dict[Tuple[int, int], List[int]] = {}  # (id, id) -> [shared edges, contested chunks]
+    # Chunks claimed by lands of more than one nation, per nation and nation pair
+    nation_contested: Dict[str, int] = {}
+    nation_pairs: Dict[Tuple[str, str], int] = {}
+
+    total_contested = 0
+    active: List[Tuple[int, int, int, int]] = []
+    upcoming = 0
+    band_start = segment_rows[0][0] if segment_rows else 0
+    while upcoming < len(segment_rows) or active:
+        band_end = band_start + band_rows
+        while upcoming < len(segment_rows) and segment_rows[upcoming][0] <= band_end:
+            active.append(segment_rows[upcoming])
+            upcoming += 1
+        active = [segment for segment in active if segment[1] >= band_start - 1]
+        if not active:
+            # A gap between shapes: skip ahead to the next one
+            if upcoming == len(segment_rows):
+                break
+            band_start = segment_rows[upcoming][0]
+            continue
+
+        # Fill rows band_start - 1 .. band_end so every counted chunk has its neighbours
+        owners: Dict[int, int] = {}
+        contested: Dict[int, set] = {}
+        runs: List[Tuple[int, int, int]] = []
+        for _, _, index, territory in sorted(active, key=lambda segment: segment[2]):
+            start, end = store.segment(index)
+            for row, first, stop in polygon_runs(store.x[start:end], store.z[start:end], band_start - 1, band_end):
+                base = row * ROW_STRIDE + COLUMN_BIAS
+                keys = range(base + first, base + stop)
+                counted = band_start <= row < band_end
+                if owners.keys().isdisjoint(keys):
+                    owners.update(zip(keys, repeat(territory)))
+                    if counted:
+                        runs.append((keys.start, keys.stop, territory))
+                    continue
+                # Overlaps an earlier shape: claim the free chunks, note the contested ones
+                run_start = None
+                for key in keys:
+                    owner = owners.get(key)
+                    if owner is None:
+                        owners[key] = territory
+                        run_start = key if run_start is None else run_start
+                        continue
+                    if run_start is not None and counted:
+                        runs.append((run_start, key, territory))
+                    run_start = None
+                    if owner != territory and counted:
+                        contested.setdefault(key, {owner}).add(territory)
+                if run_start is not None and counted:
+                    runs.append((run_start, keys.stop, territory))
+
+        # Each shared edge is counted once, from the chunk left of or above it
+        for start, stop, territory in runs:
+            chunks[territory] += stop - start
+            left, right = owners.get(start - 1), owners.get(stop)
+            unclaimed[territory] += (left is None) + (right is None)
+            if right is not None and right != territory:
+                add_border(edges, territory, right, 1)
+            # Mostly the rows above and below are the same land; only count mixed rows
+            above = list(map(owners.get, range(start - ROW_STRIDE, stop - ROW_STRIDE)))
+            if above.count(territory) != len(above):
+                unclaimed[territory] += above.count(None)
+            below = list(map(owners.get, range(start + ROW_STRIDE, stop + ROW_STRIDE)))
+            if below.count(territory) != len(below):
+                for neighbour in set(below):
+                    if neighbour is None:
+                        unclaimed[territory] += below.count(None)
+                    elif neighbour != territory:
+                        add_border(edges, territory, neighbour, below.count(neighbour))
+        for claimants in contested.values():
+            for territory in claimants:
+                contested_chunks[territory] += 1
+            for pair in combinations(sorted(claimants), 2):
+                edges.setdefault(pair, [0, 0])[1] += 1
+            # Once per chunk and nation, however many of its lands claim it
+            nations = {territory_nations[territory] for territory in claimants}
+            nations.discard(None)
+            if len(nations) > 1:
+                for nation in nations:
+                    nation_contested[nation] = nation_contested.get(nation, 0) + 1
+                for pair in combinations(sorted(nations, key=nation_order.__getitem__), 2):
+                    nation_pairs[pair] = nation_pairs.get(pair, 0) + 1
+        total_contested += len(contested)
+        band_start = band_end
+
+    names = list(territory_ids)
+    territory_edges = [
+        {'source': names[a], 'target': names[b], 'border': shared * CHUNK_SIZE, 'contested_chunks': contested}
+        for (a, b), (shared, contested) in sorted(edges.items())
+    ]
+    neighbours: List[Dict[int, int]] = [{} for _ in names]
+    rivals: List[Set[int]] = [set() for _ in names]
+    for (a, b), (shared, contested) in edges.items():
+        if shared:
+            neighbours[a][b] = neighbours[b][a] = shared * CHUNK_SIZE
+        if contested:
+            rivals[a].add(b)
+            rivals[b].add(a)
+    territory_nodes = []
+    for territory, name in enumerate(names):
+        border = sum(neighbours[territory].values())
+        surrounding = enclave_of(neighbours[territory], unclaimed[territory], chunks[territory], rivals[territory])
+        territory_nodes.append({
+            'name': name,
+            'nation': territory_nations[territory],
+            'chunks': chunks[territory],
+            'contested_chunks': contested_chunks[territory],
+            'border': border,
+            'unclaimed_border': unclaimed[territory] * CHUNK_SIZE,
+            'neighbours': len(neighbours[territory]),
+            'enclave_of': names[surrounding] if surrounding is not None else None,
+        })
+
+    nation_edges, nation_nodes = nation_borders(territory_nodes, edges, territory_nations,
+                                                nation_contested, nation_pairs)
+    return {
+        'territories': territory_nodes,
+        'nations': nation_nodes,
+        'territory_edges': territory_edges,
+        'nation_edges': nation_edges,
+        'chunks': sum(chunks),
+        'contested_chunks': total_contested,
+    }
+
+
+def enclave_of(neighbours: Dict, unclaimed: int, chunks: int, rivals: Set):
+    """
+    The one neighbour a land or nation is an enclave of, or None: it is
+    bordered all round by that neighbour with no unclaimed land alongside,
+    or it lies wholly inside it, so every chunk it covers was claimed by
+    that neighbour first.
+    """
+    if chunks:
+        return next(iter(neighbours)) if len(neighbours) == 1 and not unclaimed else None
+    return next(iter(rivals)) if len(rivals) == 1 else None
+
+
+def nation_borders(territory_nodes: List[Dict], edges: Dict[Tuple[int, int], List[int]],
+                   territory_nations: List[Optional[str]], nation_contested: Dict[str, int],
+                   nation_pairs: Dict[Tuple[str, str], int]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Roll the territory graph up to nations: borders between lands of two
+    nations add up, borders within a nation vanish, and a border with a
+    nationless land counts like unclaimed land when looking for enclaves.
+    Contested chunks come counted per chunk, since several lands of one
+    nation can claim the same chunk.
+    """
+    nodes: Dict[str, Dict] = {}
+    for node in territory_nodes:
+        if node['nation'] is None:
+            continue
+        nation = nodes.setdefault(node['nation'], {'name': node['nation'], 'chunks': 0, 'contested_chunks': 0,
+                                                   'border': 0, 'unclaimed_border': 0, 'nationless_border': 0})
+        nation['chunks'] += node['chunks']
+        nation['unclaimed_border'] += node['unclaimed_border']
+    for name, nation in nodes.items():
+        nation['contested_chunks'] = nation_contested.get(name, 0)
+
+    order = {name: position for position, name in enumerate(nodes)}
+    nation_edges: Dict[Tuple[str, str], List[int]] = {}
+    neighbours: Dict[str, Dict[str, int]] = {name: {} for name in nodes}
+    for (a, b), (shared, _) in edges.items():
+        source, target = territory_nations[a], territory_nations[b]
+        if source == target:
+            continue
+        if source is None or target is None:
+            nodes[source or target]['nationless_border'] += shared * CHUNK_SIZE
+            continue
+        pair = (source, target) if order[source] < order[target] else (target, source)
+        nation_edges.setdefault(pair, [0, 0])[0] += shared * CHUNK_SIZE
+        if shared:
+            for nation, neighbour in ((source, target), (target, source)):
+                neighbours[nation][neighbour] = neighbours[nation].get(neighbour, 0) + shared * CHUNK_SIZE
+    rivals: Dict[str, Set[str]] = {name: set() for name in nodes}
+    for (source, target), contested in nation_pairs.items():
+        nation_edges.setdefault((source, target), [0, 0])[1] = contested
+        rivals[source].add(target)
+        rivals[target].add(source)
+
+    for name, nation in nodes.items():
+        nation['border'] = sum(neighbours[name].values())
+        nation['neighbours'] = len(neighbours[name])
+        nation['enclave_of'] = enclave_of(neighbours[name], nation['unclaimed_border'] + nation['nationless_border'],
+                                          nation['chunks'], rivals[name])
+    edge_list = [{'source': source, 'target': target, 'border': border, 'contested_chunks': contested}
+                 for (source, target), (border, contested) in sorted(nation_edges.items(), key=lambda item: (
+                     order[item[0][0]], order[item[0][1]]))]
+    return edge_list, list(nodes.values())
+
+
+def write_border_csvs(edges_path: str, nodes_path: str, graph: Dict):
+    """
+    Write the border graph as an edge list (territory and nation pairs
+    with their shared border in blocks and contested chunks) and a node
+    list with each territory's and nation's claimed chunks, border,
+    unclaimed border and the neighbour it is an enclave of, if any.
+    """
+    with atomic_open(edges_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Kind', 'Source', 'Target', 'Border_Blocks', 'Contested_Chunks'])
+        for kind in ('territory', 'nation'):
+            for edge in graph[f'{kind}_edges']:
+                writer.writerow([kind, edge['source'], edge['target'], edge['border'], edge['contested_chunks']])
+
+    with atomic_open(nodes_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Kind', 'Name', 'Nation', 'Chunks', 'Contested_Chunks', 'Border_Blocks',
+                         'Unclaimed_Border_Blocks', 'Neighbours', 'Enclave_Of'])
+        for kind, nodes in (('territory', graph['territories']), ('nation', graph['nations'])):
+            for node in nodes:
+                writer.writerow([kind, node['name'], node.get('nation') or '',
+                                 node['chunks'], node['contested_chunks'], node['border'],
+                                 node['unclaimed_border'], node['neighbours'], node['enclave_of'] or ''])
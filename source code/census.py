@@ -0,0 +1,123 @@
+import calendar
+import csv
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from atomic_files import atomic_open
+
+# Census pages are mostly prose and navigation; only tables are built into a tree
+TABLES_ONLY = SoupStrainer('table')
+
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTH_RE = re.compile(r'(' + '|'.join(MONTHS) + r')[\s_-]*(\d{4})', re.IGNORECASE)
+
+# Whole numbers with or without thousands separators
+NUMBER_RE = re.compile(r'\d{1,3}(?:,\d{3})+(?!\d)|\d+')
+# Wiki footnote markers such as [1] or [citation needed]
+FOOTNOTE_RE = re.compile(r'\[[^\]]*\]')
+
+# Header words identifying the nation and population columns of a census table
+NATION_HEADERS = ('nation', 'country', 'name')
+POPULATION_HEADERS = ('population', 'citizens', 'residents', 'members', 'players')
+
+
+def load_census_pages(path: Optional[str]) -> List[Dict]:
+    """
+    Load the census pages to scrape: a JSON list of page URLs (absolute or
+    relative to the wiki) or {"url": ..., "month": "YYYY-MM"} objects. The
+    month of a bare URL is read from the page name, e.g. ..._October_2020.
+    """
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+
+    pages = []
+    for entry in entries:
+        page = {'url': entry, 'month': None} if isinstance(entry, str) else dict(entry)
+        if 'url' not in page:
+            raise ValueError(f"{path}: census page without a url: {entry!r}")
+        page['month'] = page.get('month') or census_month(page['url'])
+        pages.append(page)
+    return pages
+
+
+def census_month(text: str) -> Optional[str]:
+    """First 'Month Year' in text as YYYY-MM, or None"""
+    match = MONTH_RE.search(text)
+    if not match:
+        return None
+    return f"{match.group(2)}-{MONTHS[match.group(1).lower()]:02d}"
+
+
+def clean_nation_name(text: str) -> str:
+    """Nation name without footnote markers and with whitespace collapsed"""
+    return ' '.join(FOOTNOTE_RE.sub('', text).split())
+
+
+def find_columns(header: List[str]) -> Optional[Tuple[int, int]]:
+    """(nation, population) column indexes named by a header row, or None"""
+    header = [text.lower() for text in header]
+    nation = next((i for i, text in enumerate(header) if any(word in text for word in NATION_HEADERS)), None)
+    population = next((i for i, text in enumerate(header) if any(word in text for word in POPULATION_HEADERS)), None)
+    if nation is None or population is None or nation == population:
+        return None
+    return nation, population
+
+
+def parse_census_tables(content: bytes, source: str, month: Optional[str]) -> List[Dict]:
+    """
+    Read (nation, population) rows from every table of a census page.
+    Columns are found from the header row; tables without recognisable
+    headers use the first two columns. Rows without a nation name or a
+    number are skipped.
+    """
+    soup = BeautifulSoup(content, 'html.parser', parse_only=TABLES_ONLY)
+    rows = []
+    for table in soup.find_all('table'):
+        table_rows = table.find_all('tr')
+        if not table_rows:
+            continue
+        header = [cell.get_text(' ', strip=True) for cell in table_rows[0].find_all(['td', 'th'])]
+        nation_column, population_column = find_columns(header) or (0, 1)
+
+        for row in table_rows[1:]:
+            cells = row.find_all(['td', 'th'])
+            if len(cells) <= max(nation_column, population_column):
+                continue
+            nation = clean_nation_name(cells[nation_column].get_text(' '))
+            population = NUMBER_RE.search(cells[population_column].get_text())
+            if not nation or not population:
+                continue
+            rows.append({
+                'nation': nation,
+                'month': month,
+                'population': int(population.group(0).replace(',', '')),
+                'source': source,
+            })
+    return rows
+
+
+def normalize_census(rows: List[Dict]) -> List[Dict]:
+    """
+    One row per nation and month, sorted by nation then month. A nation
+    listed more than once in a month (say in an overview table and again
+    in a regional one) keeps the first figure found.
+    """
+    unique: Dict[Tuple[str, str], Dict] = {}
+    for row in rows:
+        unique.setdefault((row['nation'], row['month'] or ''), row)
+    return sorted(unique.values(), key=lambda row: (row['nation'].lower(), row['nation'], row['month'] or ''))
+
+
+def write_census_csv(path: str, rows: List[Dict]):
+    """Write normalized census rows as CSV"""
+    with atomic_open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Nation', 'Month', 'Population', 'Source'])
+        for row in rows:
+            writer.writerow([row['nation'], row['month'] or '', row['population'], row['source']])
@@ -0,0 +1,126 @@
+import csv
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from atomic_files import atomic_open
+
+# coordinates.bin layout, little-endian:
+#   header: magic, version, reserved, vertex count, segment count, metadata byte length
+#   int64   offsets[segments + 1]   vertex index where each segment starts
+#   float64 x[vertices], y[vertices], z[vertices]
+#   utf-8 JSON metadata: {"labels": [...], "nations": [...]} per segment
+BINARY_MAGIC = b'SWCOORD\x00'
+BINARY_VERSION = 1
+HEADER = struct.Struct('<8sIIQQQ')
+
+DEFAULT_Y = 62
+
+
+class CoordinateStore:
+    """
+    Shape vertices of every territory marker in typed per-axis arrays,
+    with offsets delimiting each marker's segment, instead of one tuple
+    per vertex.
+    """
+
+    def __init__(self):
+        self.x = array('d')
+        self.y = array('d')
+        self.z = array('d')
+        self.offsets = array('q', [0])
+        self.labels: List[str] = []
+        self.nations: List[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    @property
+    def segment_count(self) -> int:
+        return len(self.labels)
+
+    def add_shape(self, label: str, nation: Optional[str], shape: List[Dict]):
+        """Append one marker's shape as a new segment"""
+        self.x.extend(coord['x'] for coord in shape)
+        self.y.extend(coord.get('y', DEFAULT_Y) for coord in shape)
+        self.z.extend(coord['z'] for coord in shape)
+        self.offsets.append(len(self.x))
+        self.labels.append(label)
+        self.nations.append(nation)
+
+    def segment(self, index: int) -> Tuple[int, int]:
+        """Return the [start, end) vertex range of a segment"""
+        return self.offsets[index], self.offsets[index + 1]
+
+    def rows(self) -> Iterator[Tuple[float, float, float]]:
+        """Iterate vertices as (x, y, z) rows"""
+        return zip(self.x, self.y, self.z)
+
+    def write_csv(self, path: str):
+        """Write all vertices as an X,Y,Z CSV"""
+        with atomic_open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['X', 'Y', 'Z'])
+            writer.writerows(self.rows())
+
+    def write_binary(self, path: str):
+        """Write the arrays in the memory-mappable coordinates.bin layout"""
+        metadata = json.dumps({'labels': self.labels, 'nations': self.nations},
+                              ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        with atomic_open(path, 'wb') as f:
+            f.write(HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, len(self.x),
+                                self.segment_count, len(metadata)))
+            for values in (self.offsets, self.x, self.y, self.z):
+                if sys.byteorder != 'little':
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                f.write(values.tobytes())
+            f.write(metadata)
+
+
+class MappedCoordinates:
+    """Read-only view of a coordinates.bin file; axis arrays are memoryviews over the mapping"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, vertices, segments, metadata_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError(f"{path} is not a version {BINARY_VERSION} coordinates file")
+
+        view = memoryview(self._mmap)
+        position = HEADER.size
+        self.offsets = self._axis(view, position, segments + 1, 'q')
+        position += (segments + 1) * 8
+        self.x = self._axis(view, position, vertices, 'd')
+        self.y = self._axis(view, position + vertices * 8, vertices, 'd')
+        self.z = self._axis(view, position + vertices * 16, vertices, 'd')
+        position += vertices * 24
+
+        metadata = json.loads(bytes(view[position:position + metadata_length]).decode('utf-8'))
+        self.labels: List[str] = metadata['labels']
+        self.nations: List[Optional[str]] = metadata['nations']
+
+    @staticmethod
+    def _axis(view: memoryview, start: int, count: int, typecode: str):
+        data = view[start:start + count * 8]
+        if sys.byteorder == 'little':
+            return data.cast(typecode)
+        values = array(typecode, bytes(data))
+        values.byteswap()
+        return values
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    @property
+    def segment_count(self) -> int:
+        return len(self.labels)
+
+    def segment(self, index: int) -> Tuple[int, int]:
+        """Return the [start, end) vertex range of a segment"""
+        return self.offsets[index], self.offsets[index + 1]
@@ -0,0 +1,114 @@
+import re
+from html import unescape
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+# Ordinary start/end tags, allowing quoted attribute values that contain '>'
+_TAG_RE = re.compile(r'</?[A-Za-z][^>"\']*(?:(?:"[^"]*"|\'[^\']*\')[^>"\']*)*>')
+
+# Markup whose text html.parser treats specially (comments, doctype, processing
+# instructions, script/style bodies); details containing any of it go to BeautifulSoup
+_SPECIAL_MARKUP_RE = re.compile(r'<(?:[!?]|/?(?:script|style|template|textarea|title)\b)', re.IGNORECASE)
+
+# Keys of the dict returned by parse_detail_text
+DETAIL_FIELDS = (
+    'level', 'balance', 'chunks', 'player_count', 'players',
+    'nation_name', 'nation_level', 'nation_capital',
+)
+
+LEVEL_RE = re.compile(r'Level:\s*(\w+)')
+BALANCE_RE = re.compile(r'Balance:\s*\$([0-9,]+\.\d{2})')
+CHUNKS_RE = re.compile(r'Chunks:\s*(\d+)')
+PLAYERS_RE = re.compile(r'Players \((\d+)\):\s*([^<]+)')
+NATION_RE = re.compile(r'This land belongs to nation ([^:]+):')
+CAPITAL_RE = re.compile(r'Capital:\s*([^<\n]+)')
+
+
+def fast_detail_text(detail: str) -> Optional[str]:
+    """Strip tags from marker detail HTML, or return None if BeautifulSoup is needed"""
+    if '<' not in detail:
+        return unescape(detail) if '&' in detail else detail
+    if _SPECIAL_MARKUP_RE.search(detail):
+        return None
+
+    text = _TAG_RE.sub('', detail)
+    if '<' in text:
+        # Stray or unterminated markup; let html.parser decide what it means
+        return None
+    return unescape(text) if '&' in text else text
+
+
+def soup_detail_text(detail: str) -> str:
+    """Extract marker detail text with BeautifulSoup (reference path)"""
+    return BeautifulSoup(detail, 'html.parser').get_text()
+
+
+def detail_text(detail: str, use_soup: bool = False) -> str:
+    """Get the plain text of marker detail HTML, preferring the fast path"""
+    if not use_soup:
+        text = fast_detail_text(detail)
+        if text is not None:
+            return text
+    return soup_detail_text(detail)
+
+
+def parse_detail_text(detail_text: str) -> Dict:
+    """Scan detail text for level, balance, chunks, players and nation fields"""
+    level_match = LEVEL_RE.search(detail_text)
+    balance_match = BALANCE_RE.search(detail_text)
+    chunks_match = CHUNKS_RE.search(detail_text)
+    players_match = PLAYERS_RE.search(detail_text)
+    nation_match = NATION_RE.search(detail_text)
+
+    # Nation level and capital come from the text after the nation header
+    nation_level_match = None
+    nation_capital_match = None
+    if nation_match:
+        nation_detail_text = detail_text.rpartition(nation_match.group(0))[2]
+        nation_level_match = LEVEL_RE.search(nation_detail_text)
+        nation_capital_match = CAPITAL_RE.search(nation_detail_text)
+
+    balance = 0.0
+    if balance_match:
+        balance = float(balance_match.group(1).replace(',', ''))
+
+    # Split players by comma and clean up, stop at first "This land belongs"
+    players: List[str] = []
+    player_count = 0
+    if players_match:
+        player_count = int(players_match.group(1))
+        players_str_cleaned = players_match.group(2).split("This land belongs")[0]
+        players = [p.strip() for p in players_str_cleaned.split(',') if p.strip()]
+
+    return {
+        'level': level_match.group(1) if level_match else None,
+        'balance': balance,
+        'chunks': int(chunks_match.group(1)) if chunks_match else 0,
+        'player_count': player_count,
+        'players': players,
+        'nation_name': nation_match.group(1).strip() if nation_match else None,
+        'nation_level': nation_level_match.group(1) if nation_level_match else None,
+        'nation_capital': nation_capital_match.group(1).strip() if nation_capital_match else None,
+    }
+
+
+def parse_detail(detail: str, use_soup: bool = False) -> Dict:
+    """Parse marker detail HTML into land fields"""
+    return parse_detail_text(detail_text(detail, use_soup))
+
+
+def check_detail_parity(detail: str) -> bool:
+    """Check that the fast path and BeautifulSoup agree on a detail string"""
+    return parse_detail(detail) == parse_detail(detail, use_soup=True)
+
+
+def parse_detail_batch(details: List[str], use_soup: bool = False) -> List[Tuple[Optional[Dict], Optional[str]]]:
+    """Parse a batch of details, returning (fields, error) per detail; runs in worker processes"""
+    results = []
+    for detail in details:
+        try:
+            results.append((parse_detail(detail, use_soup), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
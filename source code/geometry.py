@@ -0,0 +1,243 @@
+import math
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the pure-Python batch gives the same numbers
+    np = None
+
+BACKEND = 'numpy' if np is not None else 'pure Python'
+
+# Columns of per-segment geometry, in this order
+SEGMENT_COLUMNS = ('area', 'perimeter', 'min_x', 'min_z', 'max_x', 'max_z', 'centroid_x', 'centroid_z', 'vertices')
+
+# Territory geometry keys written next to the chunk-based territory_area
+GEOMETRY_FIELDS = ('claimed_area', 'perimeter', 'bounding_box', 'centroid')
+EMPTY_GEOMETRY = dict.fromkeys(GEOMETRY_FIELDS)
+
+# Areas, perimeters and centroids are rounded to 1/SCALE of a block, the
+# same way (half to even) in the numpy and pure-Python batches
+SCALE = 100
+
+
+def polygon_area(shape: List[Dict]) -> float:
+    """Calculate area of a single polygon using shoelace formula"""
+    if len(shape) < 3:
+        return 0
+
+    area = 0
+    n = len(shape)
+    for i in range(n):
+        j = (i + 1) % n
+        area += shape[i]['x'] * shape[j]['z']
+        area -= shape[j]['x'] * shape[i]['z']
+    return abs(area) / 2.0
+
+
+def _segment_geometry_numpy(x, z, offsets) -> Dict[str, 'np.ndarray']:
+    """Shoelace area, perimeter, bounds and centroid of every segment in whole-array operations"""
+    xs = np.frombuffer(x, dtype=np.float64)
+    zs = np.frombuffer(z, dtype=np.float64)
+    offsets = np.frombuffer(offsets, dtype=np.int64)
+    starts, ends = offsets[:-1], offsets[1:]
+    lengths = ends - starts
+    segments = len(lengths)
+    filled = lengths > 0
+
+    # Each vertex's successor, wrapping the last vertex of a segment to its first
+    following = np.arange(1, len(xs) + 1)
+    following[ends[filled] - 1] = starts[filled]
+    next_x, next_z = xs[following], zs[following]
+    owner = np.repeat(np.arange(segments), lengths)
+
+    cross = xs * next_z - next_x * zs
+    signed_area = np.bincount(owner, cross, segments) / 2.0
+    perimeter = np.bincount(owner, np.hypot(next_x - xs, next_z - zs), segments)
+    moment_x = np.bincount(owner, (xs + next_x) * cross, segments)
+    moment_z = np.bincount(owner, (zs + next_z) * cross, segments)
+    count = np.maximum(lengths, 1)
+    mean_x = np.bincount(owner, xs, segments) / count
+    mean_z = np.bincount(owner, zs, segments) / count
+
+    # Degenerate rings (fewer than 3 vertices or zero area) fall back to the vertex mean
+    polygon = (lengths >= 3) & (signed_area != 0)
+    safe_area = np.where(polygon, signed_area, 1.0)
+    area = np.where(lengths >= 3, np.abs(signed_area), 0.0)
+    centroid_x = np.where(polygon, moment_x / (6.0 * safe_area), mean_x)
+    centroid_z = np.where(polygon, moment_z / (6.0 * safe_area), mean_z)
+
+    bounds = []
+    for values, reduce in ((xs, np.minimum), (zs, np.minimum), (xs, np.maximum), (zs, np.maximum)):
+        column = np.full(segments, np.nan)
+        if filled.any():
+            column[filled] = reduce.reduceat(values, starts[filled])
+        bounds.append(column)
+
+    return dict(zip(SEGMENT_COLUMNS, (area, perimeter, *bounds, centroid_x, centroid_z, lengths)))
+
+
+def _segment_geometry_python(x, z, offsets) -> Dict[str, List]:
+    """Same as the numpy batch, one segment at a time"""
+    columns: Dict[str, List] = {name: [] for name in SEGMENT_COLUMNS}
+    hypot = math.hypot
+    for index in range(len(offsets) - 1):
+        start, end = offsets[index], offsets[index + 1]
+        xs, zs = x[start:end], z[start:end]
+        length = end - start
+
+        signed_area = perimeter = moment_x = moment_z = 0.0
+        sum_x = sum_z = 0.0
+        for i in range(length):
+            j = i + 1 if i + 1 < length else 0
+            x0, z0, x1, z1 = xs[i], zs[i], xs[j], zs[j]
+            cross = x0 * z1 - x1 * z0
+            signed_area += cross
+            perimeter += hypot(x1 - x0, z1 - z0)
+            moment_x += (x0 + x1) * cross
+            moment_z += (z0 + z1) * cross
+            sum_x += x0
+            sum_z += z0
+        signed_area /= 2.0
+
+        if length >= 3 and signed_area != 0:
+            centroid_x = moment_x / (6.0 * signed_area)
+            centroid_z = moment_z / (6.0 * signed_area)
+        else:
+            centroid_x = sum_x / max(length, 1)
+            centroid_z = sum_z / max(length, 1)
+
+        columns['area'].append(abs(signed_area) if length >= 3 else 0.0)
+        columns['perimeter'].append(perimeter)
+        columns['min_x'].append(min(xs) if length else math.nan)
+        columns['min_z'].append(min(zs) if length else math.nan)
+        columns['max_x'].append(max(xs) if length else math.nan)
+        columns['max_z'].append(max(zs) if length else math.nan)
+        columns['centroid_x'].append(centroid_x)
+        columns['centroid_z'].append(centroid_z)
+        columns['vertices'].append(length)
+    return columns
+
+
+def segment_geometry(store, use_numpy: Optional[bool] = None) -> Dict[str, Sequence]:
+    """
+    Compute area, perimeter, bounding box and centroid of every segment in
+    a CoordinateStore (or MappedCoordinates) as one column per measure.
+    Uses numpy when it is installed unless use_numpy says otherwise.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        return _segment_geometry_numpy(store.x, store.z, store.offsets)
+    return _segment_geometry_python(store.x, store.z, store.offsets)
+
+
+def _combine_numpy(columns: Dict[str, 'np.ndarray'], codes: List[int], count: int) -> Dict[str, List]:
+    """Sum segment columns per territory code with whole-array operations"""
+    codes = np.asarray(codes, dtype=np.int64)
+    area, vertices = columns['area'], columns['vertices']
+    filled = vertices > 0
+    # Empty segments have NaN bounds; leave them out of every total
+    codes, area, vertices = codes[filled], area[filled], vertices[filled]
+    centroid_x, centroid_z = columns['centroid_x'][filled], columns['centroid_z'][filled]
+
+    total_area = np.bincount(codes, area, count)
+    total_vertices = np.bincount(codes, vertices, count)
+    has_area = total_area != 0
+    safe_area = np.where(has_area, total_area, 1.0)
+    safe_vertices = np.maximum(total_vertices, 1)
+    combined = {
+        'area': total_area,
+        'perimeter': np.bincount(codes, columns['perimeter'][filled], count),
+        'centroid_x': np.where(has_area, np.bincount(codes, area * centroid_x, count) / safe_area,
+                               np.bincount(codes, vertices * centroid_x, count) / safe_vertices),
+        'centroid_z': np.where(has_area, np.bincount(codes, area * centroid_z, count) / safe_area,
+                               np.bincount(codes, vertices * centroid_z, count) / safe_vertices),
+    }
+    for name, reduce, start in (('min_x', np.minimum, np.inf), ('min_z', np.minimum, np.inf),
+                                ('max_x', np.maximum, -np.inf), ('max_z', np.maximum, -np.inf)):
+        column = np.full(count, start)
+        reduce.at(column, codes, columns[name][filled])
+        combined[name] = column
+
+    for name in ('area', 'perimeter', 'centroid_x', 'centroid_z'):
+        combined[name] = np.rint(combined[name] * SCALE) / SCALE
+    result = {name: column.tolist() for name, column in combined.items()}
+    result['vertices'] = total_vertices.tolist()
+    return result
+
+
+def _combine_python(columns: Dict[str, List], codes: List[int], count: int) -> Dict[str, List]:
+    """Same as the numpy combine, one segment at a time"""
+    area = [0.0] * count
+    perimeter = [0.0] * count
+    min_x, min_z = [math.inf] * count, [math.inf] * count
+    max_x, max_z = [-math.inf] * count, [-math.inf] * count
+    area_x, area_z = [0.0] * count, [0.0] * count
+    vertex_x, vertex_z = [0.0] * count, [0.0] * count
+    vertices = [0] * count
+
+    for index, code in enumerate(codes):
+        length = columns['vertices'][index]
+        if not length:
+            continue
+        segment_area = columns['area'][index]
+        cx, cz = columns['centroid_x'][index], columns['centroid_z'][index]
+        area[code] += segment_area
+        perimeter[code] += columns['perimeter'][index]
+        min_x[code] = min(min_x[code], columns['min_x'][index])
+        min_z[code] = min(min_z[code], columns['min_z'][index])
+        max_x[code] = max(max_x[code], columns['max_x'][index])
+        max_z[code] = max(max_z[code], columns['max_z'][index])
+        area_x[code] += segment_area * cx
+        area_z[code] += segment_area * cz
+        vertex_x[code] += length * cx
+        vertex_z[code] += length * cz
+        vertices[code] += length
+
+    centroid_x, centroid_z = [], []
+    for code in range(count):
+        if area[code]:
+            centroid_x.append(area_x[code] / area[code])
+            centroid_z.append(area_z[code] / area[code])
+        else:
+            centroid_x.append(vertex_x[code] / max(vertices[code], 1))
+            centroid_z.append(vertex_z[code] / max(vertices[code], 1))
+
+    def rounded(values: List[float]) -> List[float]:
+        return [round(value * SCALE) / SCALE for value in values]
+
+    return {
+        'area': rounded(area), 'perimeter': rounded(perimeter),
+        'min_x': min_x, 'min_z': min_z, 'max_x': max_x, 'max_z': max_z,
+        'centroid_x': rounded(centroid_x), 'centroid_z': rounded(centroid_z),
+        'vertices': vertices,
+    }
+
+
+def territory_geometry(store, use_numpy: Optional[bool] = None) -> Dict[str, Dict]:
+    """
+    Combine segment geometry per label: areas and perimeters add up, the
+    bounding box covers every segment and the centroid is area-weighted.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    columns = segment_geometry(store, use_numpy)
+
+    # Number labels in first-seen order so totals can be summed per code
+    label_codes: Dict[str, int] = {}
+    codes = [label_codes.setdefault(label, len(label_codes)) for label in store.labels]
+    combine = _combine_numpy if use_numpy else _combine_python
+    combined = combine(columns, codes, len(label_codes))
+
+    geometry: Dict[str, Dict] = {}
+    for label, area, perimeter, min_x, min_z, max_x, max_z, centroid_x, centroid_z, vertices in zip(
+            label_codes, *(combined[name] for name in SEGMENT_COLUMNS)):
+        if not vertices:
+            continue
+        geometry[label] = {
+            'claimed_area': area,
+            'perimeter': perimeter,
+            'bounding_box': {'min_x': min_x, 'min_z': min_z, 'max_x': max_x, 'max_z': max_z},
+            'centroid': {'x': centroid_x, 'z': centroid_z},
+        }
+    return geometry
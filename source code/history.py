@@ -0,0 +1,242 @@
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# entity -> metric -> column holding its value; every metric also has a
+# <metric>_rank column, 1 being the largest value in the snapshot
+METRICS: Dict[str, Dict[str, str]] = {
+    'nation': {
+        'balance': 'total_balance',
+        'chunks': 'total_chunks',
+        'players': 'unique_players',
+        'territories': 'territory_count',
+    },
+    'territory': {
+        'balance': 'balance',
+        'chunks': 'chunks',
+        'players': 'player_count',
+    },
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    taken_at TEXT NOT NULL,
+    source TEXT,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS snapshots_taken_at ON snapshots (taken_at);
+
+CREATE TABLE IF NOT EXISTS nation_names (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS territory_names (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+
+CREATE TABLE IF NOT EXISTS nation_stats (
+    snapshot_id INTEGER NOT NULL,
+    name_id INTEGER NOT NULL,
+    total_balance REAL NOT NULL,
+    total_chunks INTEGER NOT NULL,
+    unique_players INTEGER NOT NULL,
+    territory_count INTEGER NOT NULL,
+    balance_rank INTEGER NOT NULL,
+    chunks_rank INTEGER NOT NULL,
+    players_rank INTEGER NOT NULL,
+    territories_rank INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, name_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS nation_stats_balance ON nation_stats (snapshot_id, balance_rank);
+CREATE INDEX IF NOT EXISTS nation_stats_chunks ON nation_stats (snapshot_id, chunks_rank);
+CREATE INDEX IF NOT EXISTS nation_stats_players ON nation_stats (snapshot_id, players_rank);
+CREATE INDEX IF NOT EXISTS nation_stats_territories ON nation_stats (snapshot_id, territories_rank);
+
+CREATE TABLE IF NOT EXISTS territory_stats (
+    snapshot_id INTEGER NOT NULL,
+    name_id INTEGER NOT NULL,
+    nation_id INTEGER,
+    balance REAL NOT NULL,
+    chunks INTEGER NOT NULL,
+    player_count INTEGER NOT NULL,
+    balance_rank INTEGER NOT NULL,
+    chunks_rank INTEGER NOT NULL,
+    players_rank INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, name_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS territory_stats_balance ON territory_stats (snapshot_id, balance_rank);
+CREATE INDEX IF NOT EXISTS territory_stats_chunks ON territory_stats (snapshot_id, chunks_rank);
+CREATE INDEX IF NOT EXISTS territory_stats_players ON territory_stats (snapshot_id, players_rank);
+"""
+
+
+def rank_rows(rows: List[Dict], metrics: Dict[str, str]) -> List[Dict]:
+    """Add a <metric>_rank to every row: 1 for the largest value, ties broken by name"""
+    for metric, column in metrics.items():
+        ordered = sorted(rows, key=lambda row: (-row[column], row['name']))
+        for rank, row in enumerate(ordered, 1):
+            row[f"{metric}_rank"] = rank
+    return rows
+
+
+def end_of_day(date: str) -> str:
+    """Turn a bare YYYY-MM-DD into the last timestamp of that day"""
+    return f"{date} 23:59:59" if len(date) == 10 else date
+
+
+class HistoryStore:
+    """
+    Append-only SQLite store of one row per nation and territory per
+    scrape. Rows are keyed by (snapshot, name), so appending a snapshot
+    only writes at the end of each b-tree. Ranks are computed once at
+    ingest, so top-N is an index range scan and rank-over-time is one
+    key lookup per snapshot.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> 'HistoryStore':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _table(self, entity: str, metric: str) -> Tuple[str, str]:
+        if entity not in METRICS:
+            raise ValueError(f"Unknown entity {entity!r}, expected one of {', '.join(METRICS)}")
+        if metric not in METRICS[entity]:
+            raise ValueError(f"Unknown {entity} metric {metric!r}, expected one of {', '.join(METRICS[entity])}")
+        return f"{entity}_stats", METRICS[entity][metric]
+
+    def _name_ids(self, table: str, names: Iterable[str]) -> Dict[str, int]:
+        """Intern names, returning name -> id"""
+        names = list(dict.fromkeys(names))
+        self.connection.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", ((name,) for name in names))
+        ids: Dict[str, int] = {}
+        # Stay under SQLite's bound parameter limit
+        for start in range(0, len(names), 500):
+            batch = names[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            ids.update(self.connection.execute(
+                f"SELECT name, id FROM {table} WHERE name IN ({placeholders})", batch
+            ))
+        return ids
+
+    def record_snapshot(self, nations: List[Dict], territories: List[Dict], taken_at: Optional[str] = None,
+                        source: Optional[str] = None, content_hash: Optional[str] = None) -> int:
+        """Append one scrape's nation and territory stats in a single transaction; returns the snapshot id"""
+        nation_rows = rank_rows([{
+            'name': nation['name'],
+            'total_balance': nation.get('total_balance', 0.0),
+            'total_chunks': nation.get('total_chunks', 0),
+            'unique_players': nation.get('unique_players', 0),
+            'territory_count': len(nation.get('territories', [])),
+        } for nation in nations], METRICS['nation'])
+        territory_rows = rank_rows([{
+            'name': territory['name'],
+            'nation': territory.get('nation_name'),
+            'balance': territory.get('balance', 0.0),
+            'chunks': territory.get('chunks', 0),
+            'player_count': territory.get('player_count', 0),
+        } for territory in territories], METRICS['territory'])
+
+        with self.connection:
+            snapshot_id = self.connection.execute(
+                "INSERT INTO snapshots (taken_at, source, content_hash) VALUES (?, ?, ?)",
+                (taken_at or time.strftime('%Y-%m-%d %H:%M:%S'), source, content_hash),
+            ).lastrowid
+            nation_ids = self._name_ids('nation_names', [row['name'] for row in nation_rows] +
+                                        [row['nation'] for row in territory_rows if row['nation']])
+            territory_ids = self._name_ids('territory_names', [row['name'] for row in territory_rows])
+
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO nation_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(snapshot_id, nation_ids[row['name']], row['total_balance'], row['total_chunks'],
+                  row['unique_players'], row['territory_count'], row['balance_rank'],
+                  row['chunks_rank'], row['players_rank'], row['territories_rank'])
+                 for row in nation_rows],
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO territory_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(snapshot_id, territory_ids[row['name']], nation_ids.get(row['nation']),
+                  row['balance'], row['chunks'], row['player_count'],
+                  row['balance_rank'], row['chunks_rank'], row['players_rank'])
+                 for row in territory_rows],
+            )
+        return snapshot_id
+
+    def snapshots(self) -> List[Tuple[int, str]]:
+        """Return (id, taken_at) of every snapshot, oldest first"""
+        return self.connection.execute("SELECT id, taken_at FROM snapshots ORDER BY taken_at, id").fetchall()
+
+    def resolve_snapshot(self, when: Union[int, str, None]) -> Optional[int]:
+        """Find a snapshot by id, or the latest one taken at or before a date/timestamp (None = latest)"""
+        if isinstance(when, int) or (isinstance(when, str) and when.isdigit()):
+            row = self.connection.execute("SELECT id FROM snapshots WHERE id = ?", (int(when),)).fetchone()
+        elif when is None:
+            row = self.connection.execute("SELECT id FROM snapshots ORDER BY taken_at DESC, id DESC LIMIT 1").fetchone()
+        else:
+            row = self.connection.execute(
+                "SELECT id FROM snapshots WHERE taken_at <= ? ORDER BY taken_at DESC, id DESC LIMIT 1",
+                (end_of_day(when),),
+            ).fetchone()
+        return row[0] if row else None
+
+    def rank_history(self, name: str, metric: str = 'balance', entity: str = 'nation') -> List[Dict]:
+        """Rank and value of one nation or territory in every snapshot it appears in"""
+        table, column = self._table(entity, metric)
+        name_row = self.connection.execute(f"SELECT id FROM {entity}_names WHERE name = ?", (name,)).fetchone()
+        if name_row is None:
+            return []
+        # One primary key seek per snapshot; an index led by name would make
+        # every append touch a page per name instead of a few pages at the end
+        return [
+            {'snapshot': snapshot_id, 'taken_at': taken_at, 'rank': rank, 'value': value}
+            for snapshot_id, taken_at, rank, value in self.connection.execute(
+                f"SELECT s.id, s.taken_at, t.{metric}_rank, t.{column} "
+                f"FROM snapshots s JOIN {table} t ON t.snapshot_id = s.id AND t.name_id = ? "
+                f"ORDER BY s.taken_at, s.id",
+                (name_row[0],),
+            )
+        ]
+
+    def top(self, metric: str = 'balance', when: Union[int, str, None] = None, limit: int = 10,
+            entity: str = 'nation') -> List[Dict]:
+        """Top nations or territories by a metric in the snapshot at a date (latest by default)"""
+        table, column = self._table(entity, metric)
+        snapshot_id = self.resolve_snapshot(when)
+        if snapshot_id is None:
+            return []
+        return [
+            {'rank': rank, 'name': name, 'value': value}
+            for rank, name, value in self.connection.execute(
+                f"SELECT t.{metric}_rank, n.name, t.{column} FROM {table} t "
+                f"JOIN {entity}_names n ON n.id = t.name_id "
+                f"WHERE t.snapshot_id = ? AND t.{metric}_rank <= ? ORDER BY t.{metric}_rank",
+                (snapshot_id, limit),
+            )
+        ]
+
+    def top_movers(self, start: Union[int, str], end: Union[int, str, None] = None, metric: str = 'balance',
+                   limit: int = 10, entity: str = 'nation') -> List[Dict]:
+        """Largest rank changes between two snapshots; positive change means moving up"""
+        table, column = self._table(entity, metric)
+        start_id, end_id = self.resolve_snapshot(start), self.resolve_snapshot(end)
+        if start_id is None or end_id is None:
+            return []
+        return [
+            {'name': name, 'old_rank': old_rank, 'new_rank': new_rank, 'change': old_rank - new_rank,
+             'old_value': old_value, 'new_value': new_value}
+            for name, old_rank, new_rank, old_value, new_value in self.connection.execute(
+                f"SELECT n.name, a.{metric}_rank, b.{metric}_rank, a.{column}, b.{column} "
+                f"FROM {table} a JOIN {table} b ON b.snapshot_id = ? AND b.name_id = a.name_id "
+                f"JOIN {entity}_names n ON n.id = a.name_id "
+                f"WHERE a.snapshot_id = ? "
+                f"ORDER BY abs(a.{metric}_rank - b.{metric}_rank) DESC, b.{metric}_rank LIMIT ?",
+                (end_id, start_id, limit),
+            )
+        ]
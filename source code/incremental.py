@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from atomic_files import atomic_open
+from player_registry import PlayerList, PlayerRegistry, PlayerUnion
+
+
+def marker_fingerprint(marker_info: Dict) -> str:
+    """Hash the label, detail and shape of a marker"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(marker_info.get('label', 'Unknown')).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(str(marker_info.get('detail', '')).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(json.dumps(marker_info.get('shape', []), separators=(',', ':')).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def territory_view(name: str, aggregate: Dict, fields: Dict) -> Dict:
+    """Compact summary of a territory for delta files"""
+    return {
+        'name': name,
+        'nation_name': fields.get('nation_name'),
+        'level': fields.get('level'),
+        'balance': aggregate['balance'],
+        'chunks': aggregate['chunks'],
+        'player_count': aggregate['player_count'],
+    }
+
+
+def nation_view(nation: Dict) -> Dict:
+    """Compact summary of a nation for delta files"""
+    return {
+        'name': nation['name'],
+        'level': nation['level'],
+        'capital': nation['capital'],
+        'territory_count': len(nation['territories']),
+        'total_chunks': nation['total_chunks'],
+        'total_balance': nation['total_balance'],
+        'unique_players': nation['unique_players'],
+    }
+
+
+class IncrementalAggregator:
+    """
+    Parsed detail fields and fingerprints of every marker in the last
+    snapshot, plus the territory and nation aggregates built from them.
+    A new snapshot is applied as added, changed and removed markers, and
+    only the territories and nations those markers belong to are
+    recomputed. Aggregates follow the same first-seen ordering rules as
+    a full pass over the payload, so the output is identical.
+    """
+
+    def __init__(self, registry: Optional[PlayerRegistry] = None):
+        self.registry = registry if registry is not None else PlayerRegistry()
+        # marker id -> {'fingerprint', 'name', 'fields'}; fields is None if the detail failed to parse
+        self.markers: Dict[str, Dict] = {}
+        self.positions: Dict[str, int] = {}
+        # territory name -> ids of its markers, in payload order
+        self.groups: Dict[str, List[str]] = {}
+        # territory name -> merged chunks, balance and players over all its markers
+        self.territories: Dict[str, Dict] = {}
+        # territory name -> {nation: id of the first marker placing it in that nation}
+        self.contributions: Dict[str, Dict[str, str]] = {}
+        # nation -> {territory name: contributing marker id}
+        self.nation_members: Dict[str, Dict[str, str]] = {}
+        self.nations: Dict[str, Dict] = {}
+
+    def lookup(self, marker_id: str, fingerprint: str) -> Optional[Dict]:
+        """Return the cached entry for a marker if its fingerprint is unchanged"""
+        entry = self.markers.get(marker_id)
+        if entry is not None and entry['fingerprint'] == fingerprint:
+            return entry
+        return None
+
+    @staticmethod
+    def is_valid(entry: Optional[Dict]) -> bool:
+        """Check whether a marker entry produced a territory"""
+        return entry is not None and entry['fields'] is not None and bool(entry['name'])
+
+    def apply(self, snapshot: Dict[str, Dict]) -> Dict:
+        """
+        Replace the current markers with snapshot (marker id -> entry, in
+        payload order) and update the aggregates. Returns the delta.
+        """
+        previous = self.markers
+        changed_ids = [
+            marker_id for marker_id, entry in snapshot.items()
+            if marker_id not in previous or previous[marker_id]['fingerprint'] != entry['fingerprint']
+        ]
+        removed_ids = [marker_id for marker_id in previous if marker_id not in snapshot]
+
+        touched: Set[str] = set()
+        for marker_id in changed_ids + removed_ids:
+            for entry in (previous.get(marker_id), snapshot.get(marker_id)):
+                if self.is_valid(entry):
+                    touched.add(entry['name'])
+        marker_touched = set(touched)
+
+        # Aggregates of untouched territories depend on the relative order
+        # of their markers; if the payload reordered them, redo everything
+        last_position = -1
+        for marker_id in snapshot:
+            position = self.positions.get(marker_id)
+            if position is None:
+                continue
+            if position < last_position:
+                touched.update(self.groups)
+                touched.update(entry['name'] for entry in snapshot.values() if self.is_valid(entry))
+                break
+            last_position = position
+
+        old_territories = {name: self._territory_view(name) for name in touched if name in self.territories}
+        old_nations = dict(self.nations)
+
+        self.markers = snapshot
+        self.positions = {marker_id: position for position, marker_id in enumerate(snapshot)}
+
+        groups: Dict[str, List[str]] = {name: [] for name in touched}
+        for marker_id, entry in snapshot.items():
+            if entry['name'] in groups and self.is_valid(entry):
+                groups[entry['name']].append(marker_id)
+
+        touched_nations: Set[str] = set()
+        for name, marker_ids in groups.items():
+            old_contribution = self.contributions.pop(name, {})
+            if marker_ids:
+                self.groups[name] = marker_ids
+                self.territories[name], contribution = self._aggregate_territory(marker_ids)
+                self.contributions[name] = contribution
+            else:
+                self.groups.pop(name, None)
+                self.territories.pop(name, None)
+                contribution = {}
+
+            for nation_name in old_contribution.keys() | contribution.keys():
+                members = self.nation_members.setdefault(nation_name, {})
+                if nation_name in contribution:
+                    members[name] = contribution[nation_name]
+                else:
+                    members.pop(name, None)
+                touched_nations.add(nation_name)
+
+        for nation_name in touched_nations:
+            members = self.nation_members[nation_name]
+            if members:
+                self.nations[nation_name] = self._aggregate_nation(nation_name, members)
+            else:
+                del self.nation_members[nation_name]
+                self.nations.pop(nation_name, None)
+
+        return {
+            'markers': {
+                'added': sum(1 for marker_id in changed_ids if marker_id not in previous),
+                'changed': sum(1 for marker_id in changed_ids if marker_id in previous),
+                'removed': len(removed_ids),
+            },
+            'territories': self._diff(
+                old_territories,
+                {name: self._territory_view(name) for name in touched if name in self.territories},
+                marker_touched,
+            ),
+            'nations': self._diff(
+                {name: nation_view(old_nations[name]) for name in touched_nations if name in old_nations},
+                {name: nation_view(self.nations[name]) for name in touched_nations if name in self.nations},
+                set(),
+            ),
+        }
+
+    def _aggregate_territory(self, marker_ids: List[str]) -> Tuple[Dict, Dict[str, str]]:
+        """Merge a territory's markers and find which marker counts towards each nation"""
+        first = self.markers[marker_ids[0]]['fields']
+        first_ids = self.registry.id_array(first['players'])
+        aggregate = {
+            'chunks': first['chunks'],
+            'balance': first['balance'],
+            'players': PlayerList(self.registry, first_ids),
+            'player_count': first['player_count'],
+        }
+        players: Optional[PlayerUnion] = None
+        contribution: Dict[str, str] = {}
+        for index, marker_id in enumerate(marker_ids):
+            fields = self.markers[marker_id]['fields']
+            if index:
+                aggregate['chunks'] += fields['chunks']
+                aggregate['balance'] += fields['balance']
+                if players is None:
+                    players = PlayerUnion(self.registry, first_ids)
+                players.add(self.registry.id_array(fields['players']))
+            nation_name = fields['nation_name']
+            if nation_name and nation_name not in contribution:
+                contribution[nation_name] = marker_id
+        if players is not None:
+            aggregate['players'] = players.to_list()
+            aggregate['player_count'] = len(aggregate['players'])
+        return aggregate, contribution
+
+    def _aggregate_nation(self, nation_name: str, members: Dict[str, str]) -> Dict:
+        """Total up a nation from the markers its territories contribute"""
+        ordered = sorted(members.items(), key=lambda item: self.positions[item[1]])
+        first = self.markers[ordered[0][1]]['fields']
+        nation = {
+            'name': nation_name,
+            'level': first['nation_level'],
+            'capital': first['nation_capital'],
+            'territories': [name for name, _ in ordered],
+            'total_chunks': 0,
+            'total_balance': 0.0,
+            'total_players': 0,
+            'all_players': [],
+        }
+        players = PlayerUnion(self.registry)
+        for _, marker_id in ordered:
+            fields = self.markers[marker_id]['fields']
+            nation['total_chunks'] += fields['chunks']
+            nation['total_balance'] += fields['balance']
+            players.add(self.registry.id_array(fields['players']))
+        nation['all_players'] = players.to_list()
+        nation['unique_players'] = len(nation['all_players'])
+        return nation
+
+    def _territory_view(self, name: str) -> Dict:
+        return territory_view(name, self.territories[name], self.markers[self.groups[name][0]]['fields'])
+
+    def _diff(self, old: Dict[str, Dict], new: Dict[str, Dict], touched: Set[str]) -> Dict:
+        return {
+            'added': [view for name, view in new.items() if name not in old],
+            'changed': [
+                view for name, view in new.items()
+                if name in old and (view != old[name] or name in touched)
+            ],
+            'removed': sorted(name for name in old if name not in new),
+        }
+
+    def iter_territories(self) -> Iterator[Tuple[str, Dict, Dict]]:
+        """Yield (first marker id, fields, merged aggregate) per territory in payload order"""
+        names = sorted(self.groups, key=lambda name: self.positions[self.groups[name][0]])
+        for name in names:
+            first_id = self.groups[name][0]
+            yield first_id, self.markers[first_id]['fields'], self.territories[name]
+
+    def nation_list(self) -> List[Dict]:
+        """Return the nations in payload order"""
+        def first_position(nation_name: str) -> int:
+            return min(self.positions[marker_id] for marker_id in self.nation_members[nation_name].values())
+        return [dict(self.nations[name]) for name in sorted(self.nations, key=first_position)]
+
+    def save(self, path: str):
+        """Write marker fingerprints and parsed fields for the next run"""
+        with atomic_open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'markers': [
+                    [marker_id, entry['fingerprint'], entry['name'], entry['fields']]
+                    for marker_id, entry in self.markers.items()
+                ],
+            }, f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: str, registry: Optional[PlayerRegistry] = None) -> 'IncrementalAggregator':
+        """
+        Restore the previous run's aggregates from its saved markers, without
+        re-parsing. Whatever file or URL the markers come from this time, a
+        marker is only reused if its fingerprint still matches.
+        """
+        aggregator = cls(registry)
+        if not os.path.exists(path):
+            return aggregator
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        aggregator.apply({
+            marker_id: {'fingerprint': fingerprint, 'name': name, 'fields': fields}
+            for marker_id, fingerprint, name, fields in data.get('markers', [])
+        })
+        return aggregator
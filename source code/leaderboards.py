@@ -0,0 +1,99 @@
+import gzip
+import json
+import os
+from typing import Dict, List, Optional
+
+from atomic_files import atomic_open, write_atomic
+from output_writer import remove_gzip_copy
+
+# Leaderboard -> nation field it ranks by, largest first (the site's tabs)
+LEADERBOARDS: Dict[str, str] = {
+    'richest': 'total_balance',
+    'largest': 'total_chunks',
+    'populous': 'unique_players',
+}
+
+DEFAULT_PAGE_SIZE = 50
+
+
+def slim_nation(nation: Dict) -> Dict:
+    """Keep only what a leaderboard row shows; player and territory lists are dropped"""
+    return {
+        'name': nation['name'],
+        'level': nation.get('level'),
+        'territory_count': len(nation.get('territories', [])),
+        'total_chunks': nation.get('total_chunks', 0),
+        'total_balance': nation.get('total_balance', 0.0),
+        'unique_players': nation.get('unique_players', 0),
+    }
+
+
+def rank_nations(nations: List[Dict], field: str) -> List[Dict]:
+    """Slim nations with a positive value of field, ranked largest first (ties keep input order)"""
+    ranked = sorted((nation for nation in nations if nation.get(field, 0) > 0),
+                    key=lambda nation: -nation[field])
+    return [{'rank': rank, **slim_nation(nation)} for rank, nation in enumerate(ranked, 1)]
+
+
+def compact_json(data) -> bytes:
+    """Serialize without indentation or spaces"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_artifact(path: str, data, compress: bool = False) -> List[str]:
+    """
+    Write compact JSON, with compress a pre-gzipped copy next to it, and
+    return the paths written. Without compress a stale copy is deleted.
+    """
+    payload = compact_json(data)
+    write_atomic(path, payload)
+    if not compress:
+        remove_gzip_copy(path)
+        return [path]
+    # mtime=0 keeps the gzip bytes identical for identical data
+    write_atomic(f"{path}.gz", gzip.compress(payload, compresslevel=9, mtime=0))
+    return [path, f"{path}.gz"]
+
+
+def remove_stale_pages(directory: str, pages: int):
+    """Delete page shards left over from a run with more pages"""
+    for name in os.listdir(directory):
+        number = name.split('.', 1)[0][len('page-'):]
+        if name.startswith('page-') and number.isdigit() and int(number) > pages:
+            os.remove(os.path.join(directory, name))
+
+
+def write_leaderboards(nations: List[Dict], directory: str = 'leaderboards',
+                       page_size: Optional[int] = DEFAULT_PAGE_SIZE, compress: bool = False) -> List[str]:
+    """
+    Write <board>.json per leaderboard plus, with a page size, <board>/page-N.json
+    shards and an index.json describing them, all with .gz copies if compress
+    is set. Returns the files written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    written: List[str] = []
+    index = {'page_size': page_size or None, 'boards': {}}
+
+    for board, field in LEADERBOARDS.items():
+        entries = rank_nations(nations, field)
+        written += write_artifact(os.path.join(directory, f"{board}.json"),
+                                  {'board': board, 'field': field, 'total': len(entries), 'entries': entries},
+                                  compress)
+
+        pages = 0
+        if page_size:
+            os.makedirs(os.path.join(directory, board), exist_ok=True)
+            pages = max(1, -(-len(entries) // page_size))
+            for page in range(pages):
+                written += write_artifact(os.path.join(directory, board, f"page-{page + 1}.json"), {
+                    'board': board, 'field': field, 'page': page + 1, 'pages': pages,
+                    'total': len(entries), 'entries': entries[page * page_size:(page + 1) * page_size],
+                }, compress)
+            remove_stale_pages(os.path.join(directory, board), pages)
+        index['boards'][board] = {'field': field, 'total': len(entries), 'pages': pages}
+
+    index_path = os.path.join(directory, 'index.json')
+    with atomic_open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    written.append(index_path)
+    return written
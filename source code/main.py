@@ -1,42 +1,193 @@
 import os
+import sys
+import argparse
+import asyncio
+import cProfile
 import json
 import requests
 import csv
 import time
-import gzip
+import hashlib
+import random
+import signal
+import tempfile
+import threading
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import re
-from typing import Dict, List, Tuple, Optional, Set
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional, Set
+
+from atomic_files import atomic_open
+from borders import border_graph, write_border_csvs
+from census import load_census_pages, normalize_census, parse_census_tables, write_census_csv
+from coordinate_store import CoordinateStore, MappedCoordinates
+from detail_parser import DETAIL_FIELDS, parse_detail, parse_detail_batch
+from geometry import BACKEND as GEOMETRY_BACKEND, EMPTY_GEOMETRY, polygon_area, territory_geometry
+from history import METRICS as HISTORY_METRICS, HistoryStore
+from incremental import IncrementalAggregator, marker_fingerprint
+from leaderboards import DEFAULT_PAGE_SIZE, write_leaderboards
+from marker_stream import LANDS_MARKER_SET, iter_file_chunks, iter_marker_set, iter_spooled_chunks
+from merge_groups import load_merge_groups, merge_nations
+from metrics import RunMetrics, peak_memory_bytes, write_prometheus, write_report
+from multi_map import DEFAULT_MAP, DEFAULT_MARKERS_URL, combine_nations, load_saved_nations, resolve_map_sources
+from output_writer import DEFAULT_OUTPUT_WORKERS, OutputWriter, territory_outputs
+from player_index import PlayerIndex, write_player_index
+from player_registry import PlayerList, PlayerRegistry, PlayerUnion
+from spatial_index import SpatialIndex
+from territory_record import LEAN_OMITTED, TerritoryRecord, json_default
+from wiki_crawler import crawl_pages
+from wiki_extractor import extract_nation_fields
+
+MERGE_GROUPS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'merge_groups.json')
+CENSUS_PAGES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'census_pages.json')
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+def new_session() -> requests.Session:
+    """HTTP session with the scraper's browser User-Agent"""
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT})
+    return session
 
 class StoneworksDataScraper:
-    def __init__(self):
+    def __init__(self, use_soup_parser: bool = False, markers_file: Optional[str] = None,
+                 stream_markers: bool = False, workers: int = 1, parse_batch_size: int = 256,
+                 state_file: Optional[str] = 'scrape_state.json', force: bool = False,
+                 incremental: bool = False, cache_file: str = 'marker_cache.json',
+                 delta_file: str = 'territory_delta.json', wiki_concurrency: int = 4,
+                 wiki_rate: float = 2.0, wiki_burst: float = 1.0, wiki_max_pages: Optional[int] = None,
+                 history_file: Optional[str] = None, leaderboard_page_size: int = DEFAULT_PAGE_SIZE,
+                 merge_groups_file: Optional[str] = MERGE_GROUPS_FILE,
+                 report_file: Optional[str] = 'run_report.json', metrics_file: Optional[str] = 'run_metrics.prom',
+                 profile_file: Optional[str] = None, markers_url: Optional[str] = None,
+                 map_name: Optional[str] = None, output_dir: str = '',
+                 session: Optional[requests.Session] = None, executor: Optional[ProcessPoolExecutor] = None,
+                 census_pages_file: Optional[str] = CENSUS_PAGES_FILE, lean: bool = False,
+                 compact_json: bool = False, borders: bool = False,
+                 output_workers: int = DEFAULT_OUTPUT_WORKERS, gzip_outputs: bool = False):
         self.base_map_url = "https://map.stoneworks.gg/abex1"
         self.wiki_base_url = "https://stoneworksmc.fandom.com"
-        self.markers_url = "https://map.stoneworks.gg/abex1/maps/abexilas/live/markers.json?331762"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # Live markers of the default map; fetched with Cache-Control: no-cache instead of a cache-busting query
+        self.markers_url = markers_url or DEFAULT_MARKERS_URL
+        # Shared with other scrapers when several maps are scraped at once
+        self.session = session or new_session()
+        
+        # Name logged in front of every message when several maps are scraped,
+        # and the directory every output, state and cache file is written to
+        self.map_name = map_name
+        self.output_dir = output_dir
+        
+        # Wiki crawling: pages in flight, requests started per second (up to
+        # wiki_burst at once after a pause), optional cap on nation articles
+        self.wiki_concurrency = wiki_concurrency
+        self.wiki_rate = wiki_rate
+        self.wiki_burst = wiki_burst
+        self.wiki_max_pages = wiki_max_pages
+        self.wiki_skip_namespaces = [
+            'category:', 'template:', 'file:', 'special:', 'user:', 'user_blog:', 'talk:',
+            'help:', 'module:', 'mediawiki:', 'message_wall:', 'stoneworks_mc_wiki:',
+        ]
+        # Census pages ({'url', 'month'}) whose tables become population_data
+        self.census_pages = load_census_pages(census_pages_file)
+        
+        # Parse marker details with BeautifulSoup instead of the fast path
+        self.use_soup_parser = use_soup_parser
+        
+        # Read markers from a local markers.json instead of markers_url, and
+        # optionally stream them one at a time instead of loading the payload
+        self.markers_file = markers_file
+        self.stream_markers = stream_markers
+        
+        # Worker processes for marker parsing (1 parses inline, 0 uses every core),
+        # or a pool shared with other scrapers
+        self.workers = workers or os.cpu_count() or 1
+        self.parse_batch_size = parse_batch_size
+        self.executor = executor
+        
+        # ETag/Last-Modified/content hash of the last saved markers payload;
+        # an unchanged payload skips parsing and writing unless forced
+        self.state_file = state_file and self.output_path(state_file)
+        self.force = force
+        self.fetch_state: Dict = {}
+        self.pending_fetch_state: Optional[Dict] = None
+        self.markers_unchanged = False
+        self.markers_failed = False
+        
+        # Incremental mode re-parses only markers whose fingerprint changed
+        # since the last run and writes a delta of what changed
+        self.incremental = incremental
+        self.cache_file = self.output_path(cache_file)
+        self.delta_file = self.output_path(delta_file)
+        self.aggregator: Optional[IncrementalAggregator] = None
+        self.delta: Optional[Dict] = None
+        
+        # SQLite database each scrape appends its nation and territory stats to
+        self.history_file = history_file and self.output_path(history_file)
+        
+        # Ranked, slimmed leaderboard files for the site, split into pages of this size (0 = no pages)
+        self.leaderboard_dir = self.output_path('leaderboards')
+        self.leaderboard_page_size = leaderboard_page_size
+        
+        # Alliances shown as one nation; nations_data stays raw and
+        # merged_nations_data holds the merged view
+        self.merge_groups = load_merge_groups(merge_groups_file)
+        
+        # Stage timings and counters of the current run, written as a JSON
+        # report and a Prometheus text file; optionally a cProfile dump too
+        self.metrics = RunMetrics()
+        self.last_report: Optional[Dict] = None
+        self.report_file = report_file and self.output_path(report_file)
+        self.metrics_file = metrics_file and self.output_path(metrics_file)
+        self.profile_file = profile_file and self.output_path(profile_file)
+        
+        # Lean territories leave out the raw detail HTML and their shape, which
+        # the coordinate store already holds; compact JSON drops the indentation
+        self.lean = lean
+        self.json_format: Dict = {'separators': (',', ':')} if compact_json else {'indent': 2}
+        
+        # Output files written at once (1 writes them one after another), and
+        # whether the JSON and CSV outputs also get a .gz copy
+        self.output_workers = output_workers
+        self.gzip_outputs = gzip_outputs
+        
+        # Rasterize the shapes into chunks and write the territory and nation border graph
+        self.borders = borders
+        self.border_graph: Optional[Dict] = None
         
         # Data storage
         self.nations_data: List[Dict] = []
+        self.merged_nations_data: List[Dict] = []
+        # Player names interned to ids; memberships are arrays of those ids
+        self.player_registry = PlayerRegistry()
         self.cities_data: List[Dict] = []
-        self.territories_data: List[Dict] = []
-        self.coordinates_data: List[Tuple[float, float, float]] = []
+        self.territories_data: List[TerritoryRecord] = []
+        self.coordinates_data = CoordinateStore()
+        self.spatial_index: Optional[SpatialIndex] = None
         self.population_data: List[Dict] = []
         self.balance_data: List[Dict] = []
         self.chunk_data: List[Dict] = []
         
     def log(self, message: str):
         """Log messages with timestamp"""
-        print(f"[{time.strftime('%H:%M:%S')}] {message}")
+        prefix = f"[{self.map_name}] " if self.map_name else ''
+        print(f"[{time.strftime('%H:%M:%S')}] {prefix}{message}")
+        
+    def output_path(self, name: str) -> str:
+        """Path of an output file in output_dir"""
+        return os.path.join(self.output_dir, name)
         
-    def safe_request(self, url: str, timeout: int = 10) -> Optional[requests.Response]:
-        """Make a safe HTTP request with error handling"""
+    def safe_request(self, url: str, timeout: int = 10, stream: bool = False, headers: Optional[Dict] = None,
+                     session: Optional[requests.Session] = None) -> Optional[requests.Response]:
+        """Make a safe HTTP request with error handling, on the scraper's session unless given one"""
         try:
-            response = self.session.get(url, timeout=timeout)
-            if response.status_code == 200:
+            response = (session or self.session).get(url, timeout=timeout, stream=stream, headers=headers)
+            # Conditional requests may legitimately come back 304 Not Modified
+            if response.status_code == 200 or (headers and response.status_code == 304):
                 return response
             else:
                 self.log(f"HTTP {response.status_code} for {url}")
@@ -59,30 +210,39 @@ class StoneworksDataScraper:
             
         soup = BeautifulSoup(response.content, 'html.parser')
         
-        # Find all nation links
+        # Find all nation links, once each and only to articles on the wiki itself
+        wiki_host = urlparse(self.wiki_base_url).netloc
+        seen_urls = {nations_url}
         nation_links = []
         for link in soup.find_all('a', href=True):
             href = link['href']
-            if '/wiki/' in href and link.text and not any(skip in href.lower() for skip in ['category:', 'template:', 'file:']):
-                if href.startswith('/'):
-                    href = urljoin(self.wiki_base_url, href)
+            if '/wiki/' in href and link.text and not any(skip in href.lower() for skip in self.wiki_skip_namespaces):
+                href = urljoin(self.wiki_base_url, href).split('#')[0].split('?')[0]
+                if urlparse(href).netloc != wiki_host or href in seen_urls:
+                    continue
+                seen_urls.add(href)
                 nation_links.append((link.text.strip(), href))
                 
         self.log(f"Found {len(nation_links)} potential nation pages")
+        if self.wiki_max_pages is not None:
+            nation_links = nation_links[:self.wiki_max_pages]
+            
+        # Scrape individual nation pages concurrently, rate limited to be respectful to the server
+        self.log(f"Crawling {len(nation_links)} pages, {self.wiki_concurrency} at a time, "
+                 f"at most {self.wiki_rate:g} requests/sec")
+        results = asyncio.run(crawl_pages(
+            nation_links, self.scrape_nation_page, self.wiki_concurrency, self.wiki_rate, self.wiki_burst, new_session
+        ))
         
-        # Scrape individual nation pages
-        for nation_name, nation_url in nation_links[:100]:  # Limit for testing
-            try:
-                nation_data = self.scrape_nation_page(nation_name, nation_url)
-                if nation_data:
-                    self.nations_data.append(nation_data)
-                time.sleep(0.5)  # Be respectful to the server
-            except Exception as e:
-                self.log(f"Error scraping nation {nation_name}: {e}")
+        for (nation_name, _), result in zip(nation_links, results):
+            if isinstance(result, Exception):
+                self.log(f"Error scraping nation {nation_name}: {result}")
+            elif result:
+                self.nations_data.append(result)
                 
-    def scrape_nation_page(self, nation_name: str, nation_url: str) -> Optional[Dict]:
+    def scrape_nation_page(self, session: requests.Session, nation_name: str, nation_url: str) -> Optional[Dict]:
         """Scrape individual nation page for data"""
-        response = self.safe_request(nation_url)
+        response = self.safe_request(nation_url, session=session)
         if not response:
             return None
             
@@ -91,269 +251,98 @@ class StoneworksDataScraper:
         nation_data = {
             'name': nation_name,
             'url': nation_url,
-            'population': self.extract_population(soup),
-            'capital': self.extract_capital(soup),
-            'leader': self.extract_leader(soup),
-            'coordinates': self.extract_coordinates(soup),
-            'cities': self.extract_cities(soup),
-            'territory_size': self.extract_territory_size(soup),
-            'founding_date': self.extract_founding_date(soup),
-            'government_type': self.extract_government_type(soup)
+            **extract_nation_fields(soup)
         }
         
         return nation_data
         
-    def extract_population(self, soup: BeautifulSoup) -> Optional[int]:
-        """Extract population from nation page"""
-        patterns = [
-            r'population[:\s]*(\d+)',
-            r'citizens[:\s]*(\d+)',
-            r'inhabitants[:\s]*(\d+)'
-        ]
-        
-        text = soup.get_text().lower()
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                return int(match.group(1))
-        return None
-        
-    def extract_capital(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extract capital city from nation page"""
-        patterns = [
-            r'capital[:\s]*([^\n\r,]+)',
-            r'capitol[:\s]*([^\n\r,]+)'
-        ]
-        
-        text = soup.get_text()
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-        return None
-        
-    def extract_leader(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extract leader/ruler from nation page"""
-        patterns = [
-            r'leader[:\s]*([^\n\r,]+)',
-            r'ruler[:\s]*([^\n\r,]+)',
-            r'king[:\s]*([^\n\r,]+)',
-            r'president[:\s]*([^\n\r,]+)',
-            r'emperor[:\s]*([^\n\r,]+)'
-        ]
-        
-        text = soup.get_text()
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-        return None
-        
-    def extract_coordinates(self, soup: BeautifulSoup) -> List[Tuple[int, int]]:
-        """Extract coordinates from nation page"""
-        coords = []
-        patterns = [
-            r'(\-?\d+)[,\s]+(\-?\d+)',
-            r'x[:\s]*(\-?\d+)[,\s]*z[:\s]*(\-?\d+)',
-            r'coords?[:\s]*(\-?\d+)[,\s]*(\-?\d+)'
-        ]
-        
-        text = soup.get_text()
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
-                try:
-                    x, z = int(match[0]), int(match[1])
-                    coords.append((x, z))
-                except ValueError:
-                    continue
-                    
-        return coords
-        
-    def extract_cities(self, soup: BeautifulSoup) -> List[str]:
-        """Extract cities/towns from nation page"""
-        cities = []
-        
-        # Look for lists of cities
-        for list_item in soup.find_all(['li', 'ul']):
-            text = list_item.get_text().strip()
-            if any(keyword in text.lower() for keyword in ['city', 'town', 'settlement']):
-                # Extract city names
-                city_matches = re.findall(r'([A-Z][a-zA-Z\s]+)', text)
-                cities.extend([city.strip() for city in city_matches if len(city.strip()) > 2])
-                
-        return list(set(cities))  # Remove duplicates
-        
-    def extract_territory_size(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extract territory/area information"""
-        patterns = [
-            r'area[:\s]*([^\n\r,]+)',
-            r'territory[:\s]*([^\n\r,]+)',
-            r'size[:\s]*([^\n\r,]+)',
-            r'(\d+)\s*(?:chunks?|blocks?|km²?)'
-        ]
-        
-        text = soup.get_text()
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-        return None
-        
-    def extract_founding_date(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extract founding date"""
-        patterns = [
-            r'founded[:\s]*([^\n\r,]+)',
-            r'established[:\s]*([^\n\r,]+)',
-            r'created[:\s]*([^\n\r,]+)'
-        ]
+    def scrape_census_data(self):
+        """Scrape the census pages concurrently into population_data, one row per nation and month"""
+        self.log(f"Starting census data scraping ({len(self.census_pages)} pages)...")
         
-        text = soup.get_text()
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-        return None
-        
-    def extract_government_type(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extract government type"""
-        patterns = [
-            r'government[:\s]*([^\n\r,]+)',
-            r'(?:kingdom|republic|empire|federation|union|state)[^\n\r,]*'
-        ]
+        pages = [(urljoin(self.wiki_base_url, page['url']), page['month']) for page in self.census_pages]
+        results = asyncio.run(crawl_pages(pages, self.scrape_census_page, self.wiki_concurrency, self.wiki_rate,
+                                          self.wiki_burst, new_session))
         
-        text = soup.get_text()
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).strip() if match.groups() else match.group(0).strip()
-        return None
+        rows = []
+        for (census_url, month), result in zip(pages, results):
+            if isinstance(result, Exception):
+                self.log(f"Error scraping census {census_url}: {result}")
+            elif result is not None:
+                if month is None:
+                    self.log(f"No month in census URL {census_url}; add one in the census pages file")
+                rows.extend(result)
+        self.population_data = normalize_census(rows)
+        months = {row['month'] for row in self.population_data}
+        self.log(f"Collected {len(self.population_data)} census rows for "
+                 f"{len({row['nation'] for row in self.population_data})} nations over {len(months)} months")
         
-    def scrape_census_data(self):
-        """Scrape population census data"""
-        self.log("Starting census data scraping...")
+    def scrape_census_page(self, session: requests.Session, census_url: str,
+                           month: Optional[str]) -> Optional[List[Dict]]:
+        """Fetch one census page and read its tables"""
+        response = self.safe_request(census_url, session=session)
+        if not response:
+            return None
+        return self.parse_census_page(response.content, census_url, month)
         
-        census_urls = [
-            f"{self.wiki_base_url}/wiki/Stoneworks_MC_Wiki:Rathnir_Public_Census_October_2020",
-            f"{self.wiki_base_url}/wiki/Stoneworks_MC_Wiki:Rathnir_Public_Census_November_2020",
-            f"{self.wiki_base_url}/wiki/Stoneworks_MC_Wiki:Rathnir_Public_Census_January_2021"
-        ]
+    def parse_census_page(self, content: bytes, url: str, month: Optional[str] = None) -> List[Dict]:
+        """Parse census page for population data, building only its tables"""
+        return parse_census_tables(content, url, month)
         
-        for census_url in census_urls:
-            response = self.safe_request(census_url)
-            if response:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                census_data = self.parse_census_page(soup, census_url)
-                self.population_data.extend(census_data)
-                
-    def parse_census_page(self, soup: BeautifulSoup, url: str) -> List[Dict]:
-        """Parse census page for population data"""
-        data = []
-        
-        # Look for tables with population data
-        for table in soup.find_all('table'):
-            rows = table.find_all('tr')
-            for row in rows[1:]:  # Skip header
-                cells = row.find_all(['td', 'th'])
-                if len(cells) >= 2:
-                    try:
-                        nation_name = cells[0].get_text().strip()
-                        population = cells[1].get_text().strip()
-                        
-                        # Try to extract number from population
-                        pop_match = re.search(r'(\d+)', population)
-                        if pop_match:
-                            data.append({
-                                'nation': nation_name,
-                                'population': int(pop_match.group(1)),
-                                'source': url,
-                                'type': 'census'
-                            })
-                    except:
-                        continue
-                        
-        return data
+    def save_census_data(self):
+        """Write the per-nation, per-month census populations"""
+        path = self.output_path('census_population.csv')
+        write_census_csv(path, self.population_data)
+        self.log(f"Saved {len(self.population_data)} census rows to {path}")
         
     def save_data_to_files(self):
-        """Save all scraped data to files"""
+        """
+        Save all scraped data to files. Per-territory rows and totals come
+        from one pass over the territories; independent files are then
+        written concurrently, each atomically, with optional .gz copies.
+        """
         self.log("Saving data to files...")
+        start = time.perf_counter()
+        outputs = territory_outputs(self.territories_data, self.player_registry)
+        writer = OutputWriter(self.output_workers, self.gzip_outputs)
 
+        # Save census populations
+        if self.population_data:
+            writer.add('census_population.csv', self.save_census_data, [self.output_path('census_population.csv')])
+            
         # Save coordinates
         if self.coordinates_data:
-            with open('coordinates.csv', 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['X', 'Y', 'Z'])
-                for x, y, z in self.coordinates_data:
-                    writer.writerow([x, y, z])
-            self.log(f"Saved {len(self.coordinates_data)} coordinates to coordinates.csv")
+            writer.add('coordinates.csv', self.save_coordinates, [self.output_path('coordinates.csv')])
 
         # Save nations comprehensive data
         if self.nations_data:
-            with open('nations_comprehensive.json', 'w', encoding='utf-8') as f:
-                json.dump(self.nations_data, f, indent=2, ensure_ascii=False)
-            self.log(f"Saved {len(self.nations_data)} nations to nations_comprehensive.json")
-
-        # Save territories data  
-        if self.territories_data:
-            with open('territories_data.json', 'w', encoding='utf-8') as f:
-                json.dump(self.territories_data, f, indent=2, ensure_ascii=False)
-            self.log(f"Saved {len(self.territories_data)} territories to territories_data.json")
-
-        # Save balances data
-        if self.territories_data:
-            with open('balances.csv', 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Territory', 'Nation', 'Balance', 'Level', 'Chunks'])
-                for territory in self.territories_data:
-                    writer.writerow([
-                        territory['name'],
-                        territory.get('nation_name', ''),
-                        territory.get('balance', 0.0),
-                        territory.get('level', ''),
-                        territory.get('chunks', 0)
-                    ])
-            self.log(f"Saved balance data for {len(self.territories_data)} territories to balances.csv")
+            writer.add('nations_comprehensive.json', self.save_nations,
+                       [self.output_path('nations_comprehensive.json'), self.output_path('nations_merged.json')])
 
-        # Save population data
         if self.territories_data:
-            with open('population_detailed.csv', 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Territory', 'Nation', 'Player_Count', 'Players'])
-                for territory in self.territories_data:
-                    players_str = '; '.join(territory.get('players', []))
-                    writer.writerow([
-                        territory['name'],
-                        territory.get('nation_name', ''),
-                        territory.get('player_count', 0),
-                        players_str
-                    ])
-            self.log(f"Saved detailed population data to population_detailed.csv")
+            # Save territories data
+            writer.add('territories_data.json', self.save_territories, [self.output_path('territories_data.json')])
+            # Save the player -> lands/nations reverse index
+            writer.add('player_index.bin', self.save_player_index)
+            # Save balances, population and chunk data
+            for name, header, rows, message in (
+                ('balances.csv', ['Territory', 'Nation', 'Balance', 'Level', 'Chunks'], outputs['balances'],
+                 f"Saved balance data for {len(self.territories_data)} territories to balances.csv"),
+                ('population_detailed.csv', ['Territory', 'Nation', 'Player_Count', 'Players'], outputs['population'],
+                 "Saved detailed population data to population_detailed.csv"),
+                ('chunks_data.csv', ['Territory', 'Nation', 'Chunks', 'Territory_Area', 'Claimed_Area', 'Perimeter',
+                                     'Coordinates_Count'], outputs['chunks'],
+                 f"Saved chunk data for {len(self.territories_data)} territories to chunks_data.csv"),
+            ):
+                path = self.output_path(name)
+                writer.add(name, partial(self.save_csv, path, header, rows, message), [path])
 
-        # Save chunk data
-        if self.territories_data:
-            with open('chunks_data.csv', 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Territory', 'Nation', 'Chunks', 'Territory_Area', 'Coordinates_Count'])
-                for territory in self.territories_data:
-                    writer.writerow([
-                        territory['name'],
-                        territory.get('nation_name', ''),
-                        territory.get('chunks', 0),
-                        territory.get('territory_area', 0),
-                        territory.get('coordinate_count', 0)
-                    ])
-            self.log(f"Saved chunk data for {len(self.territories_data)} territories to chunks_data.csv")
-
-        # Calculate totals and validate consistency
-        total_balance = sum(t.get('balance', 0) for t in self.territories_data)
-        total_chunks = sum(t.get('chunks', 0) for t in self.territories_data)
-        total_players = sum(t.get('player_count', 0) for t in self.territories_data)
-        unique_players = set()
-        for t in self.territories_data:
-            unique_players.update(t.get('players', []))
+        # Save the territory and nation border graph
+        if self.border_graph:
+            writer.add('borders.csv', self.save_borders,
+                       [self.output_path('borders.csv'), self.output_path('border_nodes.csv')])
 
-        # Validation checks
-        coordinate_count_check = sum(t.get('coordinate_count', 0) for t in self.territories_data)
+        write_seconds = writer.run()
 
         summary = {
             'scraping_completed': time.strftime('%Y-%m-%d %H:%M:%S'),
@@ -361,23 +350,36 @@ class StoneworksDataScraper:
             'total_coordinates': len(self.coordinates_data),
             'total_nations': len(self.nations_data),
             'total_territories': len(self.territories_data),
-            'total_balance_server': total_balance,
-            'total_chunks_server': total_chunks,
-            'total_players_server': total_players,
-            'unique_players_server': len(unique_players),
-            'coordinate_validation': coordinate_count_check == len(self.coordinates_data),
+            'total_balance_server': outputs['total_balance'],
+            'total_chunks_server': outputs['total_chunks'],
+            'total_players_server': outputs['total_players'],
+            'unique_players_server': outputs['unique_players'],
+            # Validation checks
+            'coordinate_validation': outputs['coordinate_count'] == len(self.coordinates_data),
             'files_created': [
                 'coordinates.csv',
+                'coordinates.bin',
                 'nations_comprehensive.json', 
+                'nations_merged.json',
+                f'{self.leaderboard_dir}/',
                 'territories_data.json',
+                'player_index.bin',
                 'balances.csv',
                 'population_detailed.csv',
                 'chunks_data.csv',
                 'scraping_summary.json'
-            ]
+            ],
+            # Time to write every file above but this one, each file's (or
+            # group of files') own time, and peak memory once they're written
+            'write_seconds': round(time.perf_counter() - start, 3),
+            'file_write_seconds': {name: round(seconds, 3) for name, seconds in write_seconds.items()},
+            'peak_memory_bytes': peak_memory_bytes(),
         }
+        if self.border_graph:
+            summary['files_created'][-1:-1] = ['borders.csv', 'border_nodes.csv']
+        summary['files_created'][-1:-1] = [os.path.basename(path) for path in writer.compressed]
 
-        with open('scraping_summary.json', 'w', encoding='utf-8') as f:
+        with atomic_open(self.output_path('scraping_summary.json'), 'w', encoding='utf-8') as f:
             json.dump(summary, f, indent=2, ensure_ascii=False)
 
         self.log("=== DATA SAVING COMPLETED ===")
@@ -385,209 +387,1066 @@ class StoneworksDataScraper:
         self.log(f"  • {len(self.coordinates_data):,} coordinate points")
         self.log(f"  • {len(self.nations_data)} nations")
         self.log(f"  • {len(self.territories_data)} territories/cities")
-        self.log(f"  • ${total_balance:,.2f} total server economy")
-        self.log(f"  • {total_chunks:,} total claimed chunks")
-        self.log(f"  • {total_players:,} total players")
+        self.log(f"  • ${outputs['total_balance']:,.2f} total server economy")
+        self.log(f"  • {outputs['total_chunks']:,} total claimed chunks")
+        self.log(f"  • {outputs['total_players']:,} total players")
+        slowest = max(write_seconds, key=write_seconds.get, default=None)
+        self.log(f"  • files written in {summary['write_seconds']:.2f}s"
+                 + (f" (slowest {slowest}, {write_seconds[slowest]:.2f}s)" if slowest else ''))
 
+    def save_coordinates(self):
+        """Write the shape vertices as coordinates.csv and coordinates.bin"""
+        self.coordinates_data.write_csv(self.output_path('coordinates.csv'))
+        self.coordinates_data.write_binary(self.output_path('coordinates.bin'))
+        self.log(f"Saved {len(self.coordinates_data)} coordinates to coordinates.csv and coordinates.bin")
+        
+    def save_territories(self):
+        """Write every territory record to territories_data.json"""
+        with atomic_open(self.output_path('territories_data.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.territories_data, f, ensure_ascii=False, default=json_default, **self.json_format)
+        self.log(f"Saved {len(self.territories_data)} territories to territories_data.json")
+        
+    def save_player_index(self):
+        """Write the player -> lands/nations reverse index"""
+        players = write_player_index(self.output_path('player_index.bin'), self.territories_data, self.nations_data)
+        self.log(f"Saved {players} players to player_index.bin")
+        
+    def save_borders(self):
+        """Write the border graph edge and node lists"""
+        write_border_csvs(self.output_path('borders.csv'), self.output_path('border_nodes.csv'), self.border_graph)
+        self.log(f"Saved {len(self.border_graph['territory_edges'])} territory and "
+                 f"{len(self.border_graph['nation_edges'])} nation borders to borders.csv and border_nodes.csv")
+        
+    def save_csv(self, path: str, header: List[str], rows: List[List], message: str):
+        """Write a header and rows as CSV, then log message"""
+        with atomic_open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        self.log(message)
         
+    def save_nations(self):
+        """Write the raw nations, then the merged nations and leaderboards built from them"""
+        with atomic_open(self.output_path('nations_comprehensive.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.nations_data, f, ensure_ascii=False, default=json_default, **self.json_format)
+        self.log(f"Saved {len(self.nations_data)} nations to nations_comprehensive.json")
+        self.save_nation_views()
+        
+    def save_nation_views(self):
+        """Write the merged nations and the raw and merged leaderboard files"""
+        with atomic_open(self.output_path('nations_merged.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.merged_nations_data, f, ensure_ascii=False, default=json_default, **self.json_format)
+        self.log(f"Saved {len(self.merged_nations_data)} nations with merge groups applied to nations_merged.json")
+        
+        for view, nations in (('raw', self.nations_data), ('merged', self.merged_nations_data)):
+            directory = os.path.join(self.leaderboard_dir, view)
+            leaderboard_files = write_leaderboards(nations, directory, self.leaderboard_page_size,
+                                                   self.gzip_outputs)
+            self.log(f"Saved {len(leaderboard_files)} ranked leaderboard files to {directory}/")
+            
+    def apply_merge_groups(self):
+        """Build the merged nations view from the raw nations"""
+        self.merged_nations_data = merge_nations(self.nations_data, self.merge_groups, self.player_registry)
+        groups = [nation for nation in self.merged_nations_data if 'members' in nation]
+        if groups:
+            members = sum(len(group['members']) for group in groups)
+            self.log(f"Merged {members} nations into {len(groups)} groups")
+            
     def scrape_bluemap_markers(self):
         """
         Scrape comprehensive data from BlueMap markers API, 
         handling duplicate territories by aggregating their data.
         """
         self.log("Starting BlueMap markers scraping...")
+        self.markers_unchanged = False
+        self.markers_failed = False
+        self.fetch_state = self.load_fetch_state()
+        self.pending_fetch_state = None
         
-        response = self.safe_request(self.markers_url)
-        if not response:
-            self.log("Failed to fetch markers data")
-            return
+        try:
+            if self.stream_markers:
+                markers = self.stream_lands_markers()
+            else:
+                markers = self.load_lands_markers()
+            if self.markers_unchanged:
+                return
+            if markers is None:
+                self.markers_failed = True
+                self.log("Failed to fetch markers data")
+                return
             
+            self.reset_markers_data()
+            with self.metrics.stage('aggregate'):
+                self.aggregate_markers(self.metrics.timed('fetch', markers))
+            with self.metrics.stage('geometry'):
+                self.apply_territory_geometry()
+                if self.borders:
+                    self.apply_border_graph()
+            with self.metrics.stage('merge'):
+                self.apply_merge_groups()
+                
+        except Exception as e:
+            self.log(f"Error parsing markers data: {e}")
+            raise
+            
+    def reset_markers_data(self):
+        """Drop the previous scrape's territories, nations and shapes before aggregating a new payload"""
+        self.nations_data = []
+        self.merged_nations_data = []
+        self.territories_data = []
+        self.coordinates_data = CoordinateStore()
+        self.spatial_index = None
+        self.border_graph = None
+        self.delta = None
+        
+    def load_fetch_state(self) -> Dict:
+        """Load the fetch state of the last saved markers payload"""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
         try:
-            markers_data = response.json()
-            lands_data = markers_data.get("me.angeschossen.lands", {})
-            markers = lands_data.get("markers", {})
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            self.log(f"Ignoring unreadable state file {self.state_file}: {e}")
+            return {}
+        if not isinstance(state, dict):
+            self.log(f"Ignoring state file {self.state_file}: not a JSON object")
+            return {}
+        # State recorded for another map or file says nothing about this one
+        if state.get('source') != self.markers_source():
+            return {}
+        return state
+        
+    def save_fetch_state(self):
+        """Record the fetch state of the payload whose outputs were just written"""
+        if not self.state_file or not self.pending_fetch_state:
+            return
+        self.fetch_state = self.pending_fetch_state
+        self.pending_fetch_state = None
+        with atomic_open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump(self.fetch_state, f, indent=2)
             
-            self.log(f"Found {len(markers)} potential territories/cities")
+    def markers_source(self) -> str:
+        """Identify where markers are read from"""
+        return os.path.abspath(self.markers_file) if self.markers_file else self.markers_url
+        
+    def conditional_headers(self) -> Optional[Dict]:
+        """Build If-None-Match/If-Modified-Since headers from the last fetch"""
+        if self.force:
+            return None
+        headers = {}
+        if self.fetch_state.get('etag'):
+            headers['If-None-Match'] = self.fetch_state['etag']
+        if self.fetch_state.get('last_modified'):
+            headers['If-Modified-Since'] = self.fetch_state['last_modified']
+        return headers or None
+        
+    def is_known_payload(self, content_hash: str) -> bool:
+        """Check a payload hash against the last saved one"""
+        return not self.force and content_hash == self.fetch_state.get('content_hash')
+        
+    def fetch_markers_response(self, stream: bool = False) -> Optional[requests.Response]:
+        """Fetch markers_url conditionally, flagging a 304 as unchanged"""
+        # Ask caches in front of the map for a fresh copy (304 still applies)
+        headers = {'Cache-Control': 'no-cache', **(self.conditional_headers() or {})}
+        response = self.safe_request(self.markers_url, stream=stream, headers=headers)
+        if response is None:
+            return None
+        if response.status_code == 304:
+            self.markers_unchanged = True
+            self.log("Markers payload unchanged (HTTP 304 Not Modified)")
+            return None
+        
+        self.pending_fetch_state = {
+            'source': self.markers_source(),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_hash': None,
+        }
+        return response
+        
+    def load_lands_markers(self) -> Optional[Iterable[Tuple[str, Dict]]]:
+        """Load the whole markers payload and return its Lands markers"""
+        with self.metrics.stage('fetch'):
+            if self.markers_file:
+                with open(self.markers_file, 'rb') as f:
+                    payload = f.read()
+                self.pending_fetch_state = {'source': self.markers_source(), 'content_hash': None}
+            else:
+                response = self.fetch_markers_response()
+                if response is None:
+                    return None
+                payload = response.content
+            self.metrics.count('payload_bytes', len(payload))
+            content_hash = hashlib.sha256(payload).hexdigest()
             
-            # Use dictionaries to store unique territories and nations
-            unique_territories: Dict[str, Dict] = {}
-            nations_dict: Dict[str, Dict] = {}
+        self.pending_fetch_state['content_hash'] = content_hash
+        if self.is_known_payload(content_hash):
+            self.markers_unchanged = True
+            self.log("Markers payload unchanged (content hash matches)")
+            return None
             
-            for marker_info in markers.values():
-                territory_data = self.parse_territory_marker(marker_info)
-                if not territory_data or not territory_data.get('name'):
-                    continue
+        with self.metrics.stage('decode'):
+            markers = json.loads(payload).get(LANDS_MARKER_SET, {}).get("markers", {})
+        self.log(f"Found {len(markers)} potential territories/cities")
+        return markers.items()
+        
+    def stream_lands_markers(self) -> Optional[Iterator[Tuple[str, Dict]]]:
+        """
+        Stream Lands markers one at a time instead of loading the whole
+        payload. The raw bytes are hashed before anything is parsed, like
+        load_lands_markers does: a download is spooled to a temporary file
+        on the way (memory stays flat) and parsed from there, a local file
+        is simply read twice.
+        """
+        spool = None
+        with self.metrics.stage('fetch'):
+            if self.markers_file:
+                self.pending_fetch_state = {'source': self.markers_source(), 'content_hash': None}
+                content_hash = self.hash_payload(iter_file_chunks(self.markers_file))
+            else:
+                response = self.fetch_markers_response(stream=True)
+                if response is None:
+                    return None
+                spool = tempfile.TemporaryFile()
+                try:
+                    content_hash = self.hash_payload(response.iter_content(chunk_size=65536), spool.write)
+                except BaseException:
+                    spool.close()
+                    raise
+                    
+        self.pending_fetch_state['content_hash'] = content_hash
+        if self.is_known_payload(content_hash):
+            if spool:
+                spool.close()
+            self.markers_unchanged = True
+            self.log("Markers payload unchanged (content hash matches)")
+            return None
+            
+        self.log("Streaming markers payload...")
+        return iter_marker_set(iter_file_chunks(self.markers_file) if spool is None else iter_spooled_chunks(spool))
+        
+    def hash_payload(self, chunks: Iterable[bytes], sink: Optional[Callable[[bytes], object]] = None) -> str:
+        """Hash a payload read as byte chunks, counting its bytes and handing each chunk to sink"""
+        digest = hashlib.sha256()
+        for chunk in chunks:
+            digest.update(chunk)
+            self.metrics.count('payload_bytes', len(chunk))
+            if sink:
+                sink(chunk)
+        return digest.hexdigest()
+        
+    def aggregate_markers(self, markers: Iterable[Tuple[str, Dict]]):
+        """Parse Lands markers and aggregate them into territories and nations"""
+        if self.incremental:
+            self.aggregate_markers_incremental(markers)
+            return
+            
+        # Use dictionaries to store unique territories and nations
+        unique_territories: Dict[str, Dict] = {}
+        nations_dict: Dict[str, Dict] = {}
+        # Players are registry ids; territories split over several markers
+        # and nations collect theirs in unions, packed into lists at the end
+        registry = self.player_registry
+        territory_players: Dict[str, PlayerUnion] = {}
+        nation_players: Dict[str, PlayerUnion] = {}
+        
+        marker_count = 0
+        for _marker_id, marker_info, territory_data in self.iter_parsed_markers(markers):
+            marker_count += 1
+            if not territory_data or not territory_data.get('name'):
+                continue
+            
+            territory_name = territory_data['name']
+            player_ids = registry.id_array(territory_data.get('players', []))
+            
+            # Deduplicate and aggregate territory data
+            if territory_name not in unique_territories:
+                territory_data['players'] = PlayerList(registry, player_ids)
+                unique_territories[territory_name] = territory_data
+            else:
+                # If the territory already exists, aggregate new data
+                existing_territory = unique_territories[territory_name]
+                existing_territory['chunks'] += territory_data.get('chunks', 0)
+                existing_territory['balance'] += territory_data.get('balance', 0)
+                # Players are merged in first-seen order so output is reproducible
+                players = territory_players.get(territory_name)
+                if players is None:
+                    players = territory_players[territory_name] = PlayerUnion(registry, existing_territory['players'].ids)
+                players.add(player_ids)
+
+            # Group by nation and aggregate data
+            nation_name = territory_data.get('nation_name')
+            if nation_name:
+                if nation_name not in nations_dict:
+                    nations_dict[nation_name] = {
+                        'name': nation_name,
+                        'level': territory_data.get('nation_level'),
+                        'capital': territory_data.get('nation_capital'),
+                        'territories': {}, # Ordered set of unique names
+                        'total_chunks': 0,
+                        'total_balance': 0.0,
+                        'total_players': 0,
+                        'all_players': []
+                    }
+                    nation_players[nation_name] = PlayerUnion(registry)
                 
-                territory_name = territory_data['name']
+                nation = nations_dict[nation_name]
                 
-                # Deduplicate and aggregate territory data
-                if territory_name not in unique_territories:
-                    unique_territories[territory_name] = territory_data
-                else:
-                    # If the territory already exists, aggregate new data
-                    existing_territory = unique_territories[territory_name]
-                    existing_territory['chunks'] += territory_data.get('chunks', 0)
-                    existing_territory['balance'] += territory_data.get('balance', 0)
-                    existing_players = set(existing_territory.get('players', []))
-                    new_players = set(territory_data.get('players', []))
-                    combined_players = list(existing_players.union(new_players))
-                    existing_territory['players'] = combined_players
-                    existing_territory['player_count'] = len(combined_players)
+                # Only aggregate if this territory is new to the nation's set
+                if territory_name not in nation['territories']:
+                    nation['territories'][territory_name] = None
+                    nation['total_chunks'] += territory_data.get('chunks', 0)
+                    nation['total_balance'] += territory_data.get('balance', 0.0)
+                    nation_players[nation_name].add(player_ids)
 
-                # Group by nation and aggregate data
-                nation_name = territory_data.get('nation_name')
-                if nation_name:
-                    if nation_name not in nations_dict:
-                        nations_dict[nation_name] = {
-                            'name': nation_name,
-                            'level': territory_data.get('nation_level'),
-                            'capital': territory_data.get('nation_capital'),
-                            'territories': set(), # Use a set for unique names
-                            'total_chunks': 0,
-                            'total_balance': 0.0,
-                            'total_players': 0,
-                            'all_players': set()
-                        }
-                    
-                    nation = nations_dict[nation_name]
-                    
-                    # Only aggregate if this territory is new to the nation's set
-                    if territory_name not in nation['territories']:
-                        nation['territories'].add(territory_name)
-                        nation['total_chunks'] += territory_data.get('chunks', 0)
-                        nation['total_balance'] += territory_data.get('balance', 0.0)
-                        nation['all_players'].update(territory_data.get('players', []))
-
-                # Extract coordinates from shape and add to the main list
-                if 'shape' in marker_info:
-                    for coord in marker_info['shape']:
-                        self.coordinates_data.append((coord['x'], coord.get('y', 62), coord['z']))
+            # Extract coordinates from shape and add to the coordinate store
+            if 'shape' in marker_info:
+                self.coordinates_data.add_shape(territory_name, nation_name, marker_info['shape'])
 
-            # Finalize data from dictionaries to lists
-            self.territories_data = list(unique_territories.values())
+        # Finalize data from dictionaries to lists
+        for territory_name, players in territory_players.items():
+            territory = unique_territories[territory_name]
+            territory['players'] = players.to_list()
+            territory['player_count'] = len(territory['players'])
+        self.territories_data = list(unique_territories.values())
+        
+        # Convert nations dict to list
+        for nation_name, nation_data in nations_dict.items():
+            nation_data['territories'] = list(nation_data['territories'])
+            nation_data['all_players'] = nation_players[nation_name].to_list()
+            nation_data['unique_players'] = len(nation_data['all_players'])
+            self.nations_data.append(nation_data)
+        
+        self.metrics.count('markers', marker_count)
+        self.log(f"Processed {marker_count} markers")
+        self.log(f"Processed {len(self.territories_data)} unique territories")
+        self.log(f"Processed {len(self.nations_data)} nations")
+        self.log(f"Extracted {len(self.coordinates_data)} coordinate points")
             
-            # Convert nations dict to list and clean up player sets
-            for nation_name, nation_data in nations_dict.items():
-                nation_data['territories'] = list(nation_data['territories'])
-                nation_data['unique_players'] = len(nation_data['all_players'])
-                nation_data['all_players'] = list(nation_data['all_players'])
-                self.nations_data.append(nation_data)
+    def aggregate_markers_incremental(self, markers: Iterable[Tuple[str, Dict]]):
+        """
+        Aggregate markers, re-parsing and re-aggregating only what changed
+        since the last run. Each marker is folded in as it is read, keeping
+        only its cache entry and, for a territory's first marker, its record,
+        so a streamed payload is never held in memory.
+        """
+        if self.aggregator is None:
+            self.aggregator = IncrementalAggregator.load(self.cache_file, self.player_registry)
+            
+        # Reuse parsed fields of markers whose label, detail and shape are unchanged
+        snapshot: Dict[str, Dict] = {}
+        to_parse: Set[str] = set()
+        
+        def fingerprinted() -> Iterator[Tuple[str, Dict]]:
+            for marker_id, marker_info in markers:
+                fingerprint = marker_fingerprint(marker_info)
+                entry = self.aggregator.lookup(marker_id, fingerprint)
+                if entry is None:
+                    entry = {'fingerprint': fingerprint, 'name': marker_info.get('label', 'Unknown'), 'fields': None}
+                    to_parse.add(marker_id)
+                snapshot[marker_id] = entry
+                yield marker_id, marker_info
+                
+        # First marker of each territory -> its record, the base its aggregate is applied to
+        first_records: Dict[str, TerritoryRecord] = {}
+        names: Set[str] = set()
+        parsed = self.iter_parsed_markers(fingerprinted(), lambda marker_id, _marker_info: marker_id not in to_parse)
+        for marker_id, marker_info, territory_data in parsed:
+            entry = snapshot[marker_id]
+            if territory_data:
+                entry['fields'] = {key: territory_data[key] for key in DETAIL_FIELDS}
+            if not self.aggregator.is_valid(entry):
+                continue
+            if entry['name'] not in names:
+                names.add(entry['name'])
+                first_records[marker_id] = territory_data or self.build_territory_record(marker_info, entry['fields'])
+            if 'shape' in marker_info:
+                self.coordinates_data.add_shape(entry['name'], entry['fields']['nation_name'], marker_info['shape'])
+                
+        self.delta = self.aggregator.apply(snapshot)
+        
+        for first_id, _fields, aggregate in self.aggregator.iter_territories():
+            territory_data = first_records[first_id]
+            territory_data.update(aggregate)
+            self.territories_data.append(territory_data)
             
-            self.log(f"Processed {len(self.territories_data)} unique territories")
-            self.log(f"Processed {len(self.nations_data)} nations")
-            self.log(f"Extracted {len(self.coordinates_data)} coordinate points")
+        self.nations_data.extend(self.aggregator.nation_list())
+        
+        self.metrics.count('markers', len(snapshot))
+        self.log(f"Processed {len(snapshot)} markers, re-parsed {len(to_parse)}")
+        self.log(f"Processed {len(self.territories_data)} unique territories")
+        self.log(f"Processed {len(self.nations_data)} nations")
+        self.log(f"Extracted {len(self.coordinates_data)} coordinate points")
+        
+    def save_delta_file(self):
+        """Write the changes since the previous run and remember this run's markers"""
+        if not self.incremental or self.delta is None:
+            return
             
-        except Exception as e:
-            self.log(f"Error parsing markers data: {e}")
-            raise
+        delta = {'generated': time.strftime('%Y-%m-%d %H:%M:%S'), **self.delta}
+        with atomic_open(self.delta_file, 'w', encoding='utf-8') as f:
+            json.dump(delta, f, indent=2, ensure_ascii=False)
+        self.aggregator.save(self.cache_file)
+        
+        changes = sum(len(delta[kind][change]) for kind in ('territories', 'nations')
+                      for change in ('added', 'changed', 'removed'))
+        self.log(f"Saved {changes} territory/nation changes to {self.delta_file}")
+        
+    def record_history(self):
+        """Append this run's nation and territory stats to the history database"""
+        if not self.history_file:
+            return
             
+        content_hash = (self.pending_fetch_state or {}).get('content_hash')
+        with HistoryStore(self.history_file) as history:
+            snapshot_id = history.record_snapshot(self.nations_data, self.territories_data,
+                                                  source=self.markers_source(), content_hash=content_hash)
+        self.log(f"Recorded snapshot {snapshot_id} in {self.history_file}")
+        
     def parse_territory_marker(self, marker_info: Dict) -> Optional[Dict]:
         """Parse a single territory marker for all data"""
         try:
-            # Extract basic info
-            territory_name = marker_info.get('label', 'Unknown')
-            position = marker_info.get('position', {})
-            shape = marker_info.get('shape', [])
-            detail = marker_info.get('detail', '')
-            
             # Parse HTML detail for structured data
-            soup = BeautifulSoup(detail, 'html.parser')
-            detail_text = soup.get_text()
-            
-            # Extract key data using regex
-            level_match = re.search(r'Level:\s*(\w+)', detail_text)
-            balance_match = re.search(r'Balance:\s*\$([0-9,]+\.\d{2})', detail_text)
-            chunks_match = re.search(r'Chunks:\s*(\d+)', detail_text)
-            players_match = re.search(r'Players \((\d+)\):\s*([^<]+)', detail_text)
-            nation_match = re.search(r'This land belongs to nation ([^:]+):', detail_text)
-            
-            # Parse nation information from the sub-section of the HTML
-            nation_level_match = None
-            nation_capital_match = None
-            if nation_match:
-                nation_detail_text = detail_text.split(nation_match.group(0))[-1]
-                nation_level_match = re.search(r'Level:\s*(\w+)', nation_detail_text)
-                nation_capital_match = re.search(r'Capital:\s*([^<\n]+)', nation_detail_text)
-            
-            # Parse balance
-            balance = 0.0
-            if balance_match:
-                balance_str = balance_match.group(1).replace(',', '')
-                balance = float(balance_str)
-            
-            # Parse player list
-            players = []
-            player_count = 0
-            if players_match:
-                player_count = int(players_match.group(1))
-                players_str = players_match.group(2)
-                # Split players by comma and clean up, stop at first "This land belongs"
-                players_str_cleaned = players_str.split("This land belongs")[0]
-                players = [p.strip() for p in players_str_cleaned.split(',') if p.strip()]
-            
-            # Calculate territory area from chunks (standardized)
-            chunks = int(chunks_match.group(1)) if chunks_match else 0
-            territory_area = chunks * 256  # 1 chunk = 16x16 = 256 blocks
-            
-            territory_data = {
-                'name': territory_name,
-                'position': position,
-                'level': level_match.group(1) if level_match else None,
-                'balance': balance,
-                'chunks': chunks,
-                'player_count': player_count,
-                'players': players,
-                'nation_name': nation_match.group(1).strip() if nation_match else None,
-                'nation_level': nation_level_match.group(1) if nation_level_match else None,
-                'nation_capital': nation_capital_match.group(1).strip() if nation_capital_match else None,
-                'territory_area': territory_area,
-                'shape_coordinates': shape,
-                'coordinate_count': len(shape),
-                'detail_html': detail
-            }
-            
-            return territory_data
+            fields = parse_detail(marker_info.get('detail', ''), use_soup=self.use_soup_parser)
+            return self.build_territory_record(marker_info, fields)
             
         except Exception as e:
+            self.metrics.count('parse_failures')
             self.log(f"Error parsing territory marker: {e}")
             return None
             
+    def build_territory_record(self, marker_info: Dict, fields: Dict) -> TerritoryRecord:
+        """Combine a marker with its parsed detail fields into a territory record"""
+        # Extract basic info
+        territory_name = marker_info.get('label', 'Unknown')
+        position = marker_info.get('position', {})
+        shape = marker_info.get('shape', [])
+        detail = marker_info.get('detail', '')
+        
+        # Calculate territory area from chunks (standardized)
+        territory_area = fields['chunks'] * 256  # 1 chunk = 16x16 = 256 blocks
+        
+        record = TerritoryRecord(
+            name=territory_name,
+            position=position,
+            **fields,
+            territory_area=territory_area,
+            **EMPTY_GEOMETRY,  # Measured from the shapes by apply_territory_geometry
+            shape_coordinates=shape,
+            coordinate_count=len(shape),
+            detail_html=detail,
+        )
+        if self.lean:
+            for key in LEAN_OMITTED:
+                del record[key]
+        return record
+        
+    def iter_parsed_markers(self, markers: Iterable[Tuple[str, Dict]],
+                            reuse: Optional[Callable[[str, Dict], bool]] = None
+                            ) -> Iterator[Tuple[str, Dict, Optional[Dict]]]:
+        """
+        Yield (marker_id, marker_info, territory_data) in payload order.
+        With more than one worker, details are parsed in batches on a
+        process pool; results are still consumed in submission order so
+        aggregation matches a serial run exactly. Markers reuse(marker_id,
+        marker_info) accepts are passed through unparsed, with no
+        territory_data.
+        """
+        if self.workers <= 1:
+            for marker_id, marker_info in markers:
+                if reuse is not None and reuse(marker_id, marker_info):
+                    yield marker_id, marker_info, None
+                    continue
+                with self.metrics.stage('parse'):
+                    territory_data = self.parse_territory_marker(marker_info)
+                yield marker_id, marker_info, territory_data
+            return
+            
+        # A shared pool is left running for the other scrapers using it
+        with nullcontext(self.executor) if self.executor else ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for batch in self._iter_marker_batches(markers):
+                parse = [reuse is None or not reuse(marker_id, marker_info) for marker_id, marker_info in batch]
+                details = [marker_info.get('detail', '') for (_, marker_info), wanted in zip(batch, parse) if wanted]
+                pending.append((batch, parse, executor.submit(parse_detail_batch, details, self.use_soup_parser)))
+                
+                # Bound the batches in flight so streamed input stays streamed
+                if len(pending) >= self.workers * 2:
+                    yield from self._finish_marker_batch(*pending.popleft())
+                    
+            while pending:
+                yield from self._finish_marker_batch(*pending.popleft())
+                
+    def _iter_marker_batches(self, markers: Iterable[Tuple[str, Dict]]) -> Iterator[List[Tuple[str, Dict]]]:
+        """Split markers into lists of parse_batch_size"""
+        markers = iter(markers)
+        while True:
+            batch = list(islice(markers, self.parse_batch_size))
+            if not batch:
+                return
+            yield batch
+            
+    def _finish_marker_batch(self, batch: List[Tuple[str, Dict]], parse: List[bool],
+                             future: Future) -> Iterator[Tuple[str, Dict, Optional[Dict]]]:
+        """Build territory records for a batch once its worker results are in"""
+        # Waiting on the workers counts as parsing
+        with self.metrics.stage('parse'):
+            results = iter(future.result())
+        for (marker_id, marker_info), wanted in zip(batch, parse):
+            territory_data = None
+            if not wanted:
+                yield marker_id, marker_info, territory_data
+                continue
+            fields, error = next(results)
+            if error is None:
+                try:
+                    territory_data = self.build_territory_record(marker_info, fields)
+                except Exception as e:
+                    error = str(e)
+            if error is not None:
+                self.metrics.count('parse_failures')
+                self.log(f"Error parsing territory marker: {error}")
+            yield marker_id, marker_info, territory_data
+            
+    def load_spatial_index(self, path: str = 'coordinates.bin'):
+        """Index the shapes of a saved coordinates.bin instead of scraping"""
+        self.spatial_index = SpatialIndex(MappedCoordinates(path))
+        
+    def territory_at(self, x: float, z: float) -> Optional[Dict]:
+        """Find the territory and nation owning block (x, z)"""
+        return self.territories_at([(x, z)])[0]
+        
+    def territories_at(self, points: Iterable[Tuple[float, float]]) -> List[Optional[Dict]]:
+        """Find the owner of every (x, z) block, indexing the scraped shapes on first use"""
+        if self.spatial_index is None:
+            self.spatial_index = SpatialIndex(self.coordinates_data)
+        return self.spatial_index.lookup_many(points)
+        
     def calculate_polygon_area(self, shape: List[Dict]) -> float:
         """Calculate area of a polygon using shoelace formula"""
-        if len(shape) < 3:
-            return 0
-            
-        area = 0
-        n = len(shape)
+        return polygon_area(shape)
         
-        for i in range(n):
-            j = (i + 1) % n
-            area += shape[i]['x'] * shape[j]['z']
-            area -= shape[j]['x'] * shape[i]['z']
-            
-        return abs(area) / 2.0
+    def apply_territory_geometry(self):
+        """Measure claimed area, perimeter, bounding box and centroid of every territory from its shapes"""
+        start = time.perf_counter()
+        geometry = territory_geometry(self.coordinates_data)
+        for territory in self.territories_data:
+            territory.update(geometry.get(territory['name'], EMPTY_GEOMETRY))
+        elapsed = (time.perf_counter() - start) * 1000
+        self.log(f"Measured {len(geometry)} territory shapes in {elapsed:.0f} ms ({GEOMETRY_BACKEND})")
+        
+    def apply_border_graph(self):
+        """Rasterize the shapes into the chunk grid and measure territory and nation borders"""
+        start = time.perf_counter()
+        self.border_graph = border_graph(self.coordinates_data)
+        elapsed = (time.perf_counter() - start) * 1000
+        enclaves = sum(1 for node in self.border_graph['territories'] if node['enclave_of'])
+        self.log(f"Rasterized {self.border_graph['chunks']:,} chunks into {len(self.border_graph['territory_edges'])} "
+                 f"territory borders in {elapsed:.0f} ms ({self.border_graph['contested_chunks']:,} contested chunks, "
+                 f"{enclaves} enclaves)")
 
-    def run_full_scrape(self):
-        """Run the complete scraping process"""
+    def run_full_scrape(self) -> str:
+        """Run the complete scraping process; returns 'ok', 'unchanged' or 'failed'"""
         self.log("Starting comprehensive Stoneworks data scraping...")
+        self.metrics = RunMetrics()
+        profiler = cProfile.Profile() if self.profile_file else None
+        if profiler:
+            profiler.enable()
         
         try:
             # 1. Scrape BlueMap markers for live territory data
             self.scrape_bluemap_markers()
             
+            if self.markers_unchanged:
+                self.metrics.finish('unchanged')
+                self.log("=== NO CHANGES SINCE LAST RUN, OUTPUT FILES LEFT AS IS ===")
+                return self.metrics.status
+            if self.markers_failed:
+                self.metrics.finish('failed')
+                self.log("=== MARKERS COULD NOT BE FETCHED, OUTPUT FILES LEFT AS IS ===")
+                return self.metrics.status
+                
             # 2. Save all data
-            self.save_data_to_files()
+            with self.metrics.stage('write'):
+                self.save_data_to_files()
+                self.save_delta_file()
+            with self.metrics.stage('history'):
+                self.record_history()
+            self.save_fetch_state()
             
+            self.metrics.finish('ok')
             self.log("=== SCRAPING COMPLETED SUCCESSFULLY ===")
+            return self.metrics.status
             
         except Exception as e:
+            self.metrics.finish('failed', e)
+            # The in-memory incremental state may be ahead of what was saved;
+            # the next run reloads it from the cache file
+            self.aggregator = None
             self.log(f"Scraping failed with error: {e}")
             raise
+            
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(self.profile_file)
+                self.log(f"Saved profile to {self.profile_file} (python -m pstats {self.profile_file})")
+            self.save_run_report()
+            
+    def watch(self, interval: float = 300.0, jitter: float = 0.1, max_backoff: float = 3600.0,
+              stop: Optional[threading.Event] = None):
+        """
+        Scrape every interval seconds until stop is set, keeping this
+        scraper's HTTP session, fetch state and incremental cache warm.
+        Each wait is randomized by up to +/- jitter of itself, and every
+        consecutive failure doubles it; no wait is longer than max_backoff.
+        """
+        stop = stop or threading.Event()
+        failures = 0
+        while not stop.is_set():
+            try:
+                status = self.run_full_scrape()
+            except Exception:
+                # Already logged; keep watching
+                status = 'failed'
+            failures = failures + 1 if status == 'failed' else 0
+            
+            # Jitter before the clamp, so a wait at max_backoff never exceeds it
+            # (the exponent is capped too, 2 ** failures overflows a float eventually)
+            delay = min(max_backoff, interval * 2 ** min(failures, 32) * (1 + random.uniform(-jitter, jitter)))
+            if failures:
+                self.log(f"{failures} failed scrape(s) in a row, retrying in {delay:.0f}s")
+            elif not stop.is_set():
+                self.log(f"Next scrape in {delay:.0f}s")
+            stop.wait(delay)
+        self.log("Watch stopped")
+        
+    def save_run_report(self):
+        """Write the run's stage timings and counters as JSON and Prometheus text"""
+        report = self.metrics.report(
+            **({'map': self.map_name} if self.map_name else {}),
+            source=self.markers_source(),
+            territories=len(self.territories_data),
+            nations=len(self.nations_data),
+            profile=self.profile_file,
+        )
+        if self.report_file:
+            write_report(self.report_file, report)
+        if self.metrics_file:
+            write_prometheus(self.metrics_file, report)
+        stages = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in report['stages'].items() if seconds >= 0.005)
+        self.log(f"Run took {report['duration_seconds']:.2f}s ({stages}), {report['markers_per_second']:,.0f} markers/s")
+        self.last_report = report
 
+class MultiMapScraper(StoneworksDataScraper):
+    """
+    Scrapes several maps at once. Each map fetches on its own HTTP session
+    (a requests.Session isn't safe to share between threads) and details
+    are parsed on one shared process pool, so a run takes about as long as
+    its slowest map. Each map writes its usual
+    outputs to maps/<name>/; the nations of every map are combined into
+    nations_comprehensive.json, nations_merged.json and the leaderboards.
+    """
+    
+    def __init__(self, sources: List[Dict], workers: int = 0, leaderboard_page_size: int = DEFAULT_PAGE_SIZE,
+                 merge_groups_file: Optional[str] = MERGE_GROUPS_FILE,
+                 report_file: Optional[str] = 'run_report.json', metrics_file: Optional[str] = 'run_metrics.prom',
+                 output_dir: str = '', session: Optional[requests.Session] = None, compact_json: bool = False,
+                 gzip_outputs: bool = False, **scraper_options):
+        super().__init__(workers=workers, state_file=None, leaderboard_page_size=leaderboard_page_size,
+                         merge_groups_file=merge_groups_file, report_file=report_file, metrics_file=metrics_file,
+                         output_dir=output_dir, session=session, compact_json=compact_json,
+                         gzip_outputs=gzip_outputs)
+        self.scrapers: List[StoneworksDataScraper] = []
+        for source in sources:
+            directory = os.path.join(output_dir, 'maps', source['name'])
+            os.makedirs(directory, exist_ok=True)
+            self.scrapers.append(StoneworksDataScraper(
+                markers_url=source['url'], markers_file=source['file'], map_name=source['name'],
+                output_dir=directory, session=new_session(), workers=self.workers,
+                leaderboard_page_size=leaderboard_page_size, merge_groups_file=merge_groups_file,
+                report_file=None, metrics_file=None, compact_json=compact_json, gzip_outputs=gzip_outputs,
+                **scraper_options,
+            ))
+        self.map_statuses: Dict[str, str] = {}
+            
+    def scrape_map(self, scraper: StoneworksDataScraper) -> str:
+        """Run one map's scrape, turning an error (already logged) into 'failed'"""
+        try:
+            return scraper.run_full_scrape()
+        except Exception:
+            return 'failed'
+            
+    def map_nations(self, scraper: StoneworksDataScraper, status: str) -> List[Dict]:
+        """Nations of a map: this run's, or the last saved ones if it was unchanged or failed"""
+        if status == 'ok':
+            return scraper.nations_data
+        saved = load_saved_nations(scraper.output_path('nations_comprehensive.json'))
+        if saved is None:
+            scraper.log("No saved nations to combine")
+        return saved or []
+        
+    def run_full_scrape(self) -> str:
+        """Scrape every map concurrently and write the combined nations; returns 'ok', 'unchanged' or 'failed'"""
+        self.log(f"Scraping {len(self.scrapers)} maps: {', '.join(scraper.map_name for scraper in self.scrapers)}")
+        self.metrics = RunMetrics()
+        
+        try:
+            with self.metrics.stage('maps'):
+                with ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else nullcontext() as executor:
+                    for scraper in self.scrapers:
+                        scraper.executor = executor
+                    with ThreadPoolExecutor(max_workers=len(self.scrapers)) as threads:
+                        statuses = list(threads.map(self.scrape_map, self.scrapers))
+            self.map_statuses = {scraper.map_name: status for scraper, status in zip(self.scrapers, statuses)}
+            for scraper in self.scrapers:
+                for counter in ('markers', 'parse_failures', 'payload_bytes'):
+                    self.metrics.count(counter, scraper.metrics.counters[counter])
+                    
+            if 'ok' not in statuses:
+                status = 'unchanged' if set(statuses) == {'unchanged'} else 'failed'
+                self.metrics.finish(status)
+                self.log(f"=== NO MAP CHANGED ({', '.join(statuses)}), COMBINED FILES LEFT AS IS ===")
+                return self.metrics.status
+                
+            with self.metrics.stage('merge'):
+                self.nations_data = combine_nations([self.map_nations(scraper, status)
+                                                     for scraper, status in zip(self.scrapers, statuses)])
+                self.apply_merge_groups()
+            with self.metrics.stage('write'):
+                writer = OutputWriter(1, self.gzip_outputs)
+                writer.add('nations_comprehensive.json', self.save_nations,
+                           [self.output_path('nations_comprehensive.json'), self.output_path('nations_merged.json')])
+                writer.run()
+                
+            self.metrics.finish('ok')
+            failed = [name for name, status in self.map_statuses.items() if status == 'failed']
+            if failed:
+                self.log(f"Combined with the last saved nations of failed maps: {', '.join(failed)}")
+            self.log(f"=== SCRAPED {len(self.scrapers)} MAPS, {len(self.nations_data)} NATIONS COMBINED ===")
+            return self.metrics.status
+            
+        except Exception as e:
+            self.metrics.finish('failed', e)
+            self.log(f"Combining maps failed with error: {e}")
+            raise
+            
+        finally:
+            self.save_run_report()
+            
+    def save_run_report(self):
+        """Write the combined run's timings with every map's report under 'maps'"""
+        maps_seconds = self.metrics.stages.get('maps', 0.0)
+        markers = self.metrics.counters['markers']
+        report = self.metrics.report(
+            territories=sum(len(scraper.territories_data) for scraper in self.scrapers),
+            nations=len(self.nations_data),
+            # Markers of every map over the wall time they took together
+            markers_per_second=round(markers / maps_seconds, 1) if markers and maps_seconds else 0.0,
+            maps={scraper.map_name: scraper.last_report for scraper in self.scrapers if scraper.last_report},
+        )
+        if self.report_file:
+            write_report(self.report_file, report)
+        if self.metrics_file:
+            write_prometheus(self.metrics_file, report)
+        slowest = max(self.scrapers, key=lambda scraper: (scraper.last_report or {}).get('duration_seconds', 0))
+        self.log(f"Run took {report['duration_seconds']:.2f}s (slowest map {slowest.map_name} "
+                 f"{(slowest.last_report or {}).get('duration_seconds', 0):.2f}s), "
+                 f"{report['markers_per_second']:,.0f} markers/s")
+        self.last_report = report
+        
+def parse_point(text: str) -> Tuple[float, float]:
+    """Parse 'x,z' or 'x y z' block coordinates"""
+    values = [float(value) for value in re.split(r'[,\s]+', text.strip())]
+    if len(values) == 2:
+        return values[0], values[1]
+    if len(values) == 3:
+        return values[0], values[2]
+    raise ValueError(f"expected x,z or x,y,z coordinates, got {text!r}")
+    
+def run_lookup(args: argparse.Namespace):
+    """Print the territory and nation owning each requested block as CSV"""
+    points = [parse_point(point) for point in args.points]
+    if args.input:
+        with (sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')) as f:
+            for line in f:
+                # Skip blank lines and a header row
+                if line.strip() and not line.lstrip()[0].isalpha():
+                    points.append(parse_point(line))
+                    
+    scraper = StoneworksDataScraper()
+    scraper.load_spatial_index(args.coordinates)
+    writer = csv.writer(sys.stdout)
+    writer.writerow(['X', 'Z', 'Territory', 'Nation'])
+    for (x, z), owner in zip(points, scraper.territories_at(points)):
+        owner = owner or {}
+        writer.writerow([f"{x:g}", f"{z:g}", owner.get('territory', ''), owner.get('nation') or ''])
+        
+def run_players(args: argparse.Namespace):
+    """Print the lands and nations of each requested player, or the players matching a prefix, as CSV"""
+    if not os.path.exists(args.index):
+        raise SystemExit(f"No player index at {args.index}; run a scrape first")
+        
+    index = PlayerIndex(args.index)
+    writer = csv.writer(sys.stdout)
+    if args.prefix is not None:
+        writer.writerow(['Player'])
+        writer.writerows([name] for name in index.search(args.prefix, args.limit or None))
+        return
+        
+    writer.writerow(['Player', 'Territory', 'Nation', 'Role'])
+    for name in args.names:
+        found = index.lookup(name)
+        if found is None:
+            writer.writerow([name, '', '', ''])
+            continue
+        roles = {nation['name']: nation['role'] for nation in found['nations']}
+        for territory in found['territories']:
+            writer.writerow([found['player'], territory['name'], territory['nation'] or '',
+                             roles.get(territory['nation'], '')])
+        # Nations the player belongs to through a land listed under another nation
+        listed = {territory['nation'] for territory in found['territories']}
+        for nation in found['nations']:
+            if nation['name'] not in listed:
+                writer.writerow([found['player'], '', nation['name'], nation['role']])
+            
+def run_history(args: argparse.Namespace):
+    """Print rank-over-time, top-N or top-mover queries against the history database as CSV"""
+    if not os.path.exists(args.db):
+        raise SystemExit(f"No history database at {args.db}; scrape with --history first")
+        
+    with HistoryStore(args.db) as history:
+        if args.query == 'rank':
+            rows = history.rank_history(args.name, args.metric, args.entity)
+        elif args.query == 'top':
+            rows = history.top(args.metric, args.date, args.limit, args.entity)
+        elif args.query == 'movers':
+            rows = history.top_movers(args.start, args.end, args.metric, args.limit, args.entity)
+        else:
+            rows = [{'snapshot': snapshot_id, 'taken_at': taken_at} for snapshot_id, taken_at in history.snapshots()]
+            
+    if rows:
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+        
+def run_watch(scraper: StoneworksDataScraper, args: argparse.Namespace):
+    """Scrape on a schedule until SIGTERM or Ctrl+C, letting the scrape in progress finish"""
+    stop = threading.Event()
+    
+    def request_stop(signum, _frame):
+        if stop.is_set():
+            # Second signal: don't wait; outputs are replaced atomically anyway
+            raise SystemExit(128 + signum)
+        scraper.log(f"Received {signal.Signals(signum).name}, stopping after the current scrape")
+        stop.set()
+        
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, request_stop)
+    scraper.log(f"Watching markers every {args.interval:g}s (jitter {args.jitter:.0%}, backoff up to {args.max_backoff:g}s)")
+    scraper.watch(args.interval, args.jitter, args.max_backoff, stop)
+    
+def run_leaderboards(args: argparse.Namespace):
+    """Rebuild the merged nations and leaderboard files from a saved nations_comprehensive.json"""
+    scraper = StoneworksDataScraper(leaderboard_page_size=args.page_size, merge_groups_file=args.merge_groups,
+                                    gzip_outputs=args.gzip)
+    with open(args.nations, 'r', encoding='utf-8') as f:
+        scraper.nations_data = json.load(f)
+    scraper.apply_merge_groups()
+    scraper.save_nation_views()
+    
+def run_census(args: argparse.Namespace):
+    """Scrape the census pages and write census_population.csv"""
+    scraper = StoneworksDataScraper(census_pages_file=args.pages, wiki_concurrency=args.concurrency,
+                                    wiki_rate=args.rate, wiki_burst=args.burst)
+    if not scraper.census_pages:
+        raise SystemExit(f"No census pages listed in {args.pages}")
+    scraper.scrape_census_data()
+    scraper.save_census_data()
+    
+def run_wiki(args: argparse.Namespace):
+    """Crawl the wiki's nation articles and write wiki_nations.json"""
+    scraper = StoneworksDataScraper(wiki_concurrency=args.concurrency, wiki_rate=args.rate,
+                                    wiki_burst=args.burst, wiki_max_pages=args.max_pages)
+    scraper.scrape_wiki_nations()
+    with atomic_open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(scraper.nations_data, f, indent=2, ensure_ascii=False)
+    scraper.log(f"Saved {len(scraper.nations_data)} wiki nations to {args.output}")
+    
 def main():
     """Main function to run the scraper"""
-    scraper = StoneworksDataScraper()
-    scraper.run_full_scrape()
+    parser = argparse.ArgumentParser(description="Scrape Stoneworks nation and territory data")
+    parser.add_argument('--soup-parser', action='store_true',
+                        help="parse marker details with BeautifulSoup instead of the fast path")
+    parser.add_argument('--markers-file', metavar='PATH',
+                        help="read markers from a local markers.json instead of the live map")
+    parser.add_argument('--map', action='append', metavar='URL',
+                        help="map to scrape: a map link, a web app URL (scrapes all its maps), a markers.json URL "
+                             "or file; repeat to scrape several maps at once (default the main Stoneworks map)")
+    parser.add_argument('--stream', action='store_true',
+                        help="stream markers one at a time to keep memory flat on large maps")
+    parser.add_argument('--lean', action='store_true',
+                        help="leave the raw detail HTML and shape out of territories (shapes stay in coordinates.*)")
+    parser.add_argument('--compact-json', action='store_true',
+                        help="write territories and nations JSON without indentation")
+    parser.add_argument('--gzip', action='store_true',
+                        help="also write a .gz copy of every JSON and CSV output")
+    parser.add_argument('--output-workers', type=int, default=DEFAULT_OUTPUT_WORKERS,
+                        help="output files written at once (1 = one after another)")
+    parser.add_argument('--borders', action='store_true',
+                        help="rasterize shapes into chunks and write the border graph to borders.csv and border_nodes.csv")
+    parser.add_argument('--workers', type=int,
+                        help="processes for marker parsing (0 = one per core; default 1, or 0 for several maps)")
+    parser.add_argument('--batch-size', type=int, default=256,
+                        help="markers per parallel parsing batch")
+    parser.add_argument('--state-file', default='scrape_state.json',
+                        help="where to remember the last payload's ETag and hash ('' to disable)")
+    parser.add_argument('--force', action='store_true',
+                        help="parse and write outputs even if the markers payload is unchanged")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only re-parse changed markers and write territory_delta.json")
+    parser.add_argument('--cache-file', default='marker_cache.json',
+                        help="parsed markers kept between incremental runs")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                        help="nations per leaderboard page shard (0 = whole leaderboards only)")
+    parser.add_argument('--merge-groups', default=MERGE_GROUPS_FILE, metavar='PATH',
+                        help="nation merge groups ('' to disable, default merge_groups.json next to main.py)")
+    parser.add_argument('--history', metavar='PATH',
+                        help="append every scrape's nation/territory stats to this SQLite database")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep running and scrape every --interval seconds until SIGTERM/Ctrl+C")
+    parser.add_argument('--interval', type=float, default=300.0,
+                        help="seconds between scrapes in --watch mode (default 300)")
+    parser.add_argument('--jitter', type=float, default=0.1,
+                        help="randomize each wait by up to this fraction of it (default 0.1)")
+    parser.add_argument('--max-backoff', type=float, default=3600.0,
+                        help="longest wait after repeated failures in --watch mode (default 3600)")
+    parser.add_argument('--report', default='run_report.json', metavar='PATH',
+                        help="JSON report of stage timings, markers/s, parse failures and peak memory ('' to disable)")
+    parser.add_argument('--metrics-file', default='run_metrics.prom', metavar='PATH',
+                        help="the same numbers in Prometheus text format, e.g. for node_exporter's textfile collector ('' to disable)")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="save a cProfile dump of the scrape (parser worker processes are not included; single map only)")
+    
+    # Without a subcommand the scraper runs as before
+    commands = parser.add_subparsers(dest='command')
+    lookup = commands.add_parser('lookup', help="find the territory and nation owning block coordinates")
+    lookup.add_argument('points', nargs='*', metavar='X,Z',
+                        help="block coordinates as x,z or x,y,z (put -- before a negative x)")
+    lookup.add_argument('--input', metavar='PATH',
+                        help="file with one x,z per line ('-' for stdin)")
+    lookup.add_argument('--coordinates', default='coordinates.bin',
+                        help="coordinates.bin written by a previous scrape")
+    
+    players = commands.add_parser('players', help="find the lands and nations of players, or autocomplete names")
+    players.add_argument('names', nargs='*', help="player names (any case)")
+    players.add_argument('--prefix', metavar='TEXT', help="list players whose name starts with TEXT instead")
+    players.add_argument('--limit', type=int, default=20, help="most names listed for --prefix (0 = all)")
+    players.add_argument('--index', default='player_index.bin', help="player_index.bin written by a previous scrape")
+    
+    leaderboards = commands.add_parser('leaderboards',
+                                       help="rebuild merged nations and leaderboards from saved nations without scraping")
+    leaderboards.add_argument('--nations', default='nations_comprehensive.json',
+                              help="nations_comprehensive.json from a previous scrape")
+    
+    # Crawl tuning shared by the wiki subcommands
+    crawl_options = argparse.ArgumentParser(add_help=False)
+    crawl_options.add_argument('--concurrency', type=int, default=4, help="pages fetched at once")
+    crawl_options.add_argument('--rate', type=float, default=2.0, help="most requests started per second")
+    crawl_options.add_argument('--burst', type=float, default=1.0,
+                               help="requests allowed at once after a pause (default 1)")
+    
+    census = commands.add_parser('census', parents=[crawl_options],
+                                 help="scrape the wiki census pages into census_population.csv")
+    census.add_argument('--pages', default=CENSUS_PAGES_FILE, metavar='PATH',
+                        help="JSON list of census page URLs (default census_pages.json next to main.py)")
+    
+    wiki = commands.add_parser('wiki', parents=[crawl_options],
+                               help="crawl the wiki's nation articles into wiki_nations.json")
+    wiki.add_argument('--output', default='wiki_nations.json', metavar='PATH')
+    wiki.add_argument('--max-pages', type=int, metavar='N', help="crawl at most N nation articles")
+    
+    history = commands.add_parser('history', help="query nation and territory stats over past scrapes")
+    history.add_argument('--db', default='history.db', help="database written by --history")
+    # Ranking options go after the query name, e.g. history top --metric chunks
+    ranking_options = argparse.ArgumentParser(add_help=False)
+    ranking_options.add_argument('--entity', choices=list(HISTORY_METRICS), default='nation')
+    ranking_options.add_argument('--metric', default='balance',
+                                 choices=sorted({m for metrics in HISTORY_METRICS.values() for m in metrics}))
+    ranking_options.add_argument('--limit', type=int, default=10, help="rows for top and movers")
+    queries = history.add_subparsers(dest='query', required=True)
+    queries.add_parser('snapshots', help="list recorded snapshots")
+    rank = queries.add_parser('rank', parents=[ranking_options], help="rank of one nation or territory over time")
+    rank.add_argument('name')
+    top = queries.add_parser('top', parents=[ranking_options], help="top N on a date")
+    top.add_argument('date', nargs='?', help="YYYY-MM-DD, timestamp or snapshot id (default latest)")
+    movers = queries.add_parser('movers', parents=[ranking_options],
+                                help="largest rank changes between two snapshots")
+    movers.add_argument('start', help="YYYY-MM-DD, timestamp or snapshot id")
+    movers.add_argument('end', nargs='?', help="YYYY-MM-DD, timestamp or snapshot id (default latest)")
+    args = parser.parse_args()
+    
+    if args.command == 'lookup':
+        run_lookup(args)
+        return
+    if args.command == 'players':
+        run_players(args)
+        return
+    if args.command == 'leaderboards':
+        run_leaderboards(args)
+        return
+    if args.command == 'census':
+        run_census(args)
+        return
+    if args.command == 'wiki':
+        run_wiki(args)
+        return
+    if args.command == 'history':
+        try:
+            run_history(args)
+        except ValueError as e:
+            parser.error(str(e))
+        return
+
+    session = new_session()
+    sources = resolve_map_sources(session, args.map or [DEFAULT_MAP])
+    options = dict(
+        use_soup_parser=args.soup_parser,
+        stream_markers=args.stream,
+        parse_batch_size=args.batch_size,
+        state_file=args.state_file or None,
+        force=args.force,
+        incremental=args.incremental,
+        cache_file=args.cache_file,
+        history_file=args.history,
+        leaderboard_page_size=args.page_size,
+        merge_groups_file=args.merge_groups,
+        report_file=args.report or None,
+        metrics_file=args.metrics_file or None,
+        session=session,
+        lean=args.lean,
+        compact_json=args.compact_json,
+        borders=args.borders,
+        output_workers=args.output_workers,
+        gzip_outputs=args.gzip,
+    )
+    if len(sources) == 1:
+        scraper = StoneworksDataScraper(
+            markers_url=sources[0]['url'],
+            markers_file=args.markers_file or sources[0]['file'],
+            workers=1 if args.workers is None else args.workers,
+            profile_file=args.profile,
+            **options,
+        )
+    else:
+        if args.markers_file or args.profile:
+            parser.error("--markers-file and --profile need a single map; pass files to --map instead")
+        scraper = MultiMapScraper(sources, workers=args.workers or 0, **options)
+    if args.watch:
+        run_watch(scraper, args)
+    else:
+        scraper.run_full_scrape()
 
 if __name__ == "__main__":
     main()
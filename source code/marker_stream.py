@@ -0,0 +1,212 @@
+import codecs
+import json
+import re
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Tuple
+
+LANDS_MARKER_SET = "me.angeschossen.lands"
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+_STRING_BODY_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_STRUCTURE_RE = re.compile(r'[{}\[\]"]')
+_SCALAR_RE = re.compile(r'[^,:{}\[\]\s"]+')
+
+
+class _ChunkReader:
+    """Text buffer over an iterable of byte chunks, consumed front to back"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk to the buffer; False once the input is exhausted"""
+        if self.eof:
+            return False
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self.buffer += text
+                return True
+        self.buffer += self._decoder.decode(b'', final=True)
+        self.eof = True
+        return False
+
+    def compact(self):
+        """Drop everything before the current position"""
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of markers JSON")
+
+    def expect(self, char: str):
+        """Consume the next non-whitespace character, which must be char"""
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos} of markers JSON")
+        self.pos += 1
+
+    def _string_end(self, start: int) -> int:
+        """Return the index just past the string starting at start"""
+        while True:
+            match = _STRING_BODY_RE.match(self.buffer, start + 1)
+            if match:
+                return match.end()
+            if not self.fill():
+                raise ValueError("Unterminated string in markers JSON")
+
+    def read_key(self) -> str:
+        """Consume an object key and the colon after it"""
+        if self.peek() != '"':
+            raise ValueError(f"Expected object key at offset {self.pos} of markers JSON")
+        end = self._string_end(self.pos)
+        key = json.loads(self.buffer[self.pos:end])
+        self.pos = end
+        self.expect(':')
+        return key
+
+    def skip_value(self, keep: bool = True) -> int:
+        """
+        Consume one JSON value and return its start offset in the buffer.
+        With keep=False, already-scanned text of a container is discarded
+        as more input is read, so skipping a large value stays bounded.
+        """
+        first = self.peek()
+        start = self.pos
+
+        if first == '"':
+            self.pos = self._string_end(start)
+            return start
+
+        if first not in '{[':
+            while True:
+                match = _SCALAR_RE.match(self.buffer, start)
+                if not match:
+                    raise ValueError(f"Invalid value at offset {start} of markers JSON")
+                if match.end() < len(self.buffer) or not self.fill():
+                    self.pos = match.end()
+                    return start
+
+        depth = 0
+        scan = start
+        while True:
+            match = _STRUCTURE_RE.search(self.buffer, scan)
+            if not match:
+                scan = len(self.buffer)
+                if not keep:
+                    self.buffer = ''
+                    start = scan = 0
+                if not self.fill():
+                    raise ValueError("Unexpected end of markers JSON")
+                continue
+            char = match.group()
+            if char == '"':
+                scan = self._string_end(match.start())
+                continue
+            scan = match.end()
+            depth += 1 if char in '{[' else -1
+            if depth == 0:
+                self.pos = scan
+                return start
+
+    def read_value(self):
+        """Consume and decode one JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Most likely the value runs past the end of the buffer
+                if not self.fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may still be incomplete
+            if end < len(self.buffer) or not self.fill():
+                self.pos = end
+                return value
+
+    def next_member(self, first: bool) -> bool:
+        """Advance to the next object member; False at the closing brace"""
+        char = self.peek()
+        if char == '}':
+            self.pos += 1
+            return False
+        if not first:
+            self.expect(',')
+        return True
+
+
+def iter_marker_set(chunks: Iterable[bytes], marker_set: str = LANDS_MARKER_SET) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yield (marker_id, marker) pairs from one marker set of a BlueMap
+    markers.json, reading the payload incrementally so that only the
+    marker being decoded is held in memory.
+    """
+    reader = _ChunkReader(chunks)
+    reader.expect('{')
+
+    first = True
+    while reader.next_member(first):
+        first = False
+        if reader.read_key() != marker_set or reader.peek() != '{':
+            reader.skip_value(keep=False)
+            reader.compact()
+            continue
+
+        reader.expect('{')
+        first_field = True
+        while reader.next_member(first_field):
+            first_field = False
+            if reader.read_key() != 'markers' or reader.peek() != '{':
+                reader.skip_value(keep=False)
+                reader.compact()
+                continue
+
+            reader.expect('{')
+            first_marker = True
+            while reader.next_member(first_marker):
+                first_marker = False
+                marker_id = reader.read_key()
+                marker = reader.read_value()
+                reader.compact()
+                yield marker_id, marker
+
+    # Read through to the end so callers wrapping the chunks see all of them
+    while reader.fill():
+        reader.compact()
+    if _WHITESPACE_RE.match(reader.buffer, reader.pos).end() != len(reader.buffer):
+        raise ValueError("Unexpected data after markers JSON")
+
+
+def iter_file_chunks(path: str, chunk_size: int = 65536) -> Iterator[bytes]:
+    """Read a file as a sequence of byte chunks"""
+    with open(path, 'rb') as f:
+        yield from iter_spooled_chunks(f, chunk_size)
+
+
+def iter_spooled_chunks(f: BinaryIO, chunk_size: int = 65536) -> Iterator[bytes]:
+    """Read an open file from the start as byte chunks, closing it when done"""
+    with f:
+        f.seek(0)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def load_marker_set(path: str, marker_set: str = LANDS_MARKER_SET) -> Optional[Dict]:
+    """Load one marker set's markers from a markers.json file in a single read"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get(marker_set, {}).get("markers", {})
@@ -0,0 +1,79 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+from player_registry import PlayerRegistry, PlayerUnion
+
+DEFAULT_LEVEL = 'Empire'
+
+
+def load_merge_groups(path: str) -> Dict[str, Dict]:
+    """
+    Load merge groups, {group name: {"level": ..., "members": [nation, ...]}},
+    checking that no nation belongs to two groups.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        groups = json.load(f)
+
+    owner: Dict[str, str] = {}
+    for group_name, group in groups.items():
+        for member in group.get('members', []):
+            if member in owner and owner[member] != group_name:
+                raise ValueError(f"{path}: nation {member!r} is in both {owner[member]!r} and {group_name!r}")
+            owner[member] = group_name
+    return groups
+
+
+def merge_nations(nations: List[Dict], groups: Dict[str, Dict],
+                  registry: Optional[PlayerRegistry] = None) -> List[Dict]:
+    """
+    Fold the member nations of every group into one nation record placed
+    where its first member appears. Chunks and balances add up; territories
+    and players are deduplicated across members, players through the
+    scrape's registry when given. The capital is the largest member's.
+    """
+    if registry is None:
+        registry = PlayerRegistry()
+    owner = {member: group_name for group_name, group in groups.items() for member in group.get('members', [])}
+    merged: Dict[str, Dict] = {}
+    players: Dict[str, PlayerUnion] = {}
+    largest: Dict[str, Dict] = {}
+    for nation in nations:
+        group_name = owner.get(nation['name'])
+        if group_name is None:
+            merged[nation['name']] = nation
+            continue
+
+        group = merged.get(group_name)
+        if group_name not in players:
+            group = merged[group_name] = {
+                'name': group_name,
+                'level': groups[group_name].get('level', DEFAULT_LEVEL),
+                'capital': None,
+                'members': [],
+                'territories': {},  # Ordered set of unique names
+                'total_chunks': 0,
+                'total_balance': 0.0,
+                'total_players': 0,
+                'all_players': [],
+            }
+            players[group_name] = PlayerUnion(registry)
+        group['members'].append(nation['name'])
+        group['territories'].update(dict.fromkeys(nation.get('territories', [])))
+        group['total_chunks'] += nation.get('total_chunks', 0)
+        group['total_balance'] += nation.get('total_balance', 0.0)
+        group['total_players'] += nation.get('total_players', 0)
+        players[group_name].add(registry.ids_of(nation.get('all_players', [])))
+        # Ties go to the member listed first
+        if group_name not in largest or nation.get('total_chunks', 0) > largest[group_name].get('total_chunks', 0):
+            largest[group_name] = nation
+
+    for group_name, union in players.items():
+        group = merged[group_name]
+        group['capital'] = largest[group_name].get('capital')
+        group['territories'] = list(group['territories'])
+        group['all_players'] = union.to_list()
+        group['unique_players'] = len(group['all_players'])
+    return list(merged.values())
@@ -0,0 +1,158 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+from atomic_files import write_atomic
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module; peak memory is left out there
+    resource = None
+
+# Stages of run_full_scrape in the order they run; time outside every stage is 'other'
+STAGES = ('fetch', 'decode', 'parse', 'aggregate', 'geometry', 'merge', 'write', 'history')
+
+# Stages a marker passes through, used for markers per second
+MARKER_STAGES = ('fetch', 'decode', 'parse', 'aggregate')
+
+PROMETHEUS_PREFIX = 'stoneworks_scrape'
+
+T = TypeVar('T')
+
+
+def peak_memory_bytes() -> Optional[int]:
+    """Peak resident memory of this process so far, or None where it can't be read"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes everywhere else
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RunMetrics:
+    """
+    Stage timings and counters of one scrape. Stages nest, but each
+    second is charged to the innermost stage only, so the stage times add
+    up to the run's wall time.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        self.counters: Dict[str, int] = {'markers': 0, 'parse_failures': 0, 'payload_bytes': 0}
+        self.status = 'running'
+        self.error: Optional[str] = None
+        self.finished: Optional[float] = None
+        self.current = 'other'
+        self.mark = time.perf_counter()
+
+    def _switch(self, stage: str):
+        """Charge the time since the last switch to the current stage and make stage current"""
+        now = time.perf_counter()
+        self.stages[self.current] = self.stages.get(self.current, 0.0) + now - self.mark
+        self.current, self.mark = stage, now
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block as one stage"""
+        previous = self.current
+        self._switch(name)
+        try:
+            yield
+        finally:
+            self._switch(previous)
+
+    def timed(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Charge the time spent producing each item of an iterable (e.g. a streamed download) to a stage"""
+        iterator = iter(iterable)
+        while True:
+            previous = self.current
+            self._switch(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._switch(previous)
+            yield item
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def finish(self, status: str, error: Optional[BaseException] = None):
+        """Close the run with ok, unchanged or failed"""
+        self._switch(self.current)
+        self.status = status
+        self.error = f"{type(error).__name__}: {error}" if error else None
+        self.finished = time.time()
+
+    def report(self, **extra) -> Dict:
+        """Everything measured, as a JSON-ready dict"""
+        duration = sum(self.stages.values())
+        marker_seconds = sum(self.stages[stage] for stage in MARKER_STAGES)
+        markers = self.counters['markers']
+        return {
+            'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+            'finished': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.finished or time.time())),
+            'timestamp': int(self.finished or time.time()),
+            'status': self.status,
+            'error': self.error,
+            'duration_seconds': round(duration, 6),
+            'stages': {stage: round(seconds, 6) for stage, seconds in self.stages.items()},
+            **self.counters,
+            'markers_per_second': round(markers / marker_seconds, 1) if markers and marker_seconds else 0.0,
+            'peak_memory_bytes': peak_memory_bytes(),
+            **extra,
+        }
+
+
+def write_report(path: str, report: Dict):
+    """Write a run report as JSON"""
+    write_atomic(path, json.dumps(report, indent=2, ensure_ascii=False) + '\n')
+
+
+def prometheus_text(report: Dict) -> str:
+    """
+    Render a run report in the Prometheus text exposition format (for
+    node_exporter's textfile collector). The maps of a multi-map report
+    get their own samples, labelled map="<name>".
+    """
+    runs = [('', report)] + [(f'map="{name}"', run) for name, run in report.get('maps', {}).items()]
+    lines = []
+
+    def metric(name: str, help_text: str, value: Callable[[Dict], Optional[float]]):
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} gauge")
+        for labels, run in runs:
+            if value(run) is not None:
+                lines.append(f"{PROMETHEUS_PREFIX}_{name}{{{labels}}} {value(run)}" if labels
+                             else f"{PROMETHEUS_PREFIX}_{name} {value(run)}")
+
+    lines.append(f"# HELP {PROMETHEUS_PREFIX}_stage_seconds Seconds the last scrape spent in each stage.")
+    lines.append(f"# TYPE {PROMETHEUS_PREFIX}_stage_seconds gauge")
+    for labels, run in runs:
+        for stage, seconds in run['stages'].items():
+            lines.append(f'{PROMETHEUS_PREFIX}_stage_seconds{{{labels + "," if labels else ""}stage="{stage}"}} {seconds}')
+    metric('duration_seconds', "Wall time of the last scrape.", lambda run: run['duration_seconds'])
+    metric('markers', "Markers processed by the last scrape.", lambda run: run['markers'])
+    metric('markers_per_second', "Markers fetched, parsed and aggregated per second.",
+           lambda run: run['markers_per_second'])
+    metric('parse_failures', "Markers whose detail failed to parse.", lambda run: run['parse_failures'])
+    metric('payload_bytes', "Bytes of markers payload downloaded or read.", lambda run: run['payload_bytes'])
+    if report['peak_memory_bytes'] is not None:
+        # One process scrapes every map, so peak memory is only reported once
+        metric('peak_memory_bytes', "Peak resident memory of the scraper process.",
+               lambda run: run['peak_memory_bytes'] if run is report else None)
+    metric('success', "1 if the last scrape finished (with or without changes), 0 if it failed.",
+           lambda run: int(run['status'] != 'failed'))
+    metric('unchanged', "1 if the last scrape found the markers payload unchanged.",
+           lambda run: int(run['status'] == 'unchanged'))
+    metric('last_run_timestamp_seconds', "Unix time the last scrape finished.", lambda run: run['timestamp'])
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path: str, report: Dict):
+    """Write a run report as a Prometheus text file"""
+    write_atomic(path, prometheus_text(report))
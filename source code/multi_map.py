@@ -0,0 +1,139 @@
+import json
+import os
+import re
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from player_registry import PlayerRegistry, PlayerUnion
+
+DEFAULT_MAP = "https://map.stoneworks.gg/abex1/#abexilas"
+
+# BlueMap 3+ serves each map's live markers here, relative to the web app root
+MARKERS_PATH = "maps/{map_id}/live/markers.json"
+
+_MAP_PATH_RE = re.compile(r'^(?P<base>.*?)/maps/(?P<map>[^/]+)(?:/.*)?$')
+
+
+def markers_url(base_url: str, map_id: str) -> str:
+    """Live markers.json URL of one map of a BlueMap web app"""
+    return f"{base_url.rstrip('/')}/{MARKERS_PATH.format(map_id=map_id)}"
+
+
+DEFAULT_MARKERS_URL = markers_url("https://map.stoneworks.gg/abex1", "abexilas")
+
+
+def parse_map_spec(spec: str) -> Dict:
+    """
+    Understand one --map value: a saved markers.json path, a markers.json
+    URL, a map URL (the web app's '#map:x:y:z...' link or .../maps/<map>),
+    or a bare web app URL whose maps are discovered from settings.json.
+    Returns {'base', 'map', 'url', 'file'}, with what the spec pinned down.
+    """
+    if os.path.exists(spec):
+        return {'base': None, 'map': os.path.splitext(os.path.basename(spec))[0], 'url': None, 'file': spec}
+
+    url, _, fragment = spec.partition('#')
+    url = url.split('?')[0].rstrip('/')
+    path_match = _MAP_PATH_RE.match(url)
+    if url.endswith('.json'):
+        return {'base': path_match and path_match['base'], 'map': path_match and path_match['map'],
+                'url': spec, 'file': None}
+    if path_match:
+        return {'base': path_match['base'], 'map': path_match['map'], 'url': None, 'file': None}
+    return {'base': url, 'map': fragment.split(':')[0] or None, 'url': None, 'file': None}
+
+
+def discover_maps(session: requests.Session, base_url: str, timeout: int = 10) -> List[str]:
+    """Ids of every map a BlueMap web app lists in its settings.json"""
+    response = session.get(f"{base_url.rstrip('/')}/settings.json", timeout=timeout)
+    response.raise_for_status()
+    maps = response.json().get('maps', [])
+    # BlueMap 3+ lists ids; older versions map ids to settings or list objects
+    if isinstance(maps, dict):
+        return list(maps)
+    return [entry['id'] if isinstance(entry, dict) else entry for entry in maps]
+
+
+def resolve_map_sources(session: requests.Session, specs: List[str],
+                        log: Callable[[str], None] = print) -> List[Dict]:
+    """
+    Turn --map values into one {'name', 'url', 'file'} per map, discovering
+    the maps of bare web app URLs. Names are map ids, prefixed with the web
+    app's (or file's directory's) last path segment when two sources have
+    a map of the same id, and numbered if that still isn't unique.
+    """
+    sources: List[Dict] = []
+    for spec in specs:
+        parsed = parse_map_spec(spec)
+        if parsed['file'] or parsed['url']:
+            sources.append({'map': parsed['map'] or urlparse(spec).netloc, 'base': parsed['base'],
+                            'url': parsed['url'], 'file': parsed['file']})
+            continue
+        map_ids = [parsed['map']] if parsed['map'] else discover_maps(session, parsed['base'])
+        if not parsed['map']:
+            log(f"Discovered {len(map_ids)} maps at {parsed['base']}: {', '.join(map_ids)}")
+        sources += [{'map': map_id, 'base': parsed['base'], 'url': markers_url(parsed['base'], map_id), 'file': None}
+                    for map_id in map_ids]
+
+    counts: Dict[str, int] = {}
+    for source in sources:
+        counts[source['map']] = counts.get(source['map'], 0) + 1
+    names = set()
+    for source in sources:
+        origin = source['base'] or (source['file'] and os.path.dirname(os.path.abspath(source['file']))) or ''
+        prefix = origin.rstrip('/').rsplit('/', 1)[-1]
+        name = f"{prefix}-{source['map']}" if counts[source['map']] > 1 and prefix else source['map']
+        # Still taken (same map id under the same last segment): number it
+        source['name'], number = name, 2
+        while source['name'] in names:
+            source['name'], number = f"{name}-{number}", number + 1
+        names.add(source['name'])
+    return sources
+
+
+def combine_nations(nation_lists: List[List[Dict]]) -> List[Dict]:
+    """
+    Combine each map's nations into one list: a nation on several maps is
+    the same Lands nation, so its chunks and balances add up while its
+    territories and players are deduplicated. Order is first appearance.
+    """
+    registry = PlayerRegistry()
+    combined: Dict[str, Dict] = {}
+    players: Dict[str, PlayerUnion] = {}
+    for nations in nation_lists:
+        for nation in nations:
+            name = nation['name']
+            record = combined.get(name)
+            if record is None:
+                record = combined[name] = {
+                    'name': name,
+                    'level': nation.get('level'),
+                    'capital': nation.get('capital'),
+                    'territories': {},  # Ordered set of unique names
+                    'total_chunks': 0,
+                    'total_balance': 0.0,
+                    'total_players': 0,
+                    'all_players': [],
+                }
+                players[name] = PlayerUnion(registry)
+            record['territories'].update(dict.fromkeys(nation.get('territories', [])))
+            record['total_chunks'] += nation.get('total_chunks', 0)
+            record['total_balance'] += nation.get('total_balance', 0.0)
+            record['total_players'] += nation.get('total_players', 0)
+            players[name].add(registry.ids_of(nation.get('all_players', [])))
+
+    for name, record in combined.items():
+        record['territories'] = list(record['territories'])
+        record['all_players'] = players[name].to_list()
+        record['unique_players'] = len(record['all_players'])
+    return list(combined.values())
+
+
+def load_saved_nations(path: str) -> Optional[List[Dict]]:
+    """Nations a previous scrape saved, or None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
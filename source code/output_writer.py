@@ -0,0 +1,116 @@
+import gzip
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from atomic_files import atomic_open
+from player_registry import PlayerRegistry
+
+# Files written at once; JSON encoding holds the GIL, but disk writes and
+# zlib compression release it, so a few threads overlap most of the work
+DEFAULT_OUTPUT_WORKERS = 4
+
+GZIP_LEVEL = 6
+COPY_BUFFER = 1 << 20
+
+
+def territory_outputs(territories: List, registry: PlayerRegistry) -> Dict:
+    """
+    Rows of balances.csv, population_detailed.csv and chunks_data.csv and
+    the summary totals, gathered in one pass over the territories.
+    """
+    balances, population, chunks = [], [], []
+    total_balance = total_chunks = total_players = coordinate_count = 0
+    player_ids = set()
+    for territory in territories:
+        name, nation = territory['name'], territory.get('nation_name', '')
+        balance, chunk_count = territory.get('balance', 0.0), territory.get('chunks', 0)
+        player_names = territory.get('players', [])
+        balances.append([name, nation, balance, territory.get('level', ''), chunk_count])
+        population.append([name, nation, territory.get('player_count', 0), '; '.join(player_names)])
+        chunks.append([name, nation, chunk_count, territory.get('territory_area', 0), territory.get('claimed_area'),
+                       territory.get('perimeter'), territory.get('coordinate_count', 0)])
+        total_balance += territory.get('balance', 0)
+        total_chunks += chunk_count
+        total_players += territory.get('player_count', 0)
+        coordinate_count += territory.get('coordinate_count', 0)
+        player_ids.update(registry.ids_of(player_names))
+    return {
+        'balances': balances,
+        'population': population,
+        'chunks': chunks,
+        'total_balance': total_balance,
+        'total_chunks': total_chunks,
+        'total_players': total_players,
+        'unique_players': len(player_ids),
+        'coordinate_count': coordinate_count,
+    }
+
+
+def gzip_copy(path: str) -> str:
+    """
+    Compress a finished file to path.gz, streaming so memory stays flat.
+    The header carries no mtime or temporary name, so unchanged output
+    compresses to identical bytes and atomic_open leaves the copy alone.
+    """
+    gz_path = f"{path}.gz"
+    with open(path, 'rb') as source, atomic_open(gz_path, 'wb') as f:
+        with gzip.GzipFile(filename=os.path.basename(path), mode='wb', compresslevel=GZIP_LEVEL,
+                           fileobj=f, mtime=0) as compressed:
+            shutil.copyfileobj(source, compressed, COPY_BUFFER)
+    return gz_path
+
+
+def remove_gzip_copy(path: str):
+    """Delete path.gz left by an earlier run that wrote .gz copies"""
+    try:
+        os.remove(f"{path}.gz")
+    except FileNotFoundError:
+        pass
+
+
+class OutputWriter:
+    """
+    Runs a scrape's independent file writers on a thread pool. Each job
+    writes its files through atomic_open; with compress set, the files a
+    job marks as compressible also get a .gz copy, and without it any
+    stale copy of them is deleted. run() waits for every job, re-raises
+    the first failure and returns each job's seconds.
+    """
+
+    def __init__(self, workers: int = DEFAULT_OUTPUT_WORKERS, compress: bool = False):
+        self.workers = workers
+        self.compress = compress
+        self.jobs: List[tuple] = []
+        # .gz copies written by the last run, in the order their jobs were added
+        self.compressed: List[str] = []
+
+    def add(self, name: str, write: Callable[[], None], compressible: Optional[List[str]] = None):
+        """Queue write() under a name, with the paths it writes that may get a .gz copy"""
+        self.jobs.append((name, write, compressible or []))
+
+    def _run_job(self, write: Callable[[], None], compressible: List[str]) -> Tuple[float, List[str]]:
+        start = time.perf_counter()
+        write()
+        if not self.compress:
+            for path in compressible:
+                remove_gzip_copy(path)
+            return time.perf_counter() - start, []
+        compressed = [gzip_copy(path) for path in compressible]
+        return time.perf_counter() - start, compressed
+
+    def run(self) -> Dict[str, float]:
+        """Run the queued jobs; returns seconds per job name"""
+        jobs, self.jobs = self.jobs, []
+        if self.workers <= 1:
+            results = [(name, self._run_job(write, compressible)) for name, write, compressible in jobs]
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='output') as pool:
+                futures = [(name, pool.submit(self._run_job, write, compressible))
+                           for name, write, compressible in jobs]
+                # Every job finishes (the pool waits on exit) before the first error surfaces
+                results = [(name, future.result()) for name, future in futures]
+        self.compressed = [path for _, (_, compressed) in results for path in compressed]
+        return {name: seconds for name, (seconds, _) in results}
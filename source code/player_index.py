@@ -0,0 +1,202 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional
+
+from atomic_files import atomic_open
+
+# player_index.bin layout, little-endian:
+#   header: magic, version, reserved, player count, territory count, territory posting count,
+#           nation posting count, names byte length, metadata byte length
+#   uint32  name_offsets[players + 1]           where each player's name starts in the names blob
+#   uint32  territory_offsets[players + 1]      where each player's lands start in territory_postings
+#   uint32  territory_postings[...]             territory ids of every player, in payload order
+#   uint32  nation_offsets[players + 1]         where each player's nations start in nation_postings
+#   uint32  nation_postings[...]                nation id * 2 + 1 if the player lives in its capital land
+#   int32   territory_nations[territories]      nation id of every territory, -1 if it has none
+#   utf-8   names, sorted case-insensitively (Minecraft names are case-insensitive)
+#   utf-8 JSON metadata: {"territories": [...], "nations": [...]}
+INDEX_MAGIC = b'SWPLAYR\x00'
+INDEX_VERSION = 1
+HEADER = struct.Struct('<8sIIIIIIII')
+
+# Role of a player in a nation: living in its capital land, or in another of its lands
+CAPITAL_ROLE = 'capital'
+MEMBER_ROLE = 'member'
+
+
+def capital_land(nation: Dict) -> Optional[str]:
+    """
+    The nation's land named as its capital. The parsed capital can run on
+    into the text after it, so the longest land name it starts with wins.
+    """
+    capital = nation.get('capital') or ''
+    return max((name for name in nation.get('territories', []) if capital.startswith(name)), key=len, default=None)
+
+
+def write_player_index(path: str, territories: List[Dict], nations: List[Dict]) -> int:
+    """
+    Write the player reverse index of a scrape; returns the number of
+    players. Nations come from their own player lists, since a land whose
+    markers sit in several nations counts towards each of them.
+    """
+    nation_ids = {nation['name']: nation_id for nation_id, nation in enumerate(nations)}
+    lands: Dict[str, List[int]] = {}
+    for territory_id, territory in enumerate(territories):
+        for player in territory.get('players', []):
+            lands.setdefault(player, []).append(territory_id)
+
+    capital_players = {territory['name']: territory.get('players', []) for territory in territories}
+    memberships: Dict[str, List[int]] = {}
+    for nation_id, nation in enumerate(nations):
+        capital = set(capital_players.get(capital_land(nation), ()))
+        for player in nation.get('all_players', []):
+            memberships.setdefault(player, []).append(nation_id * 2 + (player in capital))
+
+    # Case-insensitive order, ties in exact order: a stable sort of sorted names
+    names = sorted(lands.keys() | memberships.keys())
+    names.sort(key=str.lower)
+    name_offsets, territory_offsets, nation_offsets = array('I', [0]), array('I', [0]), array('I', [0])
+    territory_postings, nation_postings = array('I'), array('I')
+    blob = bytearray()
+    for name in names:
+        blob += name.encode('utf-8')
+        name_offsets.append(len(blob))
+        territory_postings.extend(lands.get(name, ()))
+        territory_offsets.append(len(territory_postings))
+        nation_postings.extend(memberships.get(name, ()))
+        nation_offsets.append(len(nation_postings))
+    territory_nations = array('i', (nation_ids.get(territory.get('nation_name'), -1) for territory in territories))
+
+    metadata = json.dumps({
+        'territories': [territory['name'] for territory in territories],
+        'nations': [nation['name'] for nation in nations],
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    with atomic_open(path, 'wb') as f:
+        f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, len(names), len(territories), len(territory_postings),
+                            len(nation_postings), len(blob), len(metadata)))
+        for values in (name_offsets, territory_offsets, territory_postings, nation_offsets, nation_postings,
+                       territory_nations):
+            if sys.byteorder != 'little':
+                values = array(values.typecode, values)
+                values.byteswap()
+            f.write(values.tobytes())
+        f.write(blob)
+        f.write(metadata)
+    return len(names)
+
+
+class PlayerIndex:
+    """
+    Read-only view of a player_index.bin file. Opening it maps the file
+    and reads only the header and the territory and nation names; player
+    names are decoded as lookups and searches reach them.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, _, players, territories, territory_postings, nation_postings,
+         names_length, metadata_length) = HEADER.unpack_from(self._mmap, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{path} is not a version {INDEX_VERSION} player index")
+
+        view = memoryview(self._mmap)
+        position = HEADER.size
+        self.name_offsets = self._column(view, position, players + 1, 'I')
+        position += (players + 1) * 4
+        self.territory_offsets = self._column(view, position, players + 1, 'I')
+        position += (players + 1) * 4
+        self.territory_postings = self._column(view, position, territory_postings, 'I')
+        position += territory_postings * 4
+        self.nation_offsets = self._column(view, position, players + 1, 'I')
+        position += (players + 1) * 4
+        self.nation_postings = self._column(view, position, nation_postings, 'I')
+        position += nation_postings * 4
+        self.territory_nations = self._column(view, position, territories, 'i')
+        position += territories * 4
+        self._names = view[position:position + names_length]
+        position += names_length
+
+        metadata = json.loads(bytes(view[position:position + metadata_length]).decode('utf-8'))
+        self.territories: List[str] = metadata['territories']
+        self.nations: List[str] = metadata['nations']
+
+    @staticmethod
+    def _column(view: memoryview, start: int, count: int, typecode: str):
+        data = view[start:start + count * 4]
+        if sys.byteorder == 'little':
+            return data.cast(typecode)
+        values = array(typecode, bytes(data))
+        values.byteswap()
+        return values
+
+    def __len__(self) -> int:
+        return len(self.name_offsets) - 1
+
+    def __contains__(self, name: str) -> bool:
+        return self.find(name) is not None
+
+    def name(self, player_id: int) -> str:
+        """Name of the player with this id (its position in sorted order)"""
+        return bytes(self._names[self.name_offsets[player_id]:self.name_offsets[player_id + 1]]).decode('utf-8')
+
+    def _lower_bound(self, key: str) -> int:
+        """First player id whose lowercased name is not below key"""
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.name(middle).lower() < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, name: str) -> Optional[int]:
+        """Id of a player, preferring the exact spelling over a match that differs in case"""
+        key = name.lower()
+        player_id = self._lower_bound(key)
+        matches = []
+        while player_id < len(self) and self.name(player_id).lower() == key:
+            matches.append(player_id)
+            player_id += 1
+        return next((match for match in matches if self.name(match) == name), matches[0] if matches else None)
+
+    def search(self, prefix: str, limit: Optional[int] = 20) -> List[str]:
+        """Player names starting with prefix, ignoring case, in sorted order"""
+        key = prefix.lower()
+        names = []
+        player_id = self._lower_bound(key)
+        while player_id < len(self) and (limit is None or len(names) < limit):
+            name = self.name(player_id)
+            if not name.lower().startswith(key):
+                break
+            names.append(name)
+            player_id += 1
+        return names
+
+    def lookup(self, name: str) -> Optional[Dict]:
+        """
+        Lands and nations of a player, or None if the player isn't in any:
+        {'player', 'territories': [{'name', 'nation'}], 'nations': [{'name', 'role'}]},
+        role being 'capital' for a resident of the nation's capital land
+        and 'member' otherwise.
+        """
+        player_id = self.find(name)
+        if player_id is None:
+            return None
+
+        territories = []
+        for territory_id in self.territory_postings[self.territory_offsets[player_id]:
+                                                    self.territory_offsets[player_id + 1]]:
+            nation_id = self.territory_nations[territory_id]
+            territories.append({'name': self.territories[territory_id],
+                                'nation': self.nations[nation_id] if nation_id >= 0 else None})
+        nations = [
+            {'name': self.nations[posting >> 1], 'role': CAPITAL_ROLE if posting & 1 else MEMBER_ROLE}
+            for posting in self.nation_postings[self.nation_offsets[player_id]:self.nation_offsets[player_id + 1]]
+        ]
+        return {'player': self.name(player_id), 'territories': territories, 'nations': nations}
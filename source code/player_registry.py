@@ -0,0 +1,106 @@
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class PlayerList(Sequence):
+    """
+    Players of a territory or nation as an array of registry ids, in
+    first-seen order. It reads as a sequence of names, looked up only when
+    something iterates it (the CSV and JSON writers, the player index);
+    unions and counts work on the ids.
+    """
+
+    __slots__ = ('registry', 'ids')
+
+    def __init__(self, registry: 'PlayerRegistry', ids: Optional[array] = None):
+        self.registry = registry
+        self.ids = array('I') if ids is None else ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.registry.names[player_id] for player_id in self.ids[index]]
+        return self.registry.names[self.ids[index]]
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self.registry.names.__getitem__, self.ids)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PlayerList):
+            return self.ids == other.ids if other.registry is self.registry else list(self) == list(other)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PlayerList({list(self)!r})"
+
+
+class PlayerUnion:
+    """
+    Union of player id arrays being built up, e.g. a nation's players over
+    its lands. add() only appends the ids (a memcpy); to_list() drops the
+    repeats in one pass, keeping each player once in first-seen order.
+    """
+
+    __slots__ = ('registry', 'ids')
+
+    def __init__(self, registry: 'PlayerRegistry', ids: Iterable[int] = ()):
+        self.registry = registry
+        self.ids = array('I', ids)
+
+    def add(self, ids: array):
+        """Add the players of an id array, repeats included until to_list()"""
+        self.ids.extend(ids)
+
+    def to_list(self) -> PlayerList:
+        return PlayerList(self.registry, array('I', dict.fromkeys(self.ids)))
+
+
+class _PlayerIds(dict):
+    """Name to id map of a registry; looking up a new name registers it"""
+
+    __slots__ = ('names',)
+
+    def __init__(self, names: List[str]):
+        super().__init__()
+        self.names = names
+
+    def __missing__(self, name: str) -> int:
+        player_id = self[name] = len(self.names)
+        self.names.append(name)
+        return player_id
+
+
+class PlayerRegistry:
+    """
+    Interns player names to dense integer ids, so territory and nation
+    memberships are PlayerLists of 4-byte ids sharing one string per
+    player, and unions compare ints instead of hashing names again.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = _PlayerIds(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, name: str) -> int:
+        """Return the id of a name, assigning the next id to a new one"""
+        return self.ids[name]
+
+    def id_array(self, names: Iterable[str]) -> array:
+        """Ids of names in order, duplicates included, assigning ids to new names"""
+        return array('I', map(self.ids.__getitem__, names))
+
+    def ids_of(self, players: Iterable[str]) -> array:
+        """Ids of a PlayerList (as is if it is this registry's) or of a list of names"""
+        if isinstance(players, PlayerList) and players.registry is self:
+            return players.ids
+        return self.id_array(players)
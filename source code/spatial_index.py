@@ -0,0 +1,83 @@
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Smallest grid cell: one chunk
+MIN_CELL_SIZE = 16
+
+
+def point_in_ring(xs: Sequence[float], zs: Sequence[float], px: float, pz: float) -> bool:
+    """Even-odd ray casting test of a point against one closed ring"""
+    inside = False
+    j = len(xs) - 1
+    for i in range(len(xs)):
+        xi, zi, xj, zj = xs[i], zs[i], xs[j], zs[j]
+        if (zi > pz) != (zj > pz) and px < (xj - xi) * (pz - zi) / (zj - zi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the bounding boxes of every shape segment in a
+    CoordinateStore (or MappedCoordinates). A query only runs the exact
+    point-in-polygon test on segments whose box covers the point's cell.
+    """
+
+    def __init__(self, store, cell_size: Optional[int] = None):
+        self.store = store
+        self.bounds: List[Tuple[float, float, float, float]] = []
+        for index in range(store.segment_count):
+            start, end = store.segment(index)
+            if end - start < 3:
+                self.bounds.append((math.inf, math.inf, -math.inf, -math.inf))
+                continue
+            xs, zs = store.x[start:end], store.z[start:end]
+            self.bounds.append((min(xs), min(zs), max(xs), max(zs)))
+
+        self.cell_size = cell_size or self._default_cell_size()
+        # (cell x, cell z) -> indices of segments whose bounding box touches the cell
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for index, (min_x, min_z, max_x, max_z) in enumerate(self.bounds):
+            if min_x > max_x:
+                continue
+            for cell_x in range(self._cell(min_x), self._cell(max_x) + 1):
+                for cell_z in range(self._cell(min_z), self._cell(max_z) + 1):
+                    self.cells.setdefault((cell_x, cell_z), []).append(index)
+
+    def _default_cell_size(self) -> int:
+        """Power-of-two cell, at least a chunk, about as wide as a typical shape"""
+        sides = sorted(max(max_x - min_x, max_z - min_z)
+                       for min_x, min_z, max_x, max_z in self.bounds if min_x <= max_x)
+        if not sides:
+            return MIN_CELL_SIZE
+        typical = sides[len(sides) // 2]
+        return max(MIN_CELL_SIZE, 1 << max(0, math.ceil(math.log2(max(typical, 1)))))
+
+    def _cell(self, coordinate: float) -> int:
+        return math.floor(coordinate / self.cell_size)
+
+    def query(self, x: float, z: float) -> List[int]:
+        """Return the indices of every segment containing block (x, z), in payload order"""
+        # A block spans [x, x + 1), so test its centre to stay off shape edges
+        px, pz = x + 0.5, z + 0.5
+        hits = []
+        for index in self.cells.get((self._cell(px), self._cell(pz)), ()):
+            min_x, min_z, max_x, max_z = self.bounds[index]
+            if not (min_x <= px <= max_x and min_z <= pz <= max_z):
+                continue
+            start, end = self.store.segment(index)
+            if point_in_ring(self.store.x[start:end], self.store.z[start:end], px, pz):
+                hits.append(index)
+        return hits
+
+    def lookup(self, x: float, z: float) -> Optional[Dict]:
+        """Return the territory and nation owning block (x, z), or None for unclaimed land"""
+        hits = self.query(x, z)
+        if not hits:
+            return None
+        return {'territory': self.store.labels[hits[0]], 'nation': self.store.nations[hits[0]]}
+
+    def lookup_many(self, points: Iterable[Tuple[float, float]]) -> List[Optional[Dict]]:
+        """Look up a batch of (x, z) block coordinates"""
+        return [self.lookup(x, z) for x, z in points]
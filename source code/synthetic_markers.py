@@ -0,0 +1,227 @@
+import argparse
+import bisect
+import itertools
+import json
+import random
+from collections import deque
+from html import escape
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from marker_stream import LANDS_MARKER_SET
+
+LAND_LEVELS = ('Camp', 'Village', 'Town', 'City', 'Metropolis')
+NATION_LEVELS = ('Kingdom', 'Empire', 'Federation', 'Republic')
+
+# Word lists for land, nation and player names
+PREFIXES = ('North', 'South', 'New', 'Old', 'Port', 'Fort', 'Mount', 'Lake', 'Saint', 'Upper', 'Lower', 'East')
+ROOTS = ('haven', 'wood', 'stone', 'brook', 'field', 'ridge', 'vale', 'hold', 'mere', 'crest', 'ford', 'gate',
+         'moor', 'fall', 'wick', 'burg', 'dale', 'shire', 'reach', 'watch')
+PLAYER_WORDS = ('Dark', 'Iron', 'Epic', 'Pixel', 'Lucky', 'Swift', 'Frost', 'Crafty', 'Red', 'Silent',
+                'Wolf', 'Miner', 'Knight', 'Fox', 'Dragon', 'Builder', 'Archer', 'Owl', 'Bear', 'Storm')
+
+# Lands are laid out left to right in rows this many chunks wide, so shapes never overlap
+ROW_WIDTH = 4096
+# Chunks of empty space between neighbouring lands
+GAP = 2
+
+# Fields BlueMap writes on every shape marker besides label, detail, position and shape
+MARKER_STYLE = {
+    'type': 'shape',
+    'shapeY': 64.0,
+    'lineWidth': 2,
+    'lineColor': {'r': 40, 'g': 90, 'b': 200, 'a': 1.0},
+    'fillColor': {'r': 40, 'g': 90, 'b': 200, 'a': 0.3},
+    'depthTest': False,
+    'sorting': 0,
+    'listed': True,
+    'minDistance': 10.0,
+    'maxDistance': 10000000.0,
+}
+
+
+def land_name(index: int) -> str:
+    """Readable, unique land name; some contain spaces, ampersands or accents to exercise escaping"""
+    prefix = PREFIXES[index % len(PREFIXES)]
+    root = ROOTS[(index // len(PREFIXES)) % len(ROOTS)]
+    suffix = index // (len(PREFIXES) * len(ROOTS))
+    name = f"{prefix}{root}" if index % 3 else f"{prefix} {root.capitalize()}"
+    if index % 97 == 5:
+        name = f"{name} & Co"
+    elif index % 89 == 7:
+        name = f"{name}é"
+    return f"{name} {suffix}" if suffix else name
+
+
+def player_name(index: int) -> str:
+    """Minecraft-style player name (letters, digits, underscores, at most 16 characters)"""
+    first = PLAYER_WORDS[index % len(PLAYER_WORDS)]
+    second = PLAYER_WORDS[(index // len(PLAYER_WORDS)) % len(PLAYER_WORDS)]
+    number = index // (len(PLAYER_WORDS) ** 2)
+    return f"{first}_{second}{number}"[:16] if index % 2 else f"{first}{second}{number or ''}"[:16]
+
+
+def staircase_shape(x: int, z: int, columns: List[int]) -> List[Dict]:
+    """Chunk-aligned outline of a row of columns with the given heights in chunks, standing at (x, z)"""
+    width = len(columns)
+    outline = [(0, 0), (width, 0)]
+    for column in range(width - 1, -1, -1):
+        height = columns[column]
+        if outline[-1][1] != height:
+            outline.append((column + 1, height))
+        if column == 0 or columns[column - 1] != height:
+            outline.append((column, height))
+    return [{'x': float((x + cx) * 16), 'z': float((z + cz) * 16)} for cx, cz in outline]
+
+
+def land_columns(rng: random.Random, chunks: int, vertices: int) -> List[int]:
+    """Column heights adding up to chunks, with alternating heights so the outline has about the given vertices"""
+    steps = max(1, min((vertices - 2) // 2, chunks))
+    base = max(1, chunks // steps)
+    columns = [base + (index % 2) for index in range(steps)]
+    # Trim or pad the last columns so the area is exactly chunks
+    surplus = sum(columns) - chunks
+    while surplus > 0:
+        trim = min(surplus, columns[-1] - 1)
+        if trim <= 0:
+            surplus -= columns.pop()
+            continue
+        columns[-1] -= trim
+        surplus -= trim
+    if surplus < 0:
+        columns.append(-surplus)
+    return columns
+
+
+class ShelfLayout:
+    """Places shapes left to right in rows so none of them overlap"""
+
+    def __init__(self):
+        self.x = self.z = self.row_height = 0
+
+    def place(self, width: int, height: int) -> Tuple[int, int]:
+        if self.x and self.x + width > ROW_WIDTH:
+            self.x, self.z, self.row_height = 0, self.z + self.row_height + GAP, 0
+        origin = (self.x - ROW_WIDTH // 2, self.z)
+        self.x += width + GAP
+        self.row_height = max(self.row_height, height)
+        return origin
+
+
+def build_detail(name: str, level: str, balance: float, chunks: int, players: List[str],
+                 nation: Optional[Dict]) -> str:
+    """Detail HTML in the format BlueMap's Lands integration renders"""
+    html = (
+        f'<div class="regionInfo"><span style="font-size:120%;">{escape(name)}</span><br>'
+        f'Level: {level}<br>'
+        f'Balance: ${balance:,.2f}<br>'
+        f'Chunks: {chunks}<br>'
+        f'Players ({len(players)}): {escape(", ".join(players))}<br>'
+    )
+    if nation:
+        html += (
+            f'<br>This land belongs to nation {escape(nation["name"])}:<br>'
+            f'Level: {nation["level"]}<br>'
+            f'Capital: {escape(nation["capital"])}<br>'
+            f'Lands (amount: {nation["lands"]}, players: {nation["players"]}): '
+            f'{escape(nation["capital"])}, &amp; more<br>'
+        )
+    return html + '</div>'
+
+
+def iter_synthetic_markers(count: int, seed: int = 0, duplicate_rate: float = 0.08, nation_rate: float = 0.8,
+                           max_players: int = 400, max_vertices: int = 2000) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yield (marker id, marker) pairs shaped like a live Lands marker set:
+    lands of heavy-tailed size and player count, most of them in nations
+    of skewed size, some split into several markers (same label and
+    detail, another shape), and players who belong to several lands.
+    """
+    rng = random.Random(seed)
+    lands = max(1, round(count * (1 - duplicate_rate)))
+    nation_count = max(1, lands // 12)
+    # A few nations hold most lands; player activity is skewed the same way
+    nation_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(nation_count)))
+    player_pool = max(50, lands * 4)
+    nations: List[Optional[Dict]] = [None] * nation_count
+    layout = ShelfLayout()
+    # Recent lands that later markers may add another area to; bounded so
+    # a million markers don't keep every detail in memory
+    recent: deque = deque(maxlen=4096)
+    land_index = 0
+
+    for marker_index in range(count):
+        if recent and rng.random() < duplicate_rate:
+            # Another area of a land already emitted: same label and detail, new shape
+            area_of, name, detail = recent[rng.randrange(len(recent))]
+            chunks = max(1, int(rng.paretovariate(1.5)))
+        else:
+            area_of = land_index
+            land_index += 1
+            name = land_name(area_of)
+            chunks = min(ROW_WIDTH, max(1, int(rng.paretovariate(0.9) * 4)))
+            player_total = min(max_players, int(rng.paretovariate(1.1)))
+            players = list(dict.fromkeys(player_name(int(player_pool * rng.random() ** 2))
+                                         for _ in range(player_total)))
+            nation = None
+            if rng.random() < nation_rate:
+                slot = bisect.bisect_left(nation_weights, rng.random() * nation_weights[-1])
+                if nations[slot] is None:
+                    nations[slot] = {'name': f"{land_name(lands + slot)} Nation", 'level': rng.choice(NATION_LEVELS),
+                                     'capital': name, 'lands': 0, 'players': 0}
+                nation = nations[slot]
+                nation['lands'] += 1
+                nation['players'] += len(players)
+            balance = round(rng.lognormvariate(9, 2.5), 2)
+            detail = build_detail(name, rng.choice(LAND_LEVELS), balance, chunks, players, nation)
+            recent.append((area_of, name, detail))
+
+        vertices = min(max_vertices, 4 + 2 * int(rng.paretovariate(1.2) * 2))
+        columns = land_columns(rng, chunks, vertices)
+        x, z = layout.place(len(columns), max(columns))
+        marker = {
+            'label': name,
+            'detail': detail,
+            'position': {'x': float((x + len(columns) / 2) * 16), 'y': 64.0, 'z': float((z + max(columns) / 2) * 16)},
+            'shape': staircase_shape(x, z, columns),
+            **MARKER_STYLE,
+        }
+        yield f"lands.{area_of}.{marker_index}", marker
+
+
+def write_synthetic_payload(path: str, count: int, seed: int = 0, **options) -> int:
+    """Stream a generated markers.json to path without holding it in memory; returns the markers written"""
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{' + json.dumps(LANDS_MARKER_SET) + ':{"label":"Lands","toggleable":true,'
+                '"defaultHidden":false,"sorting":0,"markers":{')
+        for marker_id, marker in iter_synthetic_markers(count, seed, **options):
+            if written:
+                f.write(',')
+            f.write(json.dumps(marker_id))
+            f.write(':')
+            f.write(json.dumps(marker, ensure_ascii=False, separators=(',', ':')))
+            written += 1
+        f.write('}}}')
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic BlueMap Lands markers.json")
+    parser.add_argument('count', type=int, help="markers to generate (1000 to 1000000 are typical)")
+    parser.add_argument('-o', '--output', default='markers.json')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--duplicate-rate', type=float, default=0.08,
+                        help="share of markers that are extra areas of an earlier land")
+    parser.add_argument('--nation-rate', type=float, default=0.8, help="share of lands in a nation")
+    parser.add_argument('--max-players', type=int, default=400)
+    parser.add_argument('--max-vertices', type=int, default=2000)
+    args = parser.parse_args()
+
+    written = write_synthetic_payload(args.output, args.count, args.seed, duplicate_rate=args.duplicate_rate,
+                                      nation_rate=args.nation_rate, max_players=args.max_players,
+                                      max_vertices=args.max_vertices)
+    print(f"Wrote {written} markers to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
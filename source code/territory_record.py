@@ -0,0 +1,82 @@
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator
+
+from detail_parser import DETAIL_FIELDS
+from geometry import GEOMETRY_FIELDS
+from player_registry import PlayerList
+
+# Fields of a territory, in the order they are written out
+TERRITORY_FIELDS = (
+    'name', 'position', *DETAIL_FIELDS, 'territory_area', *GEOMETRY_FIELDS,
+    'shape_coordinates', 'coordinate_count', 'detail_html',
+)
+
+# Raw marker data a lean record leaves out; its shape is still kept once, in the coordinate store
+LEAN_OMITTED = ('shape_coordinates', 'detail_html')
+
+_FIELD_SET = frozenset(TERRITORY_FIELDS)
+_MISSING = object()
+
+
+class TerritoryRecord(MutableMapping):
+    """
+    One territory with its fields in slots rather than a per-record dict,
+    which is most of a territory's memory once the raw HTML and shape are
+    dropped. Reads and writes like the dict it replaces; a field that was
+    never set is absent, so lean records serialize without it.
+    """
+
+    __slots__ = TERRITORY_FIELDS
+
+    def __init__(self, *args, **fields):
+        for key, value in dict(*args, **fields).items():
+            setattr(self, key, value)
+
+    def __getitem__(self, key: str) -> Any:
+        value = getattr(self, key, _MISSING) if key in _FIELD_SET else _MISSING
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in _FIELD_SET:
+            raise KeyError(f"{key!r} is not a territory field")
+        setattr(self, key, value)
+
+    def __delitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        delattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _FIELD_SET and hasattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in TERRITORY_FIELDS if hasattr(self, key))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"TerritoryRecord({self.to_dict()!r})"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in _FIELD_SET else default
+
+    def to_dict(self) -> Dict:
+        """The set fields as a plain dict, in output order"""
+        fields = {}
+        for key in TERRITORY_FIELDS:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                fields[key] = value
+        return fields
+
+
+def json_default(value: Any) -> Any:
+    """json.dump default= hook serializing territory records as their dicts and player lists as names"""
+    if isinstance(value, TerritoryRecord):
+        return value.to_dict()
+    if isinstance(value, PlayerList):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# The scraper's modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_markers import write_synthetic_payload  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def payload(tmp_path_factory) -> str:
+    """A synthetic markers.json with split lands, nations and shared players"""
+    path = str(tmp_path_factory.mktemp('payload') / 'markers.json')
+    write_synthetic_payload(path, 600, seed=3)
+    return path
@@ -0,0 +1,261 @@
+"""Payloads, stand-in servers and reference implementations shared by the tests and benchmark.py"""
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from coordinate_store import CoordinateStore
+from main import StoneworksDataScraper
+from territory_record import json_default
+
+LANDS = 'me.angeschossen.lands'
+
+
+def run_scrape(markers_file: Optional[str], output_dir: str, **options) -> StoneworksDataScraper:
+    """Parse and aggregate a saved markers.json without log output, and unless given them fetch state or reports"""
+    os.makedirs(output_dir, exist_ok=True)
+    options = {'state_file': None, 'report_file': None, 'metrics_file': None, **options}
+    scraper = StoneworksDataScraper(markers_file=markers_file, output_dir=str(output_dir), **options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.scrape_bluemap_markers()
+    return scraper
+
+
+def output_digest(scraper: StoneworksDataScraper) -> str:
+    """Hash the aggregated outputs the way save_data_to_files serializes them"""
+    digest = hashlib.sha256()
+    for data in (scraper.nations_data, scraper.territories_data):
+        digest.update(json.dumps(data, indent=2, ensure_ascii=False, default=json_default).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def standin_nation_page(index: int) -> str:
+    """Build a wiki-like nation article"""
+    return (
+        f"<html><body><h1>Nation {index}</h1><table class='infobox'>"
+        f"<tr><th>Capital:</th><td>Town {index}</td></tr>"
+        f"<tr><th>Leader:</th><td>Player{index}</td></tr>"
+        f"<tr><th>Government:</th><td>Monarchy</td></tr>"
+        f"<tr><th>Founded:</th><td>March {2020 + index % 4}</td></tr>"
+        f"<tr><th>Population:</th><td>{index * 3}</td></tr></table>"
+        f"<p>The kingdom claims {index * 10} chunks around {index}, {-index}.</p>"
+        f"<ul><li>Capital city of Town {index}</li><li>Town of Harbour {index}</li></ul>"
+        f"</body></html>"
+    )
+
+
+def serve_standin_wiki(pages: int, latency: float) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Serve a category page and nation articles from a local thread, with
+    per-request latency. server.requests lists (monotonic time, path) of
+    every request as it arrived.
+    """
+    links = ''.join(f"<a href='/wiki/Nation_{i}'>Nation {i}</a>" for i in range(pages))
+    category = f"<html><body>{links}<a href='/wiki/Template:Nation'>Template</a></body></html>"
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.server.requests.append((time.monotonic(), self.path))
+            time.sleep(latency)
+            if self.path == '/wiki/Category:Nations':
+                body = category
+            elif self.path.startswith('/wiki/Nation_'):
+                body = standin_nation_page(int(self.path.rsplit('_', 1)[1]))
+            else:
+                self.send_error(404)
+                return
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def sample_coordinate_store(territories: int, seed: int = 0) -> CoordinateStore:
+    """Fill a coordinate store with chunk-aligned staircase outlines, some territories split over several markers"""
+    rng = random.Random(seed)
+    store = CoordinateStore()
+    for i in range(territories):
+        label = f"Land_{i}"
+        for _ in range(1 if rng.random() < 0.9 else rng.randint(2, 4)):
+            x0, z0 = rng.randrange(-1250, 1250) * 16, rng.randrange(-1250, 1250) * 16
+            steps = rng.randint(2, 20)
+            shape = [{'x': x0, 'z': z0}]
+            x, z = x0, z0
+            for _ in range(steps):
+                x += rng.randint(1, 8) * 16
+                shape.append({'x': x, 'z': z})
+                z += rng.randint(1, 8) * 16
+                shape.append({'x': x, 'z': z})
+            shape.append({'x': x0, 'z': z})
+            store.add_shape(label, None, shape)
+    return store
+
+
+# The per-field BeautifulSoup extractors wiki_extractor replaced, kept as
+# its parity reference: each re-reads the whole page text
+
+def extract_population(soup: BeautifulSoup) -> Optional[int]:
+    """Extract population from nation page"""
+    patterns = [
+        r'population[:\s]*(\d+)',
+        r'citizens[:\s]*(\d+)',
+        r'inhabitants[:\s]*(\d+)'
+    ]
+
+    text = soup.get_text().lower()
+    for pattern in patterns:
+        match = re.search(pattern, text)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def extract_capital(soup: BeautifulSoup) -> Optional[str]:
+    """Extract capital city from nation page"""
+    patterns = [
+        r'capital[:\s]*([^\n\r,]+)',
+        r'capitol[:\s]*([^\n\r,]+)'
+    ]
+
+    text = soup.get_text()
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def extract_leader(soup: BeautifulSoup) -> Optional[str]:
+    """Extract leader/ruler from nation page"""
+    patterns = [
+        r'leader[:\s]*([^\n\r,]+)',
+        r'ruler[:\s]*([^\n\r,]+)',
+        r'king[:\s]*([^\n\r,]+)',
+        r'president[:\s]*([^\n\r,]+)',
+        r'emperor[:\s]*([^\n\r,]+)'
+    ]
+
+    text = soup.get_text()
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def extract_coordinates(soup: BeautifulSoup) -> List[Tuple[int, int]]:
+    """Extract coordinates from nation page"""
+    coords = []
+    patterns = [
+        r'(\-?\d+)[,\s]+(\-?\d+)',
+        r'x[:\s]*(\-?\d+)[,\s]*z[:\s]*(\-?\d+)',
+        r'coords?[:\s]*(\-?\d+)[,\s]*(\-?\d+)'
+    ]
+
+    text = soup.get_text()
+    for pattern in patterns:
+        matches = re.findall(pattern, text, re.IGNORECASE)
+        for match in matches:
+            try:
+                x, z = int(match[0]), int(match[1])
+                coords.append((x, z))
+            except ValueError:
+                continue
+
+    return coords
+
+
+def extract_cities(soup: BeautifulSoup) -> List[str]:
+    """Extract cities/towns from nation page"""
+    cities = []
+
+    # Look for lists of cities
+    for list_item in soup.find_all(['li', 'ul']):
+        text = list_item.get_text().strip()
+        if any(keyword in text.lower() for keyword in ['city', 'town', 'settlement']):
+            # Extract city names
+            city_matches = re.findall(r'([A-Z][a-zA-Z\s]+)', text)
+            cities.extend([city.strip() for city in city_matches if len(city.strip()) > 2])
+
+    return list(set(cities))  # Remove duplicates
+
+
+def extract_territory_size(soup: BeautifulSoup) -> Optional[str]:
+    """Extract territory/area information"""
+    patterns = [
+        r'area[:\s]*([^\n\r,]+)',
+        r'territory[:\s]*([^\n\r,]+)',
+        r'size[:\s]*([^\n\r,]+)',
+        r'(\d+)\s*(?:chunks?|blocks?|km²?)'
+    ]
+
+    text = soup.get_text()
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def extract_founding_date(soup: BeautifulSoup) -> Optional[str]:
+    """Extract founding date"""
+    patterns = [
+        r'founded[:\s]*([^\n\r,]+)',
+        r'established[:\s]*([^\n\r,]+)',
+        r'created[:\s]*([^\n\r,]+)'
+    ]
+
+    text = soup.get_text()
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def extract_government_type(soup: BeautifulSoup) -> Optional[str]:
+    """Extract government type"""
+    patterns = [
+        r'government[:\s]*([^\n\r,]+)',
+        r'(?:kingdom|republic|empire|federation|union|state)[^\n\r,]*'
+    ]
+
+    text = soup.get_text()
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return match.group(1).strip() if match.groups() else match.group(0).strip()
+    return None
+
+
+def reference_nation_fields(soup: BeautifulSoup) -> Dict:
+    """Extract nation fields with the per-field extract_* functions"""
+    return {
+        'population': extract_population(soup),
+        'capital': extract_capital(soup),
+        'leader': extract_leader(soup),
+        'coordinates': extract_coordinates(soup),
+        'cities': extract_cities(soup),
+        'territory_size': extract_territory_size(soup),
+        'founding_date': extract_founding_date(soup),
+        'government_type': extract_government_type(soup),
+    }
@@ -0,0 +1,50 @@
+from borders import border_graph
+from coordinate_store import CoordinateStore
+
+
+def square(x0, z0, x1, z1):
+    return [{'x': x0, 'z': z0}, {'x': x1, 'z': z0}, {'x': x1, 'z': z1}, {'x': x0, 'z': z1}]
+
+
+def graph_of(shapes, band_rows=64):
+    store = CoordinateStore()
+    for label, nation, shape in shapes:
+        store.add_shape(label, nation, shape)
+    graph = border_graph(store, band_rows)
+    return graph, {node['name']: node for node in graph['territories']}, {node['name']: node for node in graph['nations']}
+
+
+def test_neighbours_share_a_border():
+    graph, lands, nations = graph_of([('A', 'NA', square(0, 0, 64, 64)), ('B', 'NB', square(64, 0, 128, 64))])
+    assert (lands['A']['chunks'], lands['B']['chunks']) == (16, 16)
+    assert graph['territory_edges'] == [{'source': 'A', 'target': 'B', 'border': 64, 'contested_chunks': 0}]
+    assert graph['nation_edges'] == [{'source': 'NA', 'target': 'NB', 'border': 64, 'contested_chunks': 0}]
+    assert lands['A']['unclaimed_border'] == 3 * 64
+
+
+def test_surrounded_land_is_an_enclave():
+    # B fills the hole A's ring leaves
+    ring = [('A', None, square(0, 0, 48, 16)), ('A', None, square(0, 32, 48, 48)),
+            ('A', None, square(0, 16, 16, 32)), ('A', None, square(32, 16, 48, 32)),
+            ('B', None, square(16, 16, 32, 32))]
+    for band_rows in (1, 64):
+        _, lands, _ = graph_of(ring, band_rows)
+        assert lands['B']['enclave_of'] == 'A'
+        assert lands['A']['enclave_of'] is None
+
+
+def test_land_drawn_inside_another_is_an_enclave():
+    _, lands, nations = graph_of([('A', 'NA', square(0, 0, 320, 320)), ('E', 'NE', square(96, 96, 160, 160))])
+    assert lands['E']['chunks'] == 0
+    assert lands['E']['enclave_of'] == 'A'
+    assert nations['NE']['enclave_of'] == 'NA'
+
+
+def test_nation_contests_count_each_chunk_once():
+    graph, lands, nations = graph_of([('A1', 'NA', square(0, 0, 64, 64)), ('A2', 'NA', square(0, 0, 64, 64)),
+                                      ('B', 'NB', square(0, 0, 32, 64))])
+    # 8 chunks claimed by A1, A2 and B; the other 8 only by the two lands of NA
+    assert lands['A1']['contested_chunks'] == 16
+    assert nations['NA']['contested_chunks'] == 8
+    assert nations['NB']['contested_chunks'] == 8
+    assert graph['nation_edges'] == [{'source': 'NA', 'target': 'NB', 'border': 0, 'contested_chunks': 8}]
@@ -0,0 +1,57 @@
+import json
+
+from census import census_month, find_columns, load_census_pages, normalize_census, parse_census_tables
+
+PAGE = b"""<html><body><p>Census of March 2021</p>
+<table>
+  <tr><th>Rank</th><th>Nation Name</th><th>Flag</th><th>Population (players)</th></tr>
+  <tr><td>1</td><td>Avalon<sup>[1]</sup></td><td></td><td>1,204 citizens</td></tr>
+  <tr><td>2</td><td>  New   Brill </td><td></td><td>87</td></tr>
+  <tr><td>3</td><td></td><td></td><td>12</td></tr>
+  <tr><td>4</td><td>Cair</td><td></td><td>unknown</td></tr>
+  <tr><td>5</td><td>Short row</td></tr>
+</table>
+<table>
+  <tr><td>Region</td><td>Count</td></tr>
+  <tr><td>Avalon</td><td>999</td></tr>
+  <tr><td>Dun</td><td>5</td></tr>
+</table>
+</body></html>"""
+
+
+def test_header_detection():
+    assert find_columns(['Rank', 'Nation Name', 'Flag', 'Population (players)']) == (1, 3)
+    assert find_columns(['Country', 'Citizens']) == (0, 1)
+    assert find_columns(['Rank', 'Flag']) is None
+    # One column can't be both
+    assert find_columns(['Nation players']) is None
+
+
+def test_tables_read_by_header_then_first_columns():
+    rows = parse_census_tables(PAGE, 'page', '2021-03')
+    assert [(row['nation'], row['population']) for row in rows] == [
+        ('Avalon', 1204), ('New Brill', 87), ('Avalon', 999), ('Dun', 5),
+    ]
+    assert {(row['month'], row['source']) for row in rows} == {('2021-03', 'page')}
+
+
+def test_first_figure_per_nation_and_month_wins():
+    rows = normalize_census(parse_census_tables(PAGE, 'page', '2021-03') +
+                            parse_census_tables(PAGE, 'older', '2020-10'))
+    assert [(row['nation'], row['month'], row['population']) for row in rows] == [
+        ('Avalon', '2020-10', 1204), ('Avalon', '2021-03', 1204), ('Dun', '2020-10', 5), ('Dun', '2021-03', 5),
+        ('New Brill', '2020-10', 87), ('New Brill', '2021-03', 87),
+    ]
+
+
+def test_pages_file_months(tmp_path):
+    path = tmp_path / 'census_pages.json'
+    path.write_text(json.dumps(['/wiki/Census_October_2020', {'url': '/wiki/Census', 'month': '2021-01'},
+                                '/wiki/Census_Latest']))
+    assert load_census_pages(str(path)) == [
+        {'url': '/wiki/Census_October_2020', 'month': '2020-10'},
+        {'url': '/wiki/Census', 'month': '2021-01'},
+        {'url': '/wiki/Census_Latest', 'month': None},
+    ]
+    assert census_month('march-2021') == '2021-03'
+    assert load_census_pages(str(tmp_path / 'absent.json')) == []
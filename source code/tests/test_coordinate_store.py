@@ -0,0 +1,45 @@
+import pytest
+
+from coordinate_store import DEFAULT_Y, CoordinateStore, MappedCoordinates
+from tests.helpers import sample_coordinate_store
+
+
+def round_trip(store, tmp_path):
+    path = str(tmp_path / 'coordinates.bin')
+    store.write_binary(path)
+    return MappedCoordinates(path)
+
+
+def test_binary_round_trip(tmp_path):
+    store = sample_coordinate_store(200, seed=4)
+    mapped = round_trip(store, tmp_path)
+    assert (len(mapped), mapped.segment_count) == (len(store), store.segment_count)
+    assert list(mapped.offsets) == list(store.offsets)
+    for axis in ('x', 'y', 'z'):
+        assert list(getattr(mapped, axis)) == list(getattr(store, axis))
+    assert mapped.labels == store.labels and mapped.nations == store.nations
+    assert mapped.segment(7) == store.segment(7)
+
+
+def test_empty_store_round_trips(tmp_path):
+    mapped = round_trip(CoordinateStore(), tmp_path)
+    assert (len(mapped), mapped.segment_count) == (0, 0)
+    assert list(mapped.offsets) == [0]
+    assert mapped.labels == [] and mapped.nations == []
+
+
+def test_non_ascii_labels_and_missing_y(tmp_path):
+    store = CoordinateStore()
+    store.add_shape('Ünïcødé 城', 'Nação', [{'x': -16.5, 'z': 32}, {'x': 0, 'y': 70, 'z': 0}])
+    store.add_shape('Empty', None, [])
+    mapped = round_trip(store, tmp_path)
+    assert mapped.labels == ['Ünïcødé 城', 'Empty'] and mapped.nations == ['Nação', None]
+    assert list(zip(mapped.x, mapped.y, mapped.z)) == [(-16.5, DEFAULT_Y, 32.0), (0.0, 70.0, 0.0)]
+    assert mapped.segment(1) == (2, 2)
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'coordinates.bin'
+    path.write_bytes(b'NOTCOORD' + bytes(64))
+    with pytest.raises(ValueError):
+        MappedCoordinates(str(path))
@@ -0,0 +1,36 @@
+import pytest
+
+from detail_parser import check_detail_parity, parse_detail
+from synthetic_markers import iter_synthetic_markers
+
+EDGE_CASES = [
+    '',
+    'Level: Town<br>Chunks: 3',
+    '<div>Balance: $1,234.50<br>Players (2): Alice, Bob</div>',
+    '<span title="a > b">Level: City</span><br>Chunks: 7',
+    '<!-- note --><div>Level: Village</div>',
+    '<div>Players (1): Tom &amp; Jerry<br></div>',
+    '<div>Chunks: 4<br>This land belongs to nation Foo Bar:<br>Level: Kingdom<br>Capital: Foo</div>',
+    '<div>Level: Town<br>Chunks: 2 <b>unclosed',
+    '<script>Level: Fake</script>Level: Real',
+]
+
+
+@pytest.mark.parametrize('detail', EDGE_CASES)
+def test_fast_path_matches_beautifulsoup(detail):
+    assert check_detail_parity(detail)
+
+
+def test_synthetic_details_match_beautifulsoup():
+    details = [marker['detail'] for _, marker in iter_synthetic_markers(400, seed=1)]
+    assert [detail for detail in details if not check_detail_parity(detail)] == []
+
+
+def test_nation_fields():
+    fields = parse_detail('<div>Level: Town<br>\nBalance: $2,000.00<br>\nChunks: 12<br>\n'
+                          'Players (2): Ann, Bo<br>\n<br>This land belongs to nation Avalon:<br>\n'
+                          'Level: Empire<br>\nCapital: Camelot<br></div>')
+    assert fields == {
+        'level': 'Town', 'balance': 2000.0, 'chunks': 12, 'player_count': 2, 'players': ['Ann', 'Bo'],
+        'nation_name': 'Avalon', 'nation_level': 'Empire', 'nation_capital': 'Camelot',
+    }
@@ -0,0 +1,103 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from main import StoneworksDataScraper
+from tests.helpers import run_scrape
+
+ETAG = '"v1"'
+
+
+@pytest.fixture
+def markers_server(payload):
+    """Serve the payload with an ETag, answering 304 to a matching If-None-Match"""
+    with open(payload, 'rb') as f:
+        body = f.read()
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(dict(self.headers))
+            if self.headers.get('If-None-Match') == ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', ETAG)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/markers.json", requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def no_parsing(monkeypatch):
+    """Fail the test if a payload gets aggregated"""
+    def aggregate(self, markers):
+        raise AssertionError("payload was parsed")
+    monkeypatch.setattr(StoneworksDataScraper, 'aggregate_markers', aggregate)
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_not_modified_skips_the_scrape(markers_server, tmp_path, stream):
+    url, requests_seen = markers_server
+    state = str(tmp_path / 'state.json')
+    first = run_scrape(None, tmp_path, markers_url=url, state_file=state, stream_markers=stream)
+    assert first.territories_data and not first.markers_unchanged
+    first.save_fetch_state()
+    assert json.loads(open(state).read())['etag'] == ETAG
+
+    second = run_scrape(None, tmp_path, markers_url=url, state_file=state, stream_markers=stream)
+    assert second.markers_unchanged
+    assert requests_seen[-1].get('If-None-Match') == ETAG
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_unchanged_hash_skips_parsing(payload, tmp_path, stream, request):
+    state = str(tmp_path / 'state.json')
+    run_scrape(payload, tmp_path, state_file=state, stream_markers=stream).save_fetch_state()
+
+    request.getfixturevalue('no_parsing')
+    scraper = run_scrape(payload, tmp_path, state_file=state, stream_markers=stream)
+    assert scraper.markers_unchanged and not scraper.territories_data
+
+
+def test_streamed_download_is_hashed_before_parsing(markers_server, tmp_path, request):
+    url, _ = markers_server
+    state = str(tmp_path / 'state.json')
+    run_scrape(None, tmp_path, markers_url=url, state_file=state, stream_markers=True).save_fetch_state()
+    # Without the ETag the server sends the whole payload again; its hash still matches
+    with open(state) as f:
+        saved = json.load(f)
+    with open(state, 'w') as f:
+        json.dump({**saved, 'etag': None}, f)
+
+    request.getfixturevalue('no_parsing')
+    assert run_scrape(None, tmp_path, markers_url=url, state_file=state, stream_markers=True).markers_unchanged
+
+
+@pytest.mark.parametrize('contents', [None, '', '{"source": ', '[1, 2]'])
+def test_missing_or_corrupt_state_means_a_full_scrape(payload, tmp_path, contents):
+    state = tmp_path / 'state.json'
+    if contents is not None:
+        state.write_text(contents)
+    scraper = run_scrape(payload, tmp_path, state_file=str(state))
+    assert scraper.territories_data and not scraper.markers_unchanged
+    scraper.save_fetch_state()
+    assert json.loads(state.read_text())['content_hash'] == scraper.fetch_state['content_hash']
+
+
+def test_force_ignores_the_saved_state(payload, tmp_path):
+    state = str(tmp_path / 'state.json')
+    run_scrape(payload, tmp_path, state_file=state).save_fetch_state()
+    assert run_scrape(payload, tmp_path, state_file=state, force=True).territories_data
@@ -0,0 +1,39 @@
+import pytest
+
+from coordinate_store import CoordinateStore
+from geometry import np, polygon_area, territory_geometry
+from tests.helpers import sample_coordinate_store
+
+
+def square(x, z, size):
+    return [{'x': x, 'z': z}, {'x': x + size, 'z': z}, {'x': x + size, 'z': z + size}, {'x': x, 'z': z + size}]
+
+
+def test_numpy_matches_pure_python():
+    if np is None:
+        pytest.skip("numpy not installed")
+    store = sample_coordinate_store(300, seed=2)
+    assert territory_geometry(store, use_numpy=True) == territory_geometry(store, use_numpy=False)
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_split_territory_adds_up(use_numpy):
+    if use_numpy and np is None:
+        pytest.skip("numpy not installed")
+    store = CoordinateStore()
+    store.add_shape('Land', None, square(0, 0, 16))
+    store.add_shape('Land', None, square(32, 0, 16))
+    store.add_shape('Other', None, square(0, 0, 32)[::-1])
+    geometry = territory_geometry(store, use_numpy)
+    land = geometry['Land']
+    assert land['claimed_area'] == 512
+    assert land['perimeter'] == 128
+    assert land['bounding_box'] == {'min_x': 0, 'min_z': 0, 'max_x': 48, 'max_z': 16}
+    assert land['centroid'] == {'x': 24, 'z': 8}
+    # Winding order doesn't change the area
+    assert geometry['Other']['claimed_area'] == 1024
+
+
+def test_polygon_area():
+    assert polygon_area(square(-8, -8, 16)) == 256
+    assert polygon_area(square(0, 0, 16)[:2]) == 0
@@ -0,0 +1,79 @@
+import pytest
+
+from history import HistoryStore
+
+
+def nation(name, balance, chunks, players, territories):
+    return {'name': name, 'total_balance': balance, 'total_chunks': chunks, 'unique_players': players,
+            'territories': [f'{name} {i}' for i in range(territories)]}
+
+
+def territory(name, nation_name, balance, chunks, players):
+    return {'name': name, 'nation_name': nation_name, 'balance': balance, 'chunks': chunks, 'player_count': players}
+
+
+@pytest.fixture
+def store(tmp_path):
+    with HistoryStore(str(tmp_path / 'history.db')) as store:
+        store.record_snapshot(
+            [nation('Avalon', 500.0, 40, 9, 3), nation('Brill', 900.0, 10, 4, 1), nation('Cair', 100.0, 20, 2, 2)],
+            [territory('Camelot', 'Avalon', 300.0, 30, 6), territory('Lone', None, 50.0, 5, 1)],
+            taken_at='2024-01-01 12:00:00', source='test', content_hash='a',
+        )
+        store.record_snapshot(
+            [nation('Avalon', 500.0, 40, 9, 3), nation('Brill', 50.0, 10, 4, 1), nation('Cair', 1000.0, 25, 2, 2),
+             nation('Dun', 200.0, 5, 1, 1)],
+            [territory('Camelot', 'Avalon', 310.0, 30, 6), territory('Lone', None, 400.0, 5, 1)],
+            taken_at='2024-01-08 12:00:00', source='test', content_hash='b',
+        )
+        yield store
+
+
+def test_snapshots_resolve_by_id_and_date(store):
+    assert store.snapshots() == [(1, '2024-01-01 12:00:00'), (2, '2024-01-08 12:00:00')]
+    assert store.resolve_snapshot(None) == 2
+    assert store.resolve_snapshot('1') == 1
+    assert store.resolve_snapshot('2024-01-07') == 1
+    assert store.resolve_snapshot('2024-01-08') == 2
+    assert store.resolve_snapshot('2023-12-31') is None
+
+
+def test_top_per_snapshot(store):
+    assert store.top('balance', when='2024-01-01') == [
+        {'rank': 1, 'name': 'Brill', 'value': 900.0},
+        {'rank': 2, 'name': 'Avalon', 'value': 500.0},
+        {'rank': 3, 'name': 'Cair', 'value': 100.0},
+    ]
+    assert [row['name'] for row in store.top('balance', limit=2)] == ['Cair', 'Avalon']
+    # Equal values rank by name
+    assert [row['name'] for row in store.top('players', when=1)] == ['Avalon', 'Brill', 'Cair']
+    assert store.top('balance', entity='territory') == [
+        {'rank': 1, 'name': 'Lone', 'value': 400.0}, {'rank': 2, 'name': 'Camelot', 'value': 310.0},
+    ]
+
+
+def test_movers_between_snapshots(store):
+    movers = store.top_movers('2024-01-01', metric='balance')
+    assert movers[:2] == [
+        {'name': 'Brill', 'old_rank': 1, 'new_rank': 4, 'change': -3, 'old_value': 900.0, 'new_value': 50.0},
+        {'name': 'Cair', 'old_rank': 3, 'new_rank': 1, 'change': 2, 'old_value': 100.0, 'new_value': 1000.0},
+    ]
+    # Nations missing from either snapshot have no move
+    assert 'Dun' not in [row['name'] for row in movers]
+    assert store.top_movers('2023-01-01') == []
+
+
+def test_rank_history(store):
+    assert store.rank_history('Cair', 'balance') == [
+        {'snapshot': 1, 'taken_at': '2024-01-01 12:00:00', 'rank': 3, 'value': 100.0},
+        {'snapshot': 2, 'taken_at': '2024-01-08 12:00:00', 'rank': 1, 'value': 1000.0},
+    ]
+    assert [row['rank'] for row in store.rank_history('Lone', 'balance', entity='territory')] == [2, 1]
+    assert store.rank_history('Nowhere') == []
+
+
+def test_unknown_metric_is_rejected(store):
+    with pytest.raises(ValueError, match='territories'):
+        store.top('territories', entity='territory')
+    with pytest.raises(ValueError, match='entity'):
+        store.top('balance', entity='player')
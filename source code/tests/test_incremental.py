@@ -0,0 +1,49 @@
+import json
+import random
+
+from tests.helpers import LANDS, output_digest, run_scrape
+
+
+def changed_payload(source: str, path: str, seed: int = 0) -> str:
+    """Copy of a payload with some markers edited, moved, removed and added"""
+    with open(source, encoding='utf-8') as f:
+        data = json.load(f)
+    markers = data[LANDS]['markers']
+    rng = random.Random(seed)
+    ids = list(markers)
+    for marker_id in rng.sample(ids, 40):
+        marker = markers[marker_id]
+        marker['detail'] = marker['detail'].replace('Chunks: ', 'Chunks: 1', 1)
+    for marker_id in rng.sample(ids, 10):
+        markers[marker_id]['shape'] = markers[marker_id]['shape'][::-1]
+    for marker_id in rng.sample(ids, 15):
+        markers.pop(marker_id, None)
+    for index, marker_id in enumerate(rng.sample(list(markers), 5)):
+        markers[f'copy.{index}'] = {**markers[marker_id], 'label': f'New land {index}'}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    return path
+
+
+def test_incremental_matches_full_scrape(payload, tmp_path):
+    changed = changed_payload(payload, str(tmp_path / 'changed.json'))
+    cache = tmp_path / 'cache'
+
+    first = run_scrape(payload, cache, incremental=True)
+    assert output_digest(first) == output_digest(run_scrape(payload, tmp_path / 'full-before'))
+    first.save_delta_file()
+
+    # A fresh scraper picks the cache up from disk, as the next run would
+    second = run_scrape(changed, cache, incremental=True)
+    assert output_digest(second) == output_digest(run_scrape(changed, tmp_path / 'full-after'))
+    delta = second.delta['territories']
+    assert delta['changed'] and delta['removed'] and delta['added']
+
+
+def test_incremental_in_memory_run_matches_full_scrape(payload, tmp_path):
+    changed = changed_payload(payload, str(tmp_path / 'changed.json'), seed=1)
+    scraper = run_scrape(payload, tmp_path / 'watch', incremental=True, stream_markers=True)
+    # Like --watch: the same scraper reads the next payload
+    scraper.markers_file = changed
+    scraper.scrape_bluemap_markers()
+    assert output_digest(scraper) == output_digest(run_scrape(changed, tmp_path / 'full'))
@@ -0,0 +1,27 @@
+import json
+
+from marker_stream import iter_file_chunks, iter_marker_set, load_marker_set
+from tests.helpers import LANDS, output_digest, run_scrape
+
+
+def test_streamed_markers_match_whole_payload(payload):
+    whole = list(load_marker_set(payload).items())
+    # Small chunks split keys, strings and escapes across reads
+    for chunk_size in (7, 4096):
+        assert list(iter_marker_set(iter_file_chunks(payload, chunk_size))) == whole
+
+
+def test_other_marker_sets_are_skipped(tmp_path):
+    path = tmp_path / 'markers.json'
+    path.write_text(json.dumps({
+        'shops': {'markers': {'s.1': {'label': 'Shop', 'detail': '{"nested": [1, 2]}'}}},
+        LANDS: {'label': 'Lands', 'markers': {'lands.1': {'label': 'A \\u00e9 "q"', 'shape': []}}},
+    }), encoding='utf-8')
+    assert list(iter_marker_set(iter_file_chunks(str(path), 5))) == [('lands.1', {'label': 'A \\u00e9 "q"', 'shape': []})]
+
+
+def test_streaming_scrape_matches_whole_payload(payload, tmp_path):
+    whole = run_scrape(payload, tmp_path / 'whole')
+    streamed = run_scrape(payload, tmp_path / 'streamed', stream_markers=True)
+    assert whole.territories_data
+    assert output_digest(streamed) == output_digest(whole)
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from merge_groups import load_merge_groups, merge_nations
+from player_registry import PlayerList, PlayerRegistry
+
+
+def nation(name, territories, players, chunks=1, balance=1.0):
+    return {'name': name, 'level': 'Kingdom', 'capital': territories[0], 'territories': territories,
+            'total_chunks': chunks, 'total_balance': balance, 'total_players': len(players),
+            'all_players': players}
+
+
+NATIONS = [
+    nation('Solo', ['S1'], ['Sam']),
+    nation('North', ['N1', 'Shared'], ['Ann', 'Bo'], chunks=10, balance=5.5),
+    nation('East', ['E1'], ['Cy']),
+    nation('South', ['Shared', 'S2'], ['Bo', 'Di'], chunks=4, balance=2.0),
+]
+
+
+def test_members_fold_into_first_member_position():
+    merged = merge_nations(NATIONS, {'Union': {'level': 'Empire', 'members': ['South', 'North']}})
+    assert [n['name'] for n in merged] == ['Solo', 'Union', 'East']
+    union = merged[1]
+    assert union['members'] == ['North', 'South']
+    assert union['level'] == 'Empire'
+    assert union['territories'] == ['N1', 'Shared', 'S2']
+    assert union['capital'] == 'N1'
+    assert list(union['all_players']) == ['Ann', 'Bo', 'Di']
+    assert union['unique_players'] == 3
+    assert (union['total_chunks'], union['total_balance'], union['total_players']) == (14, 7.5, 4)
+    assert merged[0] is NATIONS[0]
+
+
+def test_capital_is_the_largest_members():
+    assert merge_nations(NATIONS, {'Union': {'members': ['East', 'South']}})[2]['capital'] == 'Shared'
+    # Equal sizes keep the first member's capital
+    assert merge_nations(NATIONS, {'Union': {'members': ['Solo', 'East']}})[0]['capital'] == 'S1'
+
+
+def test_registry_players_are_deduplicated_by_id():
+    registry = PlayerRegistry()
+    nations = [dict(n, all_players=PlayerList(registry, registry.id_array(n['all_players']))) for n in NATIONS]
+    union = merge_nations(nations, {'Union': {'members': ['North', 'South']}}, registry)[1]
+    assert list(union['all_players']) == ['Ann', 'Bo', 'Di']
+    assert union['all_players'].registry is registry
+
+
+def test_groups_without_present_members_are_ignored():
+    assert merge_nations(NATIONS, {'Ghost': {'members': ['Nowhere']}}) == NATIONS
+
+
+def test_nation_in_two_groups_is_rejected(tmp_path):
+    path = tmp_path / 'merge_groups.json'
+    path.write_text(json.dumps({'A': {'members': ['North']}, 'B': {'members': ['North', 'East']}}))
+    with pytest.raises(ValueError, match='North'):
+        load_merge_groups(str(path))
+
+
+def test_missing_groups_file_means_no_groups(tmp_path):
+    assert load_merge_groups(str(tmp_path / 'absent.json')) == {}
+    assert load_merge_groups('') == {}
+
@@ -0,0 +1,66 @@
+import re
+
+from metrics import PROMETHEUS_PREFIX, STAGES, RunMetrics, prometheus_text, write_prometheus
+
+SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_]\w*="[^"\\]*",?)*\})? (-?[0-9.e+-]+)$')
+
+
+def finished_report(status='ok', **counters):
+    metrics = RunMetrics()
+    with metrics.stage('parse'):
+        pass
+    for name, amount in counters.items():
+        metrics.count(name, amount)
+    metrics.finish(status)
+    return metrics.report()
+
+
+def parse_exposition(text):
+    """Samples by (name, labels) from Prometheus text, checking every line is well formed"""
+    assert text.endswith('\n')
+    samples, typed = {}, set()
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            continue
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            assert kind == 'gauge' and name not in typed
+            typed.add(name)
+            continue
+        match = SAMPLE_RE.match(line)
+        assert match, line
+        name, labels, value = match.groups()
+        assert name in typed, f"{name} sampled before its TYPE line"
+        samples[name, labels or ''] = float(value)
+    return samples
+
+
+def test_single_run_exposition():
+    samples = parse_exposition(prometheus_text(finished_report(markers=120, payload_bytes=4096)))
+    assert samples[f'{PROMETHEUS_PREFIX}_markers', ''] == 120
+    assert samples[f'{PROMETHEUS_PREFIX}_payload_bytes', ''] == 4096
+    assert samples[f'{PROMETHEUS_PREFIX}_success', ''] == 1
+    assert samples[f'{PROMETHEUS_PREFIX}_unchanged', ''] == 0
+    stages = {labels for name, labels in samples if name == f'{PROMETHEUS_PREFIX}_stage_seconds'}
+    assert {f'{{stage="{stage}"}}' for stage in STAGES} <= stages
+
+
+def test_failed_and_unchanged_runs():
+    failed = parse_exposition(prometheus_text(finished_report('failed')))
+    assert failed[f'{PROMETHEUS_PREFIX}_success', ''] == 0
+    unchanged = parse_exposition(prometheus_text(finished_report('unchanged')))
+    assert unchanged[f'{PROMETHEUS_PREFIX}_success', ''] == 1
+    assert unchanged[f'{PROMETHEUS_PREFIX}_unchanged', ''] == 1
+
+
+def test_maps_get_labelled_samples(tmp_path):
+    report = {**finished_report(markers=30), 'maps': {'main': finished_report(markers=10),
+                                                         'abex1': finished_report(markers=20)}}
+    path = tmp_path / 'run_metrics.prom'
+    write_prometheus(str(path), report)
+    samples = parse_exposition(path.read_text())
+    assert samples[f'{PROMETHEUS_PREFIX}_markers', ''] == 30
+    assert samples[f'{PROMETHEUS_PREFIX}_markers', '{map="abex1"}'] == 20
+    assert (f'{PROMETHEUS_PREFIX}_stage_seconds', '{map="main",stage="parse"}') in samples
+    # Peak memory is per process, not per map
+    assert not [labels for name, labels in samples if name.endswith('peak_memory_bytes') and labels]
@@ -0,0 +1,24 @@
+from main import MultiMapScraper
+from multi_map import combine_nations
+
+
+def nation(name, territories, players, chunks=1):
+    return {'name': name, 'level': 'Kingdom', 'capital': territories[0], 'territories': territories,
+            'total_chunks': chunks, 'total_balance': 1.0, 'total_players': len(players), 'all_players': players}
+
+
+def test_combine_nations_across_maps():
+    combined = combine_nations([[nation('Solo', ['S1'], ['Sam']), nation('North', ['N1', 'Shared'], ['Ann', 'Bo'], 10)],
+                                [nation('North', ['Shared', 'N2'], ['Bo', 'Ed'], chunks=3)]])
+    north = combined[1]
+    assert north['territories'] == ['N1', 'Shared', 'N2']
+    assert list(north['all_players']) == ['Ann', 'Bo', 'Ed']
+    assert (north['total_chunks'], north['unique_players']) == (13, 3)
+
+
+def test_each_map_fetches_on_its_own_session(tmp_path):
+    sources = [{'name': name, 'url': f'https://example.com/{name}/markers.json', 'file': None} for name in 'ab']
+    scraper = MultiMapScraper(sources, output_dir=str(tmp_path), report_file=None, metrics_file=None)
+    sessions = [map_scraper.session for map_scraper in scraper.scrapers]
+    assert len(set(map(id, sessions))) == 2
+    assert scraper.session not in sessions
@@ -0,0 +1,88 @@
+import contextlib
+import gzip
+import io
+import os
+
+import pytest
+
+from atomic_files import atomic_open, write_atomic
+from output_writer import OutputWriter
+from tests.helpers import run_scrape
+
+
+def age(path):
+    """Backdate a file so a rewrite would show in its mtime"""
+    os.utime(path, (1_000_000, 1_000_000))
+
+
+def test_unchanged_bytes_are_not_rewritten(tmp_path):
+    path = str(tmp_path / 'data.json')
+    write_atomic(path, '{"a": 1}')
+    age(path)
+    write_atomic(path, '{"a": 1}')
+    assert os.stat(path).st_mtime == 1_000_000
+    write_atomic(path, '{"a": 2}')
+    assert os.stat(path).st_mtime != 1_000_000
+    assert os.listdir(tmp_path) == ['data.json']
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    write_atomic(path, b'old')
+    with pytest.raises(RuntimeError):
+        with atomic_open(path, 'wb') as f:
+            f.write(b'half')
+            raise RuntimeError
+    assert open(path, 'rb').read() == b'old'
+    assert os.listdir(tmp_path) == ['data.csv']
+
+
+def writer_run(tmp_path, compress, workers=2):
+    paths = [str(tmp_path / name) for name in ('a.json', 'b.csv')]
+    writer = OutputWriter(workers, compress)
+    writer.add('a', lambda: write_atomic(paths[0], '{"x": "é"}'), [paths[0]])
+    writer.add('b', lambda: write_atomic(paths[1], 'x,y\n1,2\n'), [paths[1]])
+    seconds = writer.run()
+    assert set(seconds) == {'a', 'b'}
+    return writer, paths
+
+
+def test_gzip_copies_are_written_then_deleted_when_off(tmp_path):
+    writer, paths = writer_run(tmp_path, compress=True)
+    assert writer.compressed == [f"{path}.gz" for path in paths]
+    for path in paths:
+        with gzip.open(f"{path}.gz", 'rb') as f:
+            assert f.read() == open(path, 'rb').read()
+
+    # Same output again: the .gz bytes match, so they're left alone
+    age(f"{paths[0]}.gz")
+    writer_run(tmp_path, compress=True)
+    assert os.stat(f"{paths[0]}.gz").st_mtime == 1_000_000
+
+    writer, _ = writer_run(tmp_path, compress=False)
+    assert writer.compressed == []
+    assert sorted(os.listdir(tmp_path)) == ['a.json', 'b.csv']
+
+
+def test_a_failing_job_surfaces_after_the_others_finish(tmp_path):
+    written = str(tmp_path / 'ok.txt')
+    writer = OutputWriter(2)
+
+    def fail():
+        raise OSError("disk full")
+    writer.add('fails', fail)
+    writer.add('ok', lambda: write_atomic(written, 'ok'))
+    with pytest.raises(OSError, match='disk full'):
+        writer.run()
+    assert open(written).read() == 'ok'
+
+
+def test_scrape_without_gzip_leaves_no_stale_copies(payload, tmp_path):
+    def save(**options):
+        scraper = run_scrape(payload, tmp_path, **options)
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraper.save_data_to_files()
+        return sorted(name for name in os.listdir(tmp_path) if name.endswith('.gz'))
+
+    assert 'nations_comprehensive.json.gz' in save(gzip_outputs=True)
+    assert save() == []
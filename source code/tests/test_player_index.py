@@ -0,0 +1,61 @@
+import pytest
+
+from player_index import CAPITAL_ROLE, MEMBER_ROLE, PlayerIndex, write_player_index
+
+TERRITORIES = [
+    {'name': 'Camelot', 'nation_name': 'Avalon', 'players': ['Ann', 'Zoë', 'bob']},
+    {'name': 'Lyonesse', 'nation_name': 'Avalon', 'players': ['Bob', '田中']},
+    {'name': 'Nowhere', 'nation_name': None, 'players': ['Ann']},
+]
+NATIONS = [{'name': 'Avalon', 'capital': 'Camelot', 'territories': ['Camelot', 'Lyonesse'],
+            'all_players': ['Ann', 'Zoë', 'bob', 'Bob', '田中']}]
+
+
+def round_trip(tmp_path, territories, nations):
+    path = str(tmp_path / 'player_index.bin')
+    count = write_player_index(path, territories, nations)
+    index = PlayerIndex(path)
+    assert len(index) == count
+    return index
+
+
+def test_lookup_round_trip(tmp_path):
+    index = round_trip(tmp_path, TERRITORIES, NATIONS)
+    assert index.lookup('Ann') == {
+        'player': 'Ann',
+        'territories': [{'name': 'Camelot', 'nation': 'Avalon'}, {'name': 'Nowhere', 'nation': None}],
+        'nations': [{'name': 'Avalon', 'role': CAPITAL_ROLE}],
+    }
+    assert index.lookup('田中')['nations'] == [{'name': 'Avalon', 'role': MEMBER_ROLE}]
+    assert index.lookup('Zoë')['territories'] == [{'name': 'Camelot', 'nation': 'Avalon'}]
+    assert index.lookup('Nobody') is None
+
+
+def test_names_match_case_insensitively_preferring_exact_case(tmp_path):
+    index = round_trip(tmp_path, TERRITORIES, NATIONS)
+    assert index.lookup('bob')['territories'] == [{'name': 'Camelot', 'nation': 'Avalon'}]
+    assert index.lookup('Bob')['territories'] == [{'name': 'Lyonesse', 'nation': 'Avalon'}]
+    assert index.lookup('ZOË')['player'] == 'Zoë'
+    assert 'ann' in index and 'annie' not in index
+
+
+def test_prefix_search(tmp_path):
+    index = round_trip(tmp_path, TERRITORIES, NATIONS)
+    assert index.search('b') == ['Bob', 'bob']
+    assert index.search('') == ['Ann', 'Bob', 'bob', 'Zoë', '田中']
+    assert index.search('', limit=2) == ['Ann', 'Bob']
+    assert index.search('田') == ['田中']
+    assert index.search('x') == []
+
+
+def test_empty_index_round_trips(tmp_path):
+    index = round_trip(tmp_path, [], [])
+    assert len(index) == 0
+    assert index.lookup('Ann') is None and index.search('') == []
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'player_index.bin'
+    path.write_bytes(bytes(64))
+    with pytest.raises(ValueError):
+        PlayerIndex(str(path))
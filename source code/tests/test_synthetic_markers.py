@@ -0,0 +1,27 @@
+import json
+
+from detail_parser import parse_detail
+from synthetic_markers import iter_synthetic_markers, write_synthetic_payload
+from tests.helpers import LANDS
+
+
+def test_payload_matches_generated_markers(tmp_path):
+    path = str(tmp_path / 'markers.json')
+    assert write_synthetic_payload(path, 300, seed=5) == 300
+    with open(path, encoding='utf-8') as f:
+        markers = json.load(f)[LANDS]['markers']
+    assert list(markers.items()) == list(iter_synthetic_markers(300, seed=5))
+
+
+def test_markers_look_like_a_live_map():
+    markers = [marker for _, marker in iter_synthetic_markers(1000, seed=2)]
+    labels = [marker['label'] for marker in markers]
+    # Some lands are split over several markers that repeat their detail
+    assert len(set(labels)) < len(labels)
+    assert all(len({m['detail'] for m in markers if m['label'] == label}) == 1 for label in set(labels[:50]))
+
+    fields = [parse_detail(marker['detail']) for marker in markers]
+    assert all(field['player_count'] == len(field['players']) for field in fields)
+    assert sum(1 for field in fields if field.get('nation_name')) > len(fields) // 2
+    assert max(field['player_count'] for field in fields) > 20
+    assert all(len(marker['shape']) >= 4 for marker in markers)
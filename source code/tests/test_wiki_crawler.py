@@ -0,0 +1,105 @@
+import asyncio
+import contextlib
+import io
+import threading
+import time
+
+import pytest
+import requests
+
+from main import StoneworksDataScraper
+from tests.helpers import serve_standin_wiki
+from wiki_crawler import crawl_pages
+
+
+@pytest.fixture
+def wiki():
+    server, base_url = serve_standin_wiki(12, latency=0.02)
+    yield server, base_url
+    server.shutdown()
+    server.server_close()
+
+
+def article_starts(server):
+    return [at for at, path in server.requests if path.startswith('/wiki/Nation_')]
+
+
+def test_scraper_crawls_every_nation_article(wiki):
+    server, base_url = wiki
+    scraper = StoneworksDataScraper(wiki_concurrency=4, wiki_rate=50.0)
+    scraper.wiki_base_url = base_url
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.scrape_wiki_nations()
+    # The template link on the category page is skipped
+    assert [nation['name'] for nation in scraper.nations_data] == [f'Nation {i}' for i in range(12)]
+    assert scraper.nations_data[5]['population'] == 15
+    assert scraper.nations_data[5]['capital'].startswith('Town 5')
+    assert not [path for _, path in server.requests if 'Template' in path]
+    assert len(article_starts(server)) == 12
+
+
+def test_max_pages_caps_the_crawl(wiki):
+    server, base_url = wiki
+    scraper = StoneworksDataScraper(wiki_concurrency=4, wiki_rate=50.0, wiki_max_pages=3)
+    scraper.wiki_base_url = base_url
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.scrape_wiki_nations()
+    assert len(scraper.nations_data) == 3
+    assert len(article_starts(server)) == 3
+
+
+def test_requests_start_no_faster_than_the_rate(wiki):
+    server, base_url = wiki
+    items = [(f"{base_url}/wiki/Nation_{i}",) for i in range(12)]
+    results = asyncio.run(crawl_pages(items, lambda session, url: session.get(url).status_code, 6, rate=20.0))
+    assert results == [200] * 12
+    starts = article_starts(server)
+    # One token up front, then one every 1/20 s
+    assert starts[-1] - starts[0] >= 11 / 20 * 0.9
+
+
+def test_burst_lets_requests_through_at_once(wiki):
+    server, base_url = wiki
+    items = [(f"{base_url}/wiki/Nation_{i}",) for i in range(6)]
+    asyncio.run(crawl_pages(items, lambda session, url: session.get(url), 6, rate=4.0, burst=4))
+    starts = sorted(article_starts(server))
+    assert starts[3] - starts[0] < 0.15
+    assert starts[4] - starts[0] >= 0.25 * 0.9
+
+
+def test_each_thread_gets_its_own_session(wiki):
+    _, base_url = wiki
+    created = []
+
+    def new_session():
+        session = requests.Session()
+        created.append(session)
+        return session
+
+    def fetch(session, url):
+        time.sleep(0.01)
+        session.get(url)
+        return threading.get_ident(), session
+
+    items = [(f"{base_url}/wiki/Nation_{i}",) for i in range(12)]
+    used = asyncio.run(crawl_pages(items, fetch, 3, rate=100.0, new_session=new_session))
+    sessions_by_thread = {}
+    for thread, session in used:
+        sessions_by_thread.setdefault(thread, set()).add(id(session))
+    assert all(len(sessions) == 1 for sessions in sessions_by_thread.values())
+    assert len(created) == len(sessions_by_thread) <= 3
+    assert len({id(session) for session in created}) == len(created)
+
+
+def test_failed_fetches_come_back_as_exceptions(wiki):
+    _, base_url = wiki
+
+    def fetch(session, url):
+        response = session.get(url)
+        response.raise_for_status()
+        return response.status_code
+
+    items = [(f"{base_url}/wiki/Nation_1",), (f"{base_url}/wiki/Missing",), (f"{base_url}/wiki/Nation_2",)]
+    results = asyncio.run(crawl_pages(items, fetch, 2, rate=100.0))
+    assert results[0] == results[2] == 200
+    assert isinstance(results[1], requests.HTTPError)
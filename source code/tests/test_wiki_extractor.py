@@ -0,0 +1,20 @@
+from bs4 import BeautifulSoup
+
+from tests.helpers import reference_nation_fields, standin_nation_page
+from wiki_extractor import extract_nation_fields
+
+
+def comparable(fields):
+    # The per-field extractors return cities in set order
+    return {**fields, 'cities': sorted(fields['cities'])}
+
+
+def test_single_pass_matches_per_field_extractors():
+    for index in range(30):
+        soup = BeautifulSoup(standin_nation_page(index), 'html.parser')
+        assert comparable(extract_nation_fields(soup)) == comparable(reference_nation_fields(soup))
+
+
+def test_page_without_fields():
+    soup = BeautifulSoup('<html><body><p>Nothing to see here.</p></body></html>', 'html.parser')
+    assert comparable(extract_nation_fields(soup)) == comparable(reference_nation_fields(soup))
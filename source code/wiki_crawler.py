@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Sequence, Tuple
+
+import requests
+
+
+class TokenBucket:
+    """Async token bucket allowing `rate` acquisitions per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        """
+        Take a token, waiting until it is due. The token is reserved before
+        sleeping (the balance may go negative), so waiters queue up one
+        interval apart instead of holding a lock while they sleep, and a
+        full bucket lets `capacity` callers through at once.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+async def crawl_pages(items: Sequence[Tuple], fetch: Callable[..., Any], concurrency: int,
+                      rate: float, burst: float = 1.0,
+                      new_session: Callable[[], requests.Session] = requests.Session) -> List[Any]:
+    """
+    Call fetch(session, *item) for every item with at most `concurrency`
+    calls in flight and no more than `rate` calls started per second
+    (`burst` of them at once after a pause). fetch runs on a thread pool
+    and blocks on HTTP; a requests.Session isn't safe to share between
+    threads, so each worker gets its own from new_session. Results come
+    back in item order; a failed call returns its exception.
+    """
+    bucket = TokenBucket(rate, burst)
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    local = threading.local()
+    sessions: List[requests.Session] = []
+
+    def call(item: Tuple) -> Any:
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = new_session()
+            sessions.append(session)
+        return fetch(session, *item)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='crawl') as pool:
+            async def run(item: Tuple) -> Any:
+                async with semaphore:
+                    await bucket.acquire()
+                    return await loop.run_in_executor(pool, call, item)
+
+            return await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
+    finally:
+        for session in sessions:
+            session.close()
@@ -0,0 +1,205 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+
+# Field patterns in priority order, as tried by the extract_* methods on
+# StoneworksDataScraper; each one starts with a literal keyword
+FIELD_PATTERNS: Dict[str, List[str]] = {
+    'population': [
+        r'population[:\s]*(\d+)',
+        r'citizens[:\s]*(\d+)',
+        r'inhabitants[:\s]*(\d+)',
+    ],
+    'capital': [
+        r'capital[:\s]*([^\n\r,]+)',
+        r'capitol[:\s]*([^\n\r,]+)',
+    ],
+    'leader': [
+        r'leader[:\s]*([^\n\r,]+)',
+        r'ruler[:\s]*([^\n\r,]+)',
+        r'king[:\s]*([^\n\r,]+)',
+        r'president[:\s]*([^\n\r,]+)',
+        r'emperor[:\s]*([^\n\r,]+)',
+    ],
+    'territory_size': [
+        r'area[:\s]*([^\n\r,]+)',
+        r'territory[:\s]*([^\n\r,]+)',
+        r'size[:\s]*([^\n\r,]+)',
+    ],
+    'founding_date': [
+        r'founded[:\s]*([^\n\r,]+)',
+        r'established[:\s]*([^\n\r,]+)',
+        r'created[:\s]*([^\n\r,]+)',
+    ],
+    'government_type': [
+        r'government[:\s]*([^\n\r,]+)',
+        r'(?:kingdom|republic|empire|federation|union|state)[^\n\r,]*',
+    ],
+}
+
+# Last-resort territory size pattern, not anchored on a keyword
+SIZE_FALLBACK_RE = re.compile(r'(\d+)\s*(?:chunks?|blocks?|km²?)', re.IGNORECASE)
+
+COORDINATE_RES = [
+    re.compile(r'(\-?\d+)[,\s]+(\-?\d+)', re.IGNORECASE),
+    re.compile(r'x[:\s]*(\-?\d+)[,\s]*z[:\s]*(\-?\d+)', re.IGNORECASE),
+    re.compile(r'coords?[:\s]*(\-?\d+)[,\s]*(\-?\d+)', re.IGNORECASE),
+]
+
+CITY_KEYWORDS = ('city', 'town', 'settlement')
+CITY_NAME_RE = re.compile(r'([A-Z][a-zA-Z\s]+)')
+
+_TEXT_TYPES = (NavigableString, CData)
+
+
+def _leading_keywords(pattern: str) -> List[str]:
+    """Return the literal keywords a field pattern can start with"""
+    group = re.match(r'\(\?:([a-z|]+)\)', pattern)
+    if group:
+        return group.group(1).split('|')
+    return [re.match(r'[a-z]+', pattern).group(0)]
+
+
+def _build_scanner() -> Tuple[str, Dict[str, List[Tuple[str, int, 're.Pattern']]]]:
+    """Build the combined keyword alternation and its keyword -> field patterns dispatch table"""
+    entries = []
+    for field, patterns in FIELD_PATTERNS.items():
+        for priority, pattern in enumerate(patterns):
+            compiled = re.compile(pattern, re.IGNORECASE)
+            for keyword in _leading_keywords(pattern):
+                entries.append((keyword, field, priority, compiled))
+
+    # Only keywords without a shorter keyword as prefix go into the scanner
+    # ("king" also triggers the "kingdom" pattern), so at most one
+    # alternative matches at any position
+    keywords = {keyword for keyword, _, _, _ in entries}
+    minimal = sorted(k for k in keywords if not any(k != other and k.startswith(other) for other in keywords))
+    dispatch = {
+        prefix: [
+            (field, priority, compiled)
+            for keyword, field, priority, compiled in entries
+            if keyword.startswith(prefix)
+        ]
+        for prefix in minimal
+    }
+    # No capture groups: they stop re from using its literal-prefix fast path
+    return '|'.join(minimal), dispatch
+
+
+_KEYWORD_ALTERNATION, KEYWORD_DISPATCH = _build_scanner()
+ALL_FIELD_PATTERNS = [entry for entries in KEYWORD_DISPATCH.values() for entry in entries]
+# Case-sensitive scanning of lowercased text is far faster than IGNORECASE;
+# the folded scanner is for text whose length changes when lowercased
+KEYWORD_SCANNER = re.compile(_KEYWORD_ALTERNATION)
+FOLDED_KEYWORD_SCANNER = re.compile(_KEYWORD_ALTERNATION, re.IGNORECASE)
+
+
+def collect_text(soup: BeautifulSoup) -> Tuple[str, List[str]]:
+    """
+    Walk the tree once, returning the page text (same as soup.get_text())
+    and the text of every li/ul element in document order.
+    """
+    pieces: List[str] = []
+    offsets = [0]
+    list_spans: List[List[int]] = []
+
+    stack = [(iter(soup.contents), None)]
+    while stack:
+        children, span = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            if span is not None:
+                list_spans[span][1] = len(pieces)
+            continue
+        if isinstance(child, Tag):
+            span = None
+            if child.name in ('li', 'ul'):
+                span = len(list_spans)
+                list_spans.append([len(pieces), 0])
+            stack.append((iter(child.contents), span))
+        elif type(child) in _TEXT_TYPES:
+            pieces.append(child)
+            offsets.append(offsets[-1] + len(child))
+
+    text = ''.join(pieces)
+    return text, [text[offsets[start]:offsets[end]] for start, end in list_spans]
+
+
+def scan_fields(text: str) -> Dict[str, Optional[str]]:
+    """Find the highest-priority match of every keyword field in a single scan of the text"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        scanner, haystack = KEYWORD_SCANNER, lowered
+    else:
+        scanner, haystack = FOLDED_KEYWORD_SCANNER, text
+
+    best: Dict[str, Tuple[int, 're.Match']] = {}
+    hit = scanner.search(haystack)
+    while hit:
+        position = hit.start()
+        candidates = KEYWORD_DISPATCH.get(hit.group().lower(), ALL_FIELD_PATTERNS)
+        for field, priority, compiled in candidates:
+            found = best.get(field)
+            if found is not None and found[0] <= priority:
+                continue
+            match = compiled.match(text, position)
+            if match:
+                best[field] = (priority, match)
+        # Resume one character on, so keywords overlapping this one are still seen
+        hit = scanner.search(haystack, position + 1)
+
+    values: Dict[str, Optional[str]] = {}
+    for field in FIELD_PATTERNS:
+        match = best[field][1] if field in best else None
+        if match is None:
+            values[field] = None
+        elif match.re.groups:
+            values[field] = match.group(1).strip()
+        else:
+            values[field] = match.group(0).strip()
+
+    if values['territory_size'] is None:
+        size_match = SIZE_FALLBACK_RE.search(text)
+        if size_match:
+            values['territory_size'] = size_match.group(1).strip()
+    if values['population'] is not None:
+        values['population'] = int(values['population'])
+    return values
+
+
+def extract_coordinates(text: str) -> List[Tuple[int, int]]:
+    """Collect coordinate pairs from every coordinate pattern, in pattern order"""
+    coords = []
+    for pattern in COORDINATE_RES:
+        for x, z in pattern.findall(text):
+            coords.append((int(x), int(z)))
+    return coords
+
+
+def extract_cities(list_texts: List[str]) -> List[str]:
+    """Pull capitalised names out of list items that mention cities or towns"""
+    cities = []
+    for text in list_texts:
+        text = text.strip()
+        lowered = text.lower()
+        if any(keyword in lowered for keyword in CITY_KEYWORDS):
+            cities.extend(city.strip() for city in CITY_NAME_RE.findall(text) if len(city.strip()) > 2)
+    return list(dict.fromkeys(cities))  # Remove duplicates, keep page order
+
+
+def extract_nation_fields(soup: BeautifulSoup) -> Dict:
+    """Extract every nation record field from a parsed wiki page in one pass over its text"""
+    text, list_texts = collect_text(soup)
+    fields = scan_fields(text)
+    return {
+        'population': fields['population'],
+        'capital': fields['capital'],
+        'leader': fields['leader'],
+        'coordinates': extract_coordinates(text),
+        'cities': extract_cities(list_texts),
+        'territory_size': fields['territory_size'],
+        'founding_date': fields['founding_date'],
+        'government_type': fields['government_type'],
+    }